@@ -15,10 +15,15 @@ def process_one(training_data, some_parameter_int, some_parameter_float, some_pa
     init()
 
     with mlflow.start_run(nested=True):
-        mlflow.log_param(key="training_data", value=training_data)
-        mlflow.log_param(key="some_parameter_int", value=some_parameter_int)
-        mlflow.log_param(key="some_parameter_float", value=some_parameter_float)
-        mlflow.log_param(key="some_parameter_string", value=some_parameter_string)
+        # A single (batched) request, rather than one per param.
+        mlflow.log_params(
+            params={
+                "training_data": training_data,
+                "some_parameter_int": some_parameter_int,
+                "some_parameter_float": some_parameter_float,
+                "some_parameter_string": some_parameter_string,
+            }
+        )
 
         mlflow.log_dict(dictionary={"sample_key": "sample_value"}, artifact_file="business_metrics.json")
 
@@ -1,12 +1,27 @@
 """
 This module contains data related helper functions.
 """
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
 import numpy as np
 import pandas as pd
 from pydantic import BaseModel
 from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsRegressor
 
+# Processed frames are cached here (as Parquet), keyed by the source file hash and `PROCESSING_VERSION`.
+DATA_CACHE_DIR: str = os.environ.get("DATA_CACHE_DIR", "data/cache")
+
+# Bump this whenever `process_data` (or `impute_knn`) changes, so previously cached frames are not used.
+PROCESSING_VERSION: str = "1"
+
+# The source file hashes, by (path, size, modification time), so a file is only hashed once per process.
+_SOURCE_HASHES: dict[tuple, str] = {}
+
 
 class DataSet(BaseModel):
     """DataSet DTO"""
@@ -22,7 +37,7 @@ class DataSet(BaseModel):
         arbitrary_types_allowed = True
 
 
-def prepare_data(csv_url: str) -> DataSet:
+def prepare_data(csv_url: str, cache_dir: Optional[str] = DATA_CACHE_DIR) -> DataSet:
     """
     Loads the data from csv file, and returns train, test splits for training.
 
@@ -30,6 +45,8 @@ def prepare_data(csv_url: str) -> DataSet:
     ----------
     csv_url: str
         The location of the CSV file to load.
+    cache_dir: Optional[str]
+        The directory of the processed data cache (see `load_data`), None disables the cache.
 
     Returns
     -------
@@ -37,16 +54,105 @@ def prepare_data(csv_url: str) -> DataSet:
         An instance of a DataSet DTO.
     """
 
-    (X, y) = load_data(csv_url=csv_url, truth_col_name="median_house_value")
+    (X, y) = load_data(csv_url=csv_url, truth_col_name="median_house_value", cache_dir=cache_dir)
     X_train, X_test, y_train, y_test = train_test_split(X, y)
     return DataSet(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
 
 
-def impute_knn(df: pd.DataFrame) -> pd.DataFrame:
+class KNeighborsImputer:
     """
-    Imputation with KNN unsupervised method
+    Imputes missing numerical data with a (multi-output) KNN regressor.
+    The regressor is fit once on the complete rows, using the columns without missing data as features and the columns
+    with missing data as targets, and every missing value is then predicted in one batched query.  `transform` can
+    be called many times (e.g. on scoring data) after a single `fit`.
     From https://www.kaggle.com/code/shtrausslearning/bayesian-regression-house-price-prediction
     license: LICENSE.apache
+    """
+
+    def __init__(self, n_neighbors: int = 5):
+        """
+        Parameters
+        ----------
+        n_neighbors: int
+            The number of neighbors averaged for each imputed value.
+        """
+
+        self.n_neighbors: int = n_neighbors
+        self.feature_columns: list[str] = []
+        self.target_columns: list[str] = []
+        self.model: Optional[KNeighborsRegressor] = None
+
+    def fit(self, df: pd.DataFrame) -> "KNeighborsImputer":
+        """
+        Fits the imputer.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Input features, the numerical columns with missing data are the ones imputed.
+
+        Returns
+        -------
+        imputer: KNeighborsImputer
+            The fit imputer.
+        """
+
+        ldf: pd.DataFrame = df.select_dtypes(include=[np.number])
+        has_nan: pd.Series = ldf.isna().any()
+        self.feature_columns = ldf.columns[~has_nan].tolist()
+        self.target_columns = ldf.columns[has_nan].tolist()
+
+        self.model = None
+        if self.target_columns:
+            train: pd.DataFrame = ldf.dropna()
+            self.model = KNeighborsRegressor(n_neighbors=self.n_neighbors)
+            self.model.fit(train[self.feature_columns].to_numpy(), train[self.target_columns].to_numpy())
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fills the missing data in the columns seen with missing data during `fit`.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Input features
+
+        Returns
+        -------
+        imputed_df: pd.DataFrame
+            Imputed features (missing data filled), numerical columns first.
+        """
+
+        ldf: pd.DataFrame = df.select_dtypes(include=[np.number]).copy()
+        ldf_putaside: pd.DataFrame = df.select_dtypes(exclude=[np.number])
+
+        if self.model is not None:
+            if ldf[self.feature_columns].isna().any().any():
+                raise ValueError(f"Missing data in feature columns: {self.feature_columns}, refit the imputer")
+
+            targets: np.ndarray = ldf[self.target_columns].to_numpy(dtype=float, copy=True)
+            missing: np.ndarray = np.isnan(targets)
+            rows: np.ndarray = missing.any(axis=1)
+            if rows.any():
+                # One query for every row with missing data, only the missing cells are filled.
+                predicted: np.ndarray = self.model.predict(ldf.loc[rows, self.feature_columns].to_numpy())
+                targets[rows] = np.where(missing[rows], predicted.reshape(len(predicted), -1), targets[rows])
+                ldf[self.target_columns] = targets
+
+        return pd.concat([ldf, ldf_putaside], axis=1)
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fits the imputer and fills the missing data of the same frame.
+        """
+
+        return self.fit(df=df).transform(df=df)
+
+
+def impute_knn(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Imputation with KNN unsupervised method (see `KNeighborsImputer`)
 
     Parameters
     ----------
@@ -59,22 +165,7 @@ def impute_knn(df: pd.DataFrame) -> pd.DataFrame:
         Imputed features (missing data filled)
     """
 
-    # separate dataframe into numerical/categorical
-    ldf = df.select_dtypes(include=[np.number])  # select numerical columns in df
-    ldf_putaside = df.select_dtypes(exclude=[np.number])  # select categorical columns in df
-
-    # define columns w/ and w/o missing data
-    cols_nan = ldf.columns[ldf.isna().any()].tolist()  # columns w/ nan
-    cols_no_nan = ldf.columns.difference(cols_nan).values  # columns w/o nan
-
-    for col in cols_nan:
-        imp_test = ldf[ldf[col].isna()]  # indices which have missing data will become our test set
-        imp_train = ldf.dropna()  # all indices that have no missing data
-        model = KNeighborsRegressor(n_neighbors=5)  # KNR Unsupervised Approach
-        knr = model.fit(imp_train[cols_no_nan], imp_train[col])
-        ldf.loc[df[col].isna(), col] = knr.predict(imp_test[cols_no_nan])
-
-    return pd.concat([ldf, ldf_putaside], axis=1)
+    return KNeighborsImputer(n_neighbors=5).fit_transform(df=df)
 
 
 def process_data(data: pd.DataFrame) -> pd.DataFrame:
@@ -116,7 +207,58 @@ def process_data(data: pd.DataFrame) -> pd.DataFrame:
     return data
 
 
-def load_data(csv_url: str, truth_col_name: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+def _source_hash(path: Path) -> str:
+    stat: os.stat_result = path.stat()
+    key: tuple = (path.resolve().as_posix(), stat.st_size, stat.st_mtime_ns)
+    if key not in _SOURCE_HASHES:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        _SOURCE_HASHES[key] = digest.hexdigest()
+    return _SOURCE_HASHES[key]
+
+
+def read_processed_data(csv_url: str, cache_dir: Optional[str] = DATA_CACHE_DIR) -> pd.DataFrame:
+    """
+    Reads and processes the CSV file, re-using the processed frame cached by an earlier call when there is one.
+    The cache is keyed by the hash of the file and `PROCESSING_VERSION`, it is only used for local files.
+
+    Parameters
+    ----------
+    csv_url: str
+        The location of the CSV file to load.
+    cache_dir: Optional[str]
+        The directory of the processed data cache, None disables the cache.
+
+    Returns
+    -------
+    processed_data: pd.DataFrame
+        Processed data suitable for downstream consumption.
+    """
+
+    source: Path = Path(csv_url)
+    if cache_dir is None or not source.is_file():
+        return process_data(data=pd.read_csv(csv_url, sep=","))
+
+    cache_key: str = hashlib.sha256(f"{_source_hash(path=source)}:{PROCESSING_VERSION}".encode("utf-8")).hexdigest()
+    cache_file: Path = Path(cache_dir) / f"{source.stem}-{cache_key[:16]}.parquet"
+    if cache_file.is_file():
+        return pd.read_parquet(cache_file)
+
+    data: pd.DataFrame = process_data(data=pd.read_csv(csv_url, sep=","))
+
+    # Written to a unique name then renamed, so concurrent runs never read a partially written file.
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    partial_file: Path = cache_file.with_name(f"{cache_file.name}.{uuid.uuid4().hex}.tmp")
+    data.to_parquet(partial_file)
+    os.replace(partial_file, cache_file)
+    return data
+
+
+def load_data(
+    csv_url: str, truth_col_name: str, cache_dir: Optional[str] = DATA_CACHE_DIR
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Loads features and truth data from specified CSV file and truth column.
 
@@ -126,6 +268,8 @@ def load_data(csv_url: str, truth_col_name: str) -> tuple[pd.DataFrame, pd.DataF
         The location of the CSV file to load.
     truth_col_name: str
         The name of column which contains the truth data.
+    cache_dir: Optional[str]
+        The directory of the processed data cache (see `read_processed_data`), None disables the cache.
 
     Returns
     -------
@@ -133,8 +277,7 @@ def load_data(csv_url: str, truth_col_name: str) -> tuple[pd.DataFrame, pd.DataF
         A tuple of (X, y)
     """
 
-    data: pd.DataFrame = pd.read_csv(csv_url, sep=",")
-    data = process_data(data=data)
+    data: pd.DataFrame = read_processed_data(csv_url=csv_url, cache_dir=cache_dir)
     X: pd.DataFrame = data.drop([truth_col_name], axis=1)
     y: pd.DataFrame = data[[truth_col_name]]
     return X, y
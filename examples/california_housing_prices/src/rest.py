@@ -2,17 +2,201 @@
 This module contains REST helper functions.
 """
 
-from typing import Optional
+import gzip
+import threading
+import time
+import numbers
+from collections import Counter, OrderedDict
+from collections.abc import Hashable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Collection, Dict, List, Literal, Optional, Tuple, Union, get_args
 
+import numpy as np
+import orjson
 import pandas as pd
-from requests import Session
+from pydantic import BaseModel
+from requests import RequestException, Session
 from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
 
 from ae5_tools import demand_env_var
 
+# The module level session, shared by every call so that connections (and their TLS handshakes) are re-used.
+_SESSION: Optional[Session] = None
+_SESSION_LOCK: threading.Lock = threading.Lock()
 
-def invoke_rest_endpoint(endpoint_url: str, input_data: dict, auth: bool = True) -> dict:
+# The scoring payload formats accepted by the MLflow `/invocations` endpoint.
+PayloadFormat = Literal["dataframe_split", "dataframe_records"]
+PAYLOAD_FORMATS: Tuple[str, ...] = get_args(PayloadFormat)
+
+
+class ScoringOptions(BaseModel):
+    """ScoringOptions DTO, how `predict` (and `predict_async`) send the feature data"""
+
+    chunk_size: int = 1000
+    chunk_retries: int = 2
+    timeout: float = 30
+    payload_format: PayloadFormat = "dataframe_split"
+    compress: bool = False
+
+
+class EndpointError(Exception):
+    """
+    Raised when the REST endpoint responds with a status other than 200.
+    """
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Received status code: ({status_code}), Failed to call prediction: {text}")
+        self.status_code: int = status_code
+
+
+def _create_session(
+    pool_size: int = 10,
+    keep_alive: bool = True,
+    total_retries: int = 10,
+    backoff_factor: float = 0.1,
+    status_forcelist: Collection[int] = (502, 503, 504),
+) -> Session:
+    session: Session = Session()
+    retries: Retry = Retry(
+        total=total_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=list(status_forcelist),
+        allowed_methods={"POST"},
+    )
+    adapter: HTTPAdapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount(prefix="https://", adapter=adapter)
+    session.mount(prefix="http://", adapter=adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def configure_session(
+    pool_size: int = 10,
+    keep_alive: bool = True,
+    total_retries: int = 10,
+    backoff_factor: float = 0.1,
+    status_forcelist: Collection[int] = (502, 503, 504),
+) -> Session:
+    """
+    (Re)creates the pooled session used by `invoke_rest_endpoint`.
+    This is optional, a session with the default settings is created on first use.  Call it before making requests,
+    the previous session is closed.
+
+    Parameters
+    ----------
+    pool_size: int
+        The maximum number of connections kept open per host, set this to at least the number of concurrent callers.
+    keep_alive: bool
+        Flag for keeping connections open between requests.  When disabled every request pays for a new connection.
+    total_retries: int
+        The number of times a request is retried on connection errors, or the `status_forcelist` status codes.
+    backoff_factor: float
+        The exponential backoff factor (in seconds) between retries.
+    status_forcelist: Collection[int]
+        The response status codes which are retried.
+
+    Returns
+    -------
+    session: Session
+        The new session.
+    """
+
+    global _SESSION  # pylint: disable=global-statement
+
+    session: Session = _create_session(
+        pool_size=pool_size,
+        keep_alive=keep_alive,
+        total_retries=total_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+    )
+
+    with _SESSION_LOCK:
+        previous: Optional[Session] = _SESSION
+        _SESSION = session
+    if previous is not None:
+        previous.close()
+
+    return session
+
+
+def get_session() -> Session:
+    """
+    Gets the pooled session, creating it (with the default settings) on first use.
+
+    Returns
+    -------
+    session: Session
+        The module level session.
+    """
+
+    global _SESSION  # pylint: disable=global-statement
+
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = _create_session()
+        return _SESSION
+
+
+def _rows(data_x: pd.DataFrame) -> Union[np.ndarray, List[tuple]]:
+    # A frame of one numeric (or bool) dtype is serialized straight from its NumPy buffer.  Mixed dtypes would be
+    # upcast (e.g. ints to floats, or bools to objects) in a single array, so those rows are built from each column.
+    dtypes: set = set(data_x.dtypes)
+    dtype: Any = dtypes.pop() if len(dtypes) == 1 else None
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        return np.ascontiguousarray(data_x.to_numpy())
+    return list(zip(*(data_x[column].tolist() for column in data_x.columns)))
+
+
+def encode_payload(data_x: pd.DataFrame, payload_format: str = "dataframe_split", compress: bool = False) -> bytes:
+    """
+    Encodes feature data as a scoring request body.
+    The JSON is written by orjson, without whitespace, and `dataframe_split` sends the column names once rather than
+    once per row.  When every column shares one numeric dtype (as the processed features do) the values are serialized
+    from the NumPy buffer, without creating a Python object per cell.  `dataframe_records` still needs a dict per row.
+
+    Parameters
+    ----------
+    data_x: pd.DataFrame
+        The feature data to encode.
+    payload_format: str
+        One of `PAYLOAD_FORMATS`.
+    compress: bool
+        Flag for gzip compressing the body (send it with `content_encoding="gzip"`).
+
+    Returns
+    -------
+    payload: bytes
+        The request body.
+    """
+
+    columns: List[str] = [str(column) for column in data_x.columns]
+    rows: Union[np.ndarray, List[tuple]] = _rows(data_x=data_x)
+
+    body: Union[dict, List[dict]]
+    if payload_format == "dataframe_split":
+        body = {"columns": columns, "data": rows}
+    elif payload_format == "dataframe_records":
+        body = [dict(zip(columns, row)) for row in (rows.tolist() if isinstance(rows, np.ndarray) else rows)]
+    else:
+        raise ValueError(f"Unknown payload format: ({payload_format}), expected one of {PAYLOAD_FORMATS}")
+
+    payload: bytes = orjson.dumps({payload_format: body}, option=orjson.OPT_SERIALIZE_NUMPY)
+    if compress:
+        # A low level, the larger levels cost far more time than they save in bytes on numeric data.
+        payload = gzip.compress(payload, compresslevel=1)
+    return payload
+
+
+def invoke_rest_endpoint(
+    endpoint_url: str,
+    input_data: Union[dict, bytes],
+    auth: bool = True,
+    timeout: float = 30,
+    content_encoding: Optional[str] = None,
+) -> dict:
     """
     Invokes the REST endpoint.
 
@@ -20,48 +204,92 @@ def invoke_rest_endpoint(endpoint_url: str, input_data: dict, auth: bool = True)
     ----------
     endpoint_url: str
         The URL of the REST endpoint.
-    input_data: dict
-        The data to POST to the endpoint.
+    input_data: Union[dict, bytes]
+        The data to POST to the endpoint, either a JSON serializable dict or an encoded body (see `encode_payload`).
     auth: bool
         Flag for providing bearer token.
+    timeout: float
+        Seconds to wait for the endpoint to respond.
+    content_encoding: Optional[str]
+        The `Content-Encoding` of an encoded body (e.g. `gzip`).
 
     Returns
     -------
     response: dict
-        The response from the API, raises Exception under failure conditions.
+        The response from the API, raises `EndpointError` (or a `RequestException`) under failure conditions.
     """
 
     headers: dict = {}
     if auth:
         headers: dict = {"Authorization": f"Bearer {demand_env_var(name='SELF_HOSTED_MODEL_ENDPOINT_TOKEN')}"}
 
-    session: Session = Session()
-    retries: Retry = Retry(
-        total=10,
-        backoff_factor=0.1,
-        status_forcelist=[502, 503, 504],
-        allowed_methods={"POST"},
-    )
-    adapter: HTTPAdapter = HTTPAdapter(max_retries=retries)
-    session.mount(prefix="https://", adapter=adapter)
-
     post_params: dict = {
         "url": f"{endpoint_url}/invocations",
-        "json": input_data,
         "verify": False,
         "headers": headers,
-        "timeout": 30,
+        "timeout": timeout,
     }
+    if isinstance(input_data, bytes):
+        headers["Content-Type"] = "application/json"
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        post_params["data"] = input_data
+    else:
+        post_params["json"] = input_data
 
-    response = session.post(**post_params)
+    response = get_session().post(**post_params)
     if response.status_code != 200:
-        raise Exception(f"Received status code: ({response.status_code}), Failed to call prediction: {response.text}")
+        raise EndpointError(status_code=response.status_code, text=response.text)
     return response.json()
 
 
-def predict(endpoint_url: Optional[str], data_x: pd.DataFrame, auth: bool = True) -> pd.DataFrame:
+def _chunk(data_x: pd.DataFrame, chunk_size: int) -> List[pd.DataFrame]:
+    # Splits the feature data into chunks of rows (a single chunk when there are no rows).
+    chunks: List[pd.DataFrame] = [
+        data_x.iloc[start : start + chunk_size] for start in range(0, len(data_x), chunk_size)
+    ]
+    return chunks if chunks else [data_x]
+
+
+def _chunk_request(chunk: pd.DataFrame, options: ScoringOptions) -> Dict[str, Any]:
+    # The request arguments of a chunk (for `invoke_rest_endpoint`, or its async counterpart), encoded once and re-sent
+    # as is on a retry.
+    return {
+        "input_data": encode_payload(data_x=chunk, payload_format=options.payload_format, compress=options.compress),
+        "timeout": options.timeout,
+        "content_encoding": "gzip" if options.compress else None,
+    }
+
+
+def _retry_chunk(error: Exception, attempt: int, options: ScoringOptions) -> bool:
+    # Failed chunks are re-sent while retries remain, unless the endpoint rejected the request (a client error).
+    return attempt < options.chunk_retries and not (isinstance(error, EndpointError) and error.status_code < 500)
+
+
+def _predict_chunk(endpoint_url: str, chunk: pd.DataFrame, auth: bool, options: ScoringOptions) -> pd.DataFrame:
+    # Retries only this chunk, on transport errors (once the session's own retries are exhausted) and server errors.
+    request: Dict[str, Any] = _chunk_request(chunk=chunk, options=options)
+    attempt: int = 0
+    while True:
+        try:
+            return pd.DataFrame(invoke_rest_endpoint(endpoint_url=endpoint_url, auth=auth, **request))
+        except (RequestException, EndpointError) as error:
+            if not _retry_chunk(error=error, attempt=attempt, options=options):
+                raise
+            time.sleep(0.5 * 2**attempt)
+            attempt += 1
+
+
+def predict(
+    endpoint_url: Optional[str],
+    data_x: pd.DataFrame,
+    auth: bool = True,
+    max_workers: int = 4,
+    options: Optional[ScoringOptions] = None,
+) -> pd.DataFrame:
     """
     Get prediction for the given input.
+    The input is split into chunks of rows which are scored concurrently, and the predictions are returned in order.
 
     Parameters
     ----------
@@ -69,6 +297,18 @@ def predict(endpoint_url: Optional[str], data_x: pd.DataFrame, auth: bool = True
         The URL of the REST endpoint.
     data_x: pd.DataFrame
         The feature data to predict on.
+    auth: bool
+        Flag for providing bearer token.
+    max_workers: int
+        The number of requests to have in flight at once (keep within the session pool size, see `configure_session`).
+    options: Optional[ScoringOptions]
+        How the data is sent, defaults to `ScoringOptions()`:
+        `chunk_size`, the number of rows to send per request.
+        `chunk_retries`, the number of times a failed chunk is re-sent (on its own) before the prediction fails.
+        `timeout`, seconds to wait for the endpoint to respond to each chunk.
+        `payload_format`, the request payload format, one of `PAYLOAD_FORMATS`.
+        `compress`, flag for gzip compressing the request bodies, only set this when the endpoint (or a proxy in front
+        of it) accepts `Content-Encoding: gzip` requests.
 
     Returns
     -------
@@ -77,14 +317,179 @@ def predict(endpoint_url: Optional[str], data_x: pd.DataFrame, auth: bool = True
     """
 
     endpoint_url = endpoint_url if endpoint_url else demand_env_var(name="SELF_HOSTED_MODEL_ENDPOINT")
+    options = options if options is not None else ScoringOptions()
 
-    # Build the prediction request
-    params: dict = {
-        "endpoint_url": endpoint_url,
-        "input_data": {"dataframe_records": data_x.to_dict(orient="records")},
-        "auth": auth,
-    }
+    # `map` yields the results in the order of the chunks, regardless of the order they complete in.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        y_preds: List[pd.DataFrame] = list(
+            executor.map(
+                lambda chunk: _predict_chunk(endpoint_url=endpoint_url, chunk=chunk, auth=auth, options=options),
+                _chunk(data_x=data_x, chunk_size=options.chunk_size),
+            )
+        )
+
+    return pd.concat(y_preds, ignore_index=True)
+
+
+class PredictionCache:
+    """
+    A least recently used cache of endpoint responses, keyed by the (quantized) features and the model version.
+    Entries expire after `ttl` seconds, and every entry is dropped when a different model version is seen, so stale
+    predictions are never returned once the served model changes.
+
+    Usage:
+        cache = PredictionCache()
+        response = cache.invoke(endpoint_url=endpoint_url, features={"longitude": -120.0, ...}, model_version="3")
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600, decimals: int = 6):
+        """
+        Parameters
+        ----------
+        max_size: int
+            The maximum number of responses held, the least recently used is evicted beyond that.
+        ttl: float
+            Seconds a response is held for.
+        decimals: int
+            The number of decimals real number feature values are rounded to in the key (so float noise still hits),
+            other values (e.g. categories, or numbers sent as strings) are keyed by their type and value.
+        """
+
+        self.max_size: int = max_size
+        self.ttl: float = ttl
+        self.decimals: int = decimals
+        self.model_version: Optional[str] = None
+
+        # The hits, misses, evictions, expirations and invalidations (see `stats`).
+        self._counts: Counter = Counter()
+
+        # key -> (expiry, response), in least to most recently used order.
+        self._entries: OrderedDict[tuple, Tuple[float, dict]] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def _key(self, features: Dict[str, Any]) -> tuple:
+        return tuple((name, self._key_value(value=value)) for name, value in sorted(features.items()))
+
+    def _key_value(self, value: Any) -> Any:
+        # Real numbers (numpy's included) are rounded so float noise still hits.  Anything else (e.g. a category, a
+        # bool, or a number sent as a string) is keyed with its type, so "10", "1e1" and 10 are different keys.
+        if isinstance(value, numbers.Real) and not isinstance(value, bool):
+            return round(float(value), self.decimals)
+        return type(value).__name__, value if isinstance(value, Hashable) else repr(value)
+
+    def _check_model_version(self, model_version: str) -> None:
+        if model_version != self.model_version:
+            if self._entries:
+                self._counts["invalidations"] += 1
+            self._entries.clear()
+            self.model_version = model_version
+
+    def get(self, features: Dict[str, Any], model_version: str) -> Optional[dict]:
+        """
+        Gets the cached response for the features, or None (a miss).
+        """
+
+        key: tuple = self._key(features=features)
+        with self._lock:
+            self._check_model_version(model_version=model_version)
+            entry: Optional[Tuple[float, dict]] = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._counts["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return entry[1]
+
+    def put(self, features: Dict[str, Any], model_version: str, response: dict) -> None:
+        """
+        Caches the response for the features.
+        """
+
+        key: tuple = self._key(features=features)
+        with self._lock:
+            self._check_model_version(model_version=model_version)
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def invoke(
+        self,
+        endpoint_url: str,
+        features: Dict[str, Any],
+        model_version: str,
+        auth: bool = True,
+        timeout: float = 30,
+    ) -> dict:
+        """
+        Invokes the REST endpoint for a single row of features, unless the response is already cached.
+
+        Parameters
+        ----------
+        endpoint_url: str
+            The URL of the REST endpoint.
+        features: Dict[str, Any]
+            The feature values of the row, by column name.
+        model_version: str
+            The version of the model served by the endpoint.
+        auth: bool
+            Flag for providing bearer token.
+        timeout: float
+            Seconds to wait for the endpoint to respond.
+
+        Returns
+        -------
+        response: dict
+            The (possibly cached) response from the API.
+        """
+
+        response: Optional[dict] = self.get(features=features, model_version=model_version)
+        if response is None:
+            response = invoke_rest_endpoint(
+                endpoint_url=endpoint_url, input_data={"dataframe_records": [features]}, auth=auth, timeout=timeout
+            )
+            self.put(features=features, model_version=model_version, response=response)
+        return response
+
+    def clear(self) -> None:
+        """
+        Drops every cached response (the statistics are kept).
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of lookups answered from the cache.
+        """
+
+        lookups: int = self._counts["hits"] + self._counts["misses"]
+        return self._counts["hits"] / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Gets the cache statistics.
+
+        Returns
+        -------
+        stats: Dict[str, float]
+            The size, hits, misses, hit rate, evictions (size), expirations (ttl) and invalidations (model version).
+        """
 
-    # Call prediction service
-    y_pred_dict: dict = invoke_rest_endpoint(**params)
-    return pd.DataFrame(y_pred_dict)
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self._counts["hits"],
+                "misses": self._counts["misses"],
+                "hit_rate": self.hit_rate,
+                "evictions": self._counts["evictions"],
+                "expirations": self._counts["expirations"],
+                "invalidations": self._counts["invalidations"],
+            }
@@ -0,0 +1,246 @@
+"""
+This module contains a successive halving hyperparameter search.
+
+Every candidate is first trained on a small budget, then only the best `1 / eta` of them are trained again on `eta`
+times the budget, and so on until the survivors are trained on the full budget.  Poor candidates are dropped after a
+cheap trial rather than each costing a full training run.  Each rung runs as a parallel sweep (see `run_sweep`).
+"""
+
+import math
+from typing import Any, Callable, Optional
+
+import mlflow
+import numpy as np
+import pandas as pd
+from mlflow.entities import Run
+from pydantic import BaseModel
+
+from src.data import DataSet
+from src.sweep import SweepConfig, SweepResult, Trial, TrialRun, run_sweep
+
+
+class HalvingSchedule(BaseModel):
+    """HalvingSchedule DTO"""
+
+    min_budget: float
+    max_budget: float = 1.0
+    eta: int = 3
+    apply_budget: Optional[Callable[[dict[str, Any], int], dict[str, Any]]] = None
+
+    @property
+    def budgets(self) -> list[float]:
+        """
+        The budget of each rung, ending on the full budget (whole numbers when `apply_budget` is given).
+        """
+
+        rung_count: int = int(math.floor(math.log(self.max_budget / self.min_budget, self.eta) + 1e-9)) + 1
+        budgets: list[float] = [self.max_budget * self.eta ** (rung - rung_count + 1) for rung in range(rung_count)]
+        if self.apply_budget is not None:
+            budgets = [float(max(1, round(budget))) for budget in budgets]
+        return budgets
+
+
+class Rung(BaseModel):
+    """Rung DTO"""
+
+    budget: float
+    candidates: list[int]
+    sweep: SweepResult
+
+
+class SearchResult(BaseModel):
+    """SearchResult DTO"""
+
+    parent_run_id: str
+    rungs: list[Rung]
+    best: Optional[Trial] = None
+    best_run: Optional[Run] = None
+    compute_used: float
+    compute_full_grid: float
+
+    class Config:
+        """Pydantic class config override"""
+
+        arbitrary_types_allowed = True
+
+    @property
+    def compute_saved(self) -> float:
+        """
+        The fraction of the full grid's compute (every candidate on the full budget) which was not spent.
+        """
+
+        return 1 - self.compute_used / self.compute_full_grid if self.compute_full_grid else 0.0
+
+
+def subsample(ds: DataSet, fraction: float, seed: int = 42) -> DataSet:
+    """
+    Takes a fraction of the training rows (the test rows are kept whole, so scores remain comparable).
+    The rows are taken from a fixed permutation, so a larger fraction is a superset of a smaller one.
+
+    Parameters
+    ----------
+    ds: DataSet
+        The data set.
+    fraction: float
+        The fraction of training rows to keep.
+    seed: int
+        The seed of the permutation.
+
+    Returns
+    -------
+    ds: DataSet
+        The subsampled data set.
+    """
+
+    if fraction >= 1:
+        return ds
+    rows: np.ndarray = np.random.default_rng(seed=seed).permutation(len(ds.X_train))
+    rows = np.sort(rows[: max(1, round(fraction * len(rows)))])
+    return DataSet(X_train=ds.X_train.iloc[rows], X_test=ds.X_test, y_train=ds.y_train.iloc[rows], y_test=ds.y_test)
+
+
+def _describe(parameters: dict[str, Any]) -> dict[str, Any]:
+    # Flattens model parameters (e.g. `HyperParameters`) into leaderboard columns.
+    description: dict[str, Any] = {}
+    for name, value in parameters.items():
+        if isinstance(value, BaseModel):
+            description.update(dict(value))
+        else:
+            description[name] = value
+    return description
+
+
+def _rank(sweep: SweepResult, config: SweepConfig) -> list[int]:
+    # The indexes of the sweep's trials from best to worst, failed (and unscored) trials last.
+    sign: float = -1.0 if config.greater_is_better else 1.0
+    scores: list[float] = [
+        trial.metrics[config.metric] * sign if config.metric in trial.metrics else math.inf for trial in sweep.trials
+    ]
+    return sorted(range(len(scores)), key=scores.__getitem__)
+
+
+def _log_rung(rung: Rung, number: int, order: list[int], candidates: list[dict[str, Any]], metric: str) -> None:
+    # Logs the rung's leaderboard, budget and best metric to the search run.
+    leaderboard: pd.DataFrame = pd.DataFrame(
+        [
+            {
+                "rank": rank + 1,
+                "candidate": rung.candidates[index],
+                "budget": rung.budget,
+                metric: rung.sweep.trials[index].metrics.get(metric),
+                "run_id": rung.sweep.trials[index].run_id,
+                "error": rung.sweep.trials[index].error,
+                **_describe(parameters=candidates[rung.candidates[index]]),
+            }
+            for rank, index in enumerate(order)
+        ]
+    )
+    mlflow.log_table(data=leaderboard, artifact_file=f"leaderboard/rung-{number}.json")
+    mlflow.log_metrics({"rung_budget": rung.budget, "rung_trials": len(rung.candidates)}, step=number)
+    if rung.sweep.best is not None:
+        mlflow.log_metric(key=f"rung_best_{metric}", value=rung.sweep.best.metrics[metric], step=number)
+
+
+def successive_halving(
+    train: Callable[..., TrialRun],
+    ds: DataSet,
+    candidates: list[dict[str, Any]],
+    schedule: HalvingSchedule,
+    config: SweepConfig,
+) -> SearchResult:
+    """
+    Searches the candidates with successive halving.
+    The budget is the fraction of training rows (`min_budget` to `max_budget` of 1.0) unless `apply_budget` is given,
+    in which case it is a whole number (e.g. boosting rounds) which `apply_budget` applies to the candidate's
+    parameters, for example with the XGBoost `train`:
+        def apply_budget(candidate: dict, rounds: int) -> dict:
+            return {"parameters": candidate["parameters"].copy(update={"n_estimators": rounds})}
+
+    Parameters
+    ----------
+    train: Callable[..., TrialRun]
+        The training function (see `run_sweep`).
+    ds: DataSet
+        The data set.
+    candidates: list[dict[str, Any]]
+        The keyword arguments (other than `ds`) of each candidate.
+    schedule: HalvingSchedule
+        The budget of the first rung (`min_budget`), the budget of the last rung, the full training budget
+        (`max_budget`), the factor the budget grows by, and the number of candidates shrinks by, from one rung to the
+        next (`eta`), and the function returning the keyword arguments of a candidate trained on a given budget
+        (`apply_budget`).
+    config: SweepConfig
+        The metric candidates are ranked on, and the number of trials to run at once (see `run_sweep`).  The
+        `run_name` names the parent search run, each rung's sweep run is named `<run_name>-rung-<n>`.
+
+    Returns
+    -------
+    result: SearchResult
+        The rungs (each with its sweep), the best trial (and its run) on the full budget, and the compute used and
+        saved.
+    """
+
+    budgets: list[float] = schedule.budgets
+    rungs: list[Rung] = []
+    survivors: list[int] = list(range(len(candidates)))
+
+    with mlflow.start_run(run_name=config.run_name, nested=True) as parent_run:
+        mlflow.log_params(
+            {
+                "candidates": len(candidates),
+                "metric": config.metric,
+                "eta": schedule.eta,
+                "budgets": ", ".join(f"{b:g}" for b in budgets),
+            }
+        )
+
+        for number, budget in enumerate(budgets):
+            sweep: SweepResult = run_sweep(
+                train=train,
+                ds=ds if schedule.apply_budget is not None else subsample(ds=ds, fraction=budget),
+                trials=[
+                    (
+                        candidates[candidate]
+                        if schedule.apply_budget is None
+                        else schedule.apply_budget(candidates[candidate], int(budget))
+                    )
+                    for candidate in survivors
+                ],
+                config=config.copy(update={"run_name": f"{config.run_name}-rung-{number}"}),
+            )
+            rungs.append(Rung(budget=budget, candidates=survivors, sweep=sweep))
+
+            # Rank the rung, and record its leaderboard.
+            order: list[int] = _rank(sweep=sweep, config=config)
+            _log_rung(rung=rungs[-1], number=number, order=order, candidates=candidates, metric=config.metric)
+
+            # Promote the best `1 / eta` (that did not fail) to the next rung.
+            survivors = [
+                survivors[index]
+                for index in order[: max(1, math.ceil(len(survivors) / schedule.eta))]
+                if math.isfinite(sweep.trials[index].metrics.get(config.metric, math.inf))
+            ]
+            if not survivors:
+                break
+
+        complete: bool = len(rungs) == len(budgets)
+        result: SearchResult = SearchResult(
+            parent_run_id=parent_run.info.run_id,
+            rungs=rungs,
+            best=rungs[-1].sweep.best if complete else None,
+            best_run=rungs[-1].sweep.best_run if complete else None,
+            compute_used=sum(rung.budget * len(rung.candidates) for rung in rungs),
+            compute_full_grid=schedule.max_budget * len(candidates),
+        )
+        mlflow.log_metrics(
+            {
+                "compute_used": result.compute_used,
+                "compute_full_grid": result.compute_full_grid,
+                "compute_saved": result.compute_saved,
+            }
+        )
+        if result.best is not None:
+            mlflow.log_metric(key=f"best_{config.metric}", value=result.best.metrics[config.metric])
+            mlflow.set_tag(key="best_run_id", value=result.best.run_id)
+
+    return result
@@ -0,0 +1,85 @@
+"""
+Benchmark [Scoring Payload Encoding]
+
+Encodes the processed `housing.csv` features as a scoring request body in each payload format (with and without gzip),
+and reports the payload bytes and the encode time of each.  `records (to_dict)` is how `predict` encoded requests before
+`encode_payload`, through a list of dicts with a Python object per cell, and `split (tolist)` is the earlier
+`encode_payload`, which converted each column to a list before writing it with `json`.  Each body is then scored by a
+local stand-in `/invocations` server to check that it decodes to the same predictions.
+
+Usage (from the project root):
+`python -m tools.benchmark_payload --repeat 5`
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from src.data import load_data
+from src.rest import encode_payload, invoke_rest_endpoint
+from tools.stand_in_server import serve
+
+
+def encode_records_to_dict(data_x: pd.DataFrame) -> bytes:
+    """Encodes the features as `predict` did before `encode_payload`."""
+    return json.dumps({"dataframe_records": data_x.to_dict(orient="records")}).encode("utf-8")
+
+
+def encode_split_tolist(data_x: pd.DataFrame) -> bytes:
+    """Encodes the features as `encode_payload` did before it wrote from the NumPy buffer."""
+    rows: List[tuple] = list(zip(*(data_x[column].tolist() for column in data_x.columns)))
+    body: dict = {"dataframe_split": {"columns": [str(column) for column in data_x.columns], "data": rows}}
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+ENCODERS: Dict[str, Callable[[pd.DataFrame], bytes]] = {
+    "records (to_dict)": encode_records_to_dict,
+    "records": lambda data_x: encode_payload(data_x=data_x, payload_format="dataframe_records"),
+    "records + gzip": lambda data_x: encode_payload(data_x=data_x, payload_format="dataframe_records", compress=True),
+    "split (tolist)": encode_split_tolist,
+    "split": lambda data_x: encode_payload(data_x=data_x, payload_format="dataframe_split"),
+    "split + gzip": lambda data_x: encode_payload(data_x=data_x, payload_format="dataframe_split", compress=True),
+}
+
+
+def benchmark(csv_url: str, repeat: int) -> None:
+    """Encodes the features with each encoder, and scores each body to check the predictions match."""
+    data_x, _ = load_data(csv_url=csv_url, truth_col_name="median_house_value")
+    print(f"{len(data_x)} rows x {len(data_x.columns)} columns")
+
+    with serve() as endpoint_url:
+        baseline: List[float] = []
+        for name, encode in ENCODERS.items():
+            timings: List[float] = []
+            for _ in range(repeat):
+                start: float = time.perf_counter()
+                payload: bytes = encode(data_x)
+                timings.append(time.perf_counter() - start)
+
+            predictions: List[float] = invoke_rest_endpoint(
+                endpoint_url=endpoint_url,
+                input_data=payload,
+                auth=False,
+                content_encoding="gzip" if name.endswith("gzip") else None,
+            )["predictions"]
+            baseline = baseline or predictions
+            matches: bool = len(predictions) == len(baseline) and all(
+                abs(left - right) <= 1e-9 * max(1.0, abs(right)) for left, right in zip(predictions, baseline)
+            )
+
+            print(
+                f"{name:>18}: {len(payload) / 1024:9.1f} KiB, encode {min(timings) * 1000:8.2f}ms "
+                f"(best of {repeat}), predictions {'match' if matches else 'DIFFER'}"
+            )
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmark [Scoring Payload Encoding]")
+    parser.add_argument("--csv-url", type=str, default="datasets/housing.csv", help="The CSV file to encode.")
+    parser.add_argument("--repeat", type=int, default=5, help="The number of times to encode each format.")
+    args: argparse.Namespace = parser.parse_args()
+
+    benchmark(csv_url=args.csv_url, repeat=args.repeat)
@@ -0,0 +1,95 @@
+"""
+Benchmark [REST Client Connection Pooling]
+
+Sends single row scoring requests (as the dashboard does) to a local stand-in `/invocations` server, once with a new
+session per request (no connection re-use) and once with the pooled module level session, and reports the p50 / p99
+latency and the requests per second of each.
+
+Usage (from the project root):
+`python -m tools.benchmark_rest --requests 2000 --concurrency 8`
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from requests import Session
+
+from src.rest import _create_session, configure_session, invoke_rest_endpoint
+from tools.stand_in_server import serve
+
+PAYLOAD: dict = {
+    "dataframe_records": [
+        {
+            "longitude": -122.23,
+            "latitude": 37.88,
+            "housing_median_age": 41.0,
+            "population": 322.0,
+            "households": 126.0,
+            "median_income": 8.3252,
+            "diag_coord": -84.35,
+            "bedperroom": 0.15,
+        }
+    ]
+}
+
+
+def invoke_per_call_session(endpoint_url: str, input_data: dict) -> dict:
+    """Invokes the endpoint as `invoke_rest_endpoint` did before the session was pooled."""
+    session: Session = _create_session()
+    try:
+        response = session.post(url=f"{endpoint_url}/invocations", json=input_data, verify=False, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    finally:
+        session.close()
+
+
+def invoke_pooled_session(endpoint_url: str, input_data: dict) -> dict:
+    """Invokes the endpoint through the pooled session of `invoke_rest_endpoint`."""
+    return invoke_rest_endpoint(endpoint_url=endpoint_url, input_data=input_data, auth=False)
+
+
+def measure(invoke: Callable[[str, dict], dict], endpoint_url: str, requests: int, concurrency: int) -> List[float]:
+    """Sends the requests from a thread pool, and returns the latency (in seconds) of each."""
+    def timed(_: int) -> float:
+        start: float = time.perf_counter()
+        invoke(endpoint_url, PAYLOAD)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(timed, range(requests)))
+
+
+def benchmark(requests: int, concurrency: int, latency: float) -> None:
+    """Measures each way of invoking the endpoint against the stand-in server, and prints its latencies and rate."""
+    configure_session(pool_size=concurrency)
+
+    with serve(latency=latency) as endpoint_url:
+        for name, invoke in [("per-call", invoke_per_call_session), ("pooled", invoke_pooled_session)]:
+            # Warm up (and open the pooled connections).
+            measure(invoke=invoke, endpoint_url=endpoint_url, requests=concurrency, concurrency=concurrency)
+
+            start: float = time.perf_counter()
+            latencies: List[float] = measure(
+                invoke=invoke, endpoint_url=endpoint_url, requests=requests, concurrency=concurrency
+            )
+            elapsed: float = time.perf_counter() - start
+
+            percentiles: List[float] = statistics.quantiles(latencies, n=100)
+            print(
+                f"{name:>8}: p50 {percentiles[49] * 1000:7.2f}ms, p99 {percentiles[98] * 1000:7.2f}ms, "
+                f"{requests / elapsed:8.1f} requests/s"
+            )
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmark [REST Client Connection Pooling]")
+    parser.add_argument("--requests", type=int, default=2000, help="The number of requests to send.")
+    parser.add_argument("--concurrency", type=int, default=8, help="The number of requests in flight at once.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stand-in server takes per request.")
+    args: argparse.Namespace = parser.parse_args()
+
+    benchmark(requests=args.requests, concurrency=args.concurrency, latency=args.latency)
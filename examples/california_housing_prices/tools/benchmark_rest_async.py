@@ -0,0 +1,100 @@
+"""
+Benchmark [asyncio REST Client]
+
+Sends single row scoring requests (as the dashboard does) to a local stand-in `/invocations` server, once from a thread
+pool through the synchronous `invoke_rest_endpoint`, and once as `asyncio` tasks through `invoke_rest_endpoint_async`,
+and reports the wall time and the requests per second of each.  It then scores `housing.csv` with `predict` and
+`predict_async` and checks the predictions match.
+
+Usage (from the project root):
+`python -m tools.benchmark_rest_async --requests 5000 --threads 8 --concurrency 100 --latency 0.005`
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.data import load_data
+from src.rest import configure_session, invoke_rest_endpoint, predict
+from src.rest_async import close_client, configure_client, invoke_rest_endpoint_async, predict_async
+from tools.benchmark_rest import PAYLOAD
+from tools.stand_in_server import serve
+
+
+def run_threaded(endpoint_url: str, requests: int, threads: int) -> float:
+    """Sends the requests through `invoke_rest_endpoint` from a thread pool, and returns the wall time."""
+    configure_session(pool_size=threads)
+    start: float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(
+            executor.map(
+                lambda _: invoke_rest_endpoint(endpoint_url=endpoint_url, input_data=PAYLOAD, auth=False),
+                range(requests),
+            )
+        )
+    return time.perf_counter() - start
+
+
+async def run_async(endpoint_url: str, requests: int, concurrency: int) -> float:
+    """Gathers the requests through `invoke_rest_endpoint_async`, and returns the wall time."""
+    await configure_client(pool_size=concurrency, max_concurrency=concurrency)
+    try:
+        start: float = time.perf_counter()
+        await asyncio.gather(
+            *(
+                invoke_rest_endpoint_async(endpoint_url=endpoint_url, input_data=PAYLOAD, auth=False)
+                for _ in range(requests)
+            )
+        )
+        return time.perf_counter() - start
+    finally:
+        await close_client()
+
+
+async def predict_both(endpoint_url: str, data_x: pd.DataFrame) -> bool:
+    """Scores the data with `predict` and `predict_async`, and returns whether the predictions are equal."""
+    y_pred: pd.DataFrame = predict(endpoint_url=endpoint_url, data_x=data_x, auth=False)
+    try:
+        y_pred_async: pd.DataFrame = await predict_async(endpoint_url=endpoint_url, data_x=data_x, auth=False)
+    finally:
+        await close_client()
+    return y_pred.equals(y_pred_async)
+
+
+def benchmark(requests: int, threads: int, concurrency: int, latency: float, csv_url: str) -> None:
+    """Prints the wall time and rate of the threaded and async clients, then checks both predict the same."""
+    with serve(latency=latency) as endpoint_url:
+        # Warm up (and open the pooled connections).
+        run_threaded(endpoint_url=endpoint_url, requests=threads, threads=threads)
+
+        elapsed: float = run_threaded(endpoint_url=endpoint_url, requests=requests, threads=threads)
+        print(f"{f'threads ({threads})':>14}: {elapsed:7.3f}s, {requests / elapsed:8.1f} requests/s")
+
+        elapsed = asyncio.run(run_async(endpoint_url=endpoint_url, requests=requests, concurrency=concurrency))
+        print(f"{f'async ({concurrency})':>14}: {elapsed:7.3f}s, {requests / elapsed:8.1f} requests/s")
+
+    with serve() as endpoint_url:
+        data_x, _ = load_data(csv_url=csv_url, truth_col_name="median_house_value")
+        matches: bool = asyncio.run(predict_both(endpoint_url=endpoint_url, data_x=data_x))
+        print(f"predict / predict_async on {len(data_x)} rows: predictions {'match' if matches else 'DIFFER'}")
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmark [asyncio REST Client]")
+    parser.add_argument("--requests", type=int, default=5000, help="The number of requests to send.")
+    parser.add_argument("--threads", type=int, default=8, help="The number of threads sending synchronous requests.")
+    parser.add_argument("--concurrency", type=int, default=100, help="The number of async requests in flight at once.")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds the stand-in server takes per request.")
+    parser.add_argument("--csv-url", type=str, default="datasets/housing.csv", help="The CSV file to score.")
+    args: argparse.Namespace = parser.parse_args()
+
+    benchmark(
+        requests=args.requests,
+        threads=args.threads,
+        concurrency=args.concurrency,
+        latency=args.latency,
+        csv_url=args.csv_url,
+    )
@@ -0,0 +1,99 @@
+"""
+This module contains a local stand-in for a model REST endpoint, used by the benchmarks.
+
+It serves `POST /invocations` (HTTP/1.1, so connections are kept alive) and accepts the `dataframe_records` and
+`dataframe_split` payloads, optionally gzip compressed.  The prediction for each row is the sum of its values, so
+callers can check that predictions are returned in order.
+"""
+
+import gzip
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
+
+
+class _StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    latency: float = 0.0
+    fail_first: int = 0
+    lock: threading.Lock = threading.Lock()
+
+
+class _InvocationsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without this Nagle delays every kept-alive response.
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Scores a `dataframe_records` or `dataframe_split` payload, predicting the sum of each row."""
+        body: bytes = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path != "/invocations":
+            self._respond(status=404, body=b"{}")
+            return
+
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        payload: dict = json.loads(body)
+
+        rows: List[List[float]]
+        if "dataframe_split" in payload:
+            rows = payload["dataframe_split"]["data"]
+        else:
+            rows = [list(record.values()) for record in payload["dataframe_records"]]
+
+        with self.server.lock:
+            failing: bool = self.server.fail_first > 0
+            self.server.fail_first -= 1
+        if failing:
+            self._respond(status=500, body=b'{"error_code": "INTERNAL_ERROR"}')
+            return
+
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+
+        predictions: List[float] = [float(sum(row)) for row in rows]
+        self._respond(status=200, body=json.dumps({"predictions": predictions}).encode("utf-8"))
+
+    def _respond(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+
+@contextmanager
+def serve(latency: float = 0.0, fail_first: int = 0) -> Iterator[str]:
+    """
+    Runs the stand-in server (on a free local port) for the life of the context.
+
+    Parameters
+    ----------
+    latency: float
+        Seconds the server waits before answering each request, to stand in for model inference.
+    fail_first: int
+        The number of requests to fail (with a 500 status) before answering normally.
+
+    Returns
+    -------
+    endpoint_url: Iterator[str]
+        The endpoint url (without the `/invocations` path), as passed to `invoke_rest_endpoint`.
+    """
+
+    server: _StandInServer = _StandInServer(("127.0.0.1", 0), _InvocationsHandler)
+    server.latency = latency
+    server.fail_first = fail_first
+    thread: threading.Thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,181 @@
+# Generate a random dataset that resembles the 'adult' dataset available here:
+# https://archive.ics.uci.edu/ml/datasets/Adult
+#
+# The work hours and salary of each row depend on its (workclass, education, occupation) segment.  The segment
+# parameters live in the SEGMENTS lookup table, and every column of a chunk is drawn in one vectorized pass from a
+# seeded np.random.Generator, so any number of rows can be streamed to Parquet a chunk at a time:
+#
+#   python adult_data.py --rows 10000000 --output data/adult.parquet
+
+import argparse
+import os
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# This is the response variable in the model.
+TARGET_NAME = 'salary'
+
+CATEGORICAL_COLUMNS = ['workclass', 'education', 'occupation']
+NUMERIC_COLUMNS = ['age', 'hoursperweek']
+
+# The categories of each categorical column, and the probability of each category.
+WORKCLASS = {'Private': 0.4, 'Self-emp': 0.15, 'Federal-gov': 0.15, 'Local-gov': 0.05, 'State-gov': 0.1,
+             'W/o pay': 0.1, 'Never-worked': 0.05}
+EDUCATION = {'Bachelors': 0.3, 'Some-college': 0.2, 'HS-grad': 0.25, 'Prof-school': 0.1, 'Masters': 0.1,
+             'Doctorate': 0.05}
+OCCUPATION = {'Tech-support': 0.02, 'Craft-repair': 0.1, 'Other-service': 0.2, 'Sales': 0.05, 'Exec-managerial': 0.1,
+              'Prof-specialty': 0.05, 'Machine-op-inspct': 0.08, 'Adm-clerical': 0.18, 'Farming-fishing': 0.04,
+              'Transport-moving': 0.08, 'Priv-house-serv': 0.02, 'Armed-Forces': 0.08}
+CATEGORIES = {'workclass': WORKCLASS, 'education': EDUCATION, 'occupation': OCCUPATION}
+
+# The age of the population, rows younger than MIN_AGE are dropped.
+AGE_LOC = 33
+AGE_SCALE = 10
+MIN_AGE = 16
+
+# The normal distributions of the work hours and the salary in each segment.
+# Rows outside of every segment have zero work hours and salary.
+SEGMENTS = pd.DataFrame(
+    [
+        # workclass, education, occupation, hours loc, hours scale, salary loc, salary scale
+        ('Private', 'Bachelors', 'Tech-support', 40, 5, 105000, 8),
+        ('Private', 'Bachelors', 'Craft-repair', 50, 5, 130000, 8),
+        ('Private', 'Bachelors', 'Other-service', 40, 7, 90000, 10),
+        ('Private', 'Bachelors', 'Sales', 45, 7, 170000, 20),
+        ('Private', 'Bachelors', 'Exec-managerial', 50, 5, 200000, 30),
+        ('Private', 'Bachelors', 'Prof-specialty', 40, 5, 110000, 10),
+        ('Private', 'Bachelors', 'Adm-clerical', 45, 3, 90000, 5),
+        ('Private', 'Bachelors', 'Farming-fishing', 40, 5, 95000, 5),
+        ('Private', 'Bachelors', 'Transport-moving', 50, 3, 95000, 7),
+        ('Private', 'Bachelors', 'Priv-house-serv', 40, 3, 45000, 4),
+        ('Private', 'Bachelors', 'Armed-Forces', 40, 5, 65000, 4),
+        ('Private', 'HS-grad', 'Craft-repair', 50, 7, 110000, 10),
+        ('Private', 'HS-grad', 'Other-service', 45, 5, 70000, 8),
+        ('Private', 'HS-grad', 'Prof-specialty', 50, 5, 90000, 10),
+        ('Private', 'HS-grad', 'Machine-op-inspct', 50, 3, 100000, 7),
+        ('Private', 'HS-grad', 'Transport-moving', 50, 3, 85000, 5),
+        ('Private', 'HS-grad', 'Priv-house-serv', 40, 3, 38000, 2),
+        ('Private', 'HS-grad', 'Armed-Forces', 40, 7, 45000, 6),
+        ('Private', 'Doctorate', 'Other-service', 40, 7, 110000, 8),
+        ('Private', 'Doctorate', 'Exec-managerial', 60, 5, 410000, 15),
+        ('Private', 'Doctorate', 'Prof-specialty', 50, 5, 165000, 7),
+        ('Private', 'Doctorate', 'Farming-fishing', 45, 3, 125000, 5),
+        ('Private', 'Doctorate', 'Armed-Forces', 50, 5, 135000, 10),
+        ('Self-emp', 'Bachelors', 'Craft-repair', 55, 3, 165000, 10),
+        ('Self-emp', 'Bachelors', 'Other-service', 55, 5, 155000, 10),
+        ('Self-emp', 'Bachelors', 'Prof-specialty', 55, 7, 190000, 15),
+        ('Self-emp', 'Bachelors', 'Transport-moving', 50, 5, 170000, 20),
+        ('Self-emp', 'Bachelors', 'Priv-house-serv', 45, 5, 65000, 5),
+        ('Federal-gov', 'Bachelors', 'Other-service', 48, 5, 70000, 3),
+        ('Federal-gov', 'Bachelors', 'Exec-managerial', 50, 2, 140000, 15),
+        ('Federal-gov', 'Bachelors', 'Adm-clerical', 40, 5, 70000, 8),
+        ('Federal-gov', 'Bachelors', 'Armed-Forces', 40, 8, 55000, 5),
+        ('State-gov', 'Bachelors', 'Tech-support', 40, 5, 90000, 8),
+        ('State-gov', 'Bachelors', 'Other-service', 40, 3, 65000, 8),
+        ('State-gov', 'Bachelors', 'Exec-managerial', 50, 3, 120000, 15),
+        ('State-gov', 'Bachelors', 'Prof-specialty', 45, 5, 85000, 10),
+        ('State-gov', 'Bachelors', 'Machine-op-inspct', 50, 3, 85000, 5),
+        ('State-gov', 'Bachelors', 'Adm-clerical', 45, 5, 60000, 8),
+        ('State-gov', 'Bachelors', 'Farming-fishing', 45, 5, 70000, 8),
+    ],
+    columns=CATEGORICAL_COLUMNS + ['hours_loc', 'hours_scale', 'salary_loc', 'salary_scale'],
+)
+
+
+def _segment_lookup(segments: pd.DataFrame) -> np.ndarray:
+    # A (workclass, education, occupation, parameter) array of the segment parameters, indexed by category codes.
+    # Combinations without a segment have zero locs and scales, so they draw zeros.
+    shape = tuple(len(CATEGORIES[column]) for column in CATEGORICAL_COLUMNS)
+    lookup = np.zeros(shape + (4,))
+    codes = tuple(
+        pd.Categorical(segments[column], categories=list(CATEGORIES[column])).codes for column in CATEGORICAL_COLUMNS
+    )
+    if any((code < 0).any() for code in codes):
+        raise ValueError("SEGMENTS holds a category which is not in CATEGORIES")
+    lookup[codes] = segments[['hours_loc', 'hours_scale', 'salary_loc', 'salary_scale']].to_numpy(dtype=float)
+    return lookup
+
+
+SEGMENT_LOOKUP = _segment_lookup(SEGMENTS)
+
+
+def generate_chunk(nrows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Draws nrows rows (less those younger than MIN_AGE) in one vectorized pass.
+    """
+    age = np.trunc(rng.normal(loc=AGE_LOC, scale=AGE_SCALE, size=nrows)).astype(np.int64)
+    codes = {
+        column: rng.choice(len(CATEGORIES[column]), size=nrows, p=list(CATEGORIES[column].values())).astype(np.int8)
+        for column in CATEGORICAL_COLUMNS
+    }
+
+    # Look up every row's segment parameters, and draw its work hours and salary.
+    parameters = SEGMENT_LOOKUP[tuple(codes[column] for column in CATEGORICAL_COLUMNS)]
+    draws = rng.standard_normal(size=(nrows, 2))
+    hoursperweek = np.trunc(parameters[:, 0] + parameters[:, 1] * draws[:, 0]).astype(np.int64)
+    salary = np.trunc(parameters[:, 2] + parameters[:, 3] * draws[:, 1]).astype(np.int64)
+
+    df = pd.DataFrame({
+        'age': age,
+        **{
+            column: pd.Categorical.from_codes(codes[column], categories=list(CATEGORIES[column]))
+            for column in CATEGORICAL_COLUMNS
+        },
+        'hoursperweek': hoursperweek,
+        TARGET_NAME: salary,
+    })
+    return df[age >= MIN_AGE].reset_index(drop=True)
+
+
+def generate(nrows: int, seed: Optional[int] = 42, chunk_size: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """
+    Yields chunks of up to chunk_size rows, drawing nrows rows in all (less those younger than MIN_AGE).
+    The rows only depend on the seed and the chunk size.
+    """
+    rng = np.random.default_rng(seed)
+    for offset in range(0, nrows, chunk_size):
+        yield generate_chunk(min(chunk_size, nrows - offset), rng)
+
+
+def generate_frame(nrows: int, seed: Optional[int] = 42, chunk_size: int = 1_000_000) -> pd.DataFrame:
+    """
+    Draws nrows rows (less those younger than MIN_AGE) into one dataframe.
+    """
+    return pd.concat(generate(nrows, seed=seed, chunk_size=chunk_size), ignore_index=True)
+
+
+def write_parquet(path: str, nrows: int, seed: Optional[int] = 42, chunk_size: int = 1_000_000) -> int:
+    """
+    Streams nrows rows (less those younger than MIN_AGE) to a Parquet file, a row group per chunk, so only one chunk
+    is held in memory at a time.  Returns the number of rows written.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    written = 0
+    writer = None
+    try:
+        for chunk in generate(nrows, seed=seed, chunk_size=chunk_size):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a random "adult" salary dataset as Parquet')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='The number of rows to draw.')
+    parser.add_argument('--output', type=str, default='data/adult.parquet', help='The Parquet file to write.')
+    parser.add_argument('--seed', type=int, default=42, help='The seed of the random generator.')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help='The number of rows per row group.')
+    args = parser.parse_args()
+
+    rows = write_parquet(args.output, args.rows, seed=args.seed, chunk_size=args.chunk_size)
+    print("Wrote {} rows to {}".format(rows, args.output))
@@ -0,0 +1,215 @@
+# A tf.data input pipeline which streams the Parquet dataset written by adult_data.py from disk.
+#
+# The encoder is fitted once, from a pass over the categorical columns only.  The rows are then read a chunk at a time,
+# each chunk is encoded in one vectorized transform and cut into batches, and the batches are prefetched while the
+# model trains, so the dataset size is bounded by disk rather than memory.  The train / test split is a seeded draw
+# per row, so every epoch sees the same split without an index of the rows being held.
+#
+# The categorical columns are encoded one of three ways (ENCODINGS):
+#   dense     - one-hot columns in a dense matrix (as the model was first trained).
+#   sparse    - the same one-hot columns as a tf.SparseTensor, so the first Dense layer only multiplies the non zero
+#               values rather than a row of mostly zeros.
+#   embedding - a category code per column, looked up in a trainable Embedding per column, so the width of the input
+#               no longer grows with the number of categories.
+
+import itertools
+from typing import Iterator, Optional
+
+import numpy as np
+import pyarrow.parquet as pq
+import scipy.sparse
+import tensorflow as tf
+from keras.layers import Concatenate, Embedding, Flatten, Input
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+from adult_data import CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, TARGET_NAME
+
+SUBSETS = ('train', 'test')
+ENCODINGS = ('dense', 'sparse', 'embedding')
+
+# The input of the numeric columns, with the embedding encoding.
+NUMERIC_INPUT = 'numeric'
+
+
+def _categories(parquet: pq.ParquetFile, read_size: int) -> dict:
+    # Every category of each categorical column, from a pass over those columns only.
+    categories = {column: set() for column in CATEGORICAL_COLUMNS}
+    for batch in parquet.iter_batches(batch_size=read_size, columns=CATEGORICAL_COLUMNS):
+        for column in CATEGORICAL_COLUMNS:
+            categories[column].update(batch.column(column).unique().to_pylist())
+    return {column: sorted(value for value in values if value is not None) for column, values in categories.items()}
+
+
+def fit_transformer(path: str, encoding: str = 'dense', read_size: int = 1_000_000) -> ColumnTransformer:
+    """
+    Fits the categorical encoder once, on every category found in the Parquet file.
+    The numeric columns are passed through, after the encoded categorical columns.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError("encoding must be one of {}, not {}".format(ENCODINGS, encoding))
+
+    parquet = pq.ParquetFile(path)
+    categories = _categories(parquet, read_size)
+    categories = [categories[column] for column in CATEGORICAL_COLUMNS]
+    if encoding == 'embedding':
+        # Unknown categories are coded -1 here, and given the code after the known ones by iter_batches.
+        encoder = OrdinalEncoder(categories=categories, handle_unknown='use_encoded_value', unknown_value=-1,
+                                 dtype=np.float32)
+    else:
+        encoder = OneHotEncoder(categories=categories, handle_unknown='ignore', sparse_output=encoding == 'sparse',
+                                dtype=np.float32)
+
+    # Fit on a frame which holds every category, the full dataset is never loaded.
+    sample = next(parquet.iter_batches(batch_size=1, columns=CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)).to_pandas()
+    ct = ColumnTransformer([('one-hot-encoder' if encoding != 'embedding' else 'ordinal-encoder', encoder,
+                             CATEGORICAL_COLUMNS)],
+                           remainder='passthrough', sparse_threshold=1.0 if encoding == 'sparse' else 0.0)
+    return ct.fit(sample)
+
+
+def encoding_of(ct: ColumnTransformer) -> str:
+    """
+    The encoding a transformer was fitted with by fit_transformer.
+    """
+    encoder = ct.named_transformers_.get('ordinal-encoder', ct.named_transformers_.get('one-hot-encoder'))
+    if isinstance(encoder, OrdinalEncoder):
+        return 'embedding'
+    return 'sparse' if encoder.sparse_output else 'dense'
+
+
+def _in_subset(nrows: int, batch_index: int, subset: str, test_size: float, seed: int) -> np.ndarray:
+    # A seeded draw for each row, which only depends on where the row is in the file.
+    test = np.random.default_rng([seed, batch_index]).random(nrows) < test_size
+    return test if subset == 'test' else ~test
+
+
+def iter_batches(path: str, ct: ColumnTransformer, subset: str = 'train', batch_size: int = 64,
+                 test_size: float = 0.33, seed: int = 42, read_size: int = 65536,
+                 shuffle: bool = False, epoch_seed: Optional[tuple] = None) -> Iterator[tuple]:
+    """
+    Yields (features, target) batches, reading and encoding read_size rows at a time.
+    The features are a float32 array (dense), a float32 CSR matrix (sparse), or a dict of an int32 array of codes per
+    categorical column and a float32 array of the numeric columns (embedding).
+    With shuffle the rows are shuffled within each chunk that is read.
+    """
+    if subset not in SUBSETS:
+        raise ValueError("subset must be one of {}, not {}".format(SUBSETS, subset))
+
+    encoding = encoding_of(ct)
+    parquet = pq.ParquetFile(path)
+    rng = np.random.default_rng(epoch_seed)
+    columns = CATEGORICAL_COLUMNS + NUMERIC_COLUMNS + [TARGET_NAME]
+    for batch_index, batch in enumerate(parquet.iter_batches(batch_size=read_size, columns=columns)):
+        df = batch.to_pandas()
+        df = df[_in_subset(len(df), batch_index, subset, test_size, seed)]
+        if shuffle:
+            df = df.iloc[rng.permutation(len(df))]
+
+        features = ct.transform(df[CATEGORICAL_COLUMNS + NUMERIC_COLUMNS])
+        if encoding == 'sparse':
+            features = scipy.sparse.csr_matrix(features, dtype=np.float32)
+        else:
+            features = np.asarray(features, dtype=np.float32)
+        if encoding == 'embedding':
+            for i, values in enumerate(ct.named_transformers_['ordinal-encoder'].categories_):
+                features[features[:, i] < 0, i] = len(values)
+        target = df[TARGET_NAME].to_numpy(dtype=np.float32)
+        for offset in range(0, len(df), batch_size):
+            batch_features = features[offset:offset + batch_size]
+            if encoding == 'embedding':
+                batch_features = {
+                    **{column: batch_features[:, i].astype(np.int32) for i, column in enumerate(CATEGORICAL_COLUMNS)},
+                    NUMERIC_INPUT: batch_features[:, len(CATEGORICAL_COLUMNS):],
+                }
+            yield batch_features, target[offset:offset + batch_size]
+
+
+def _to_sparse_tensor(features: scipy.sparse.csr_matrix) -> tf.SparseTensor:
+    coo = features.tocoo()
+    return tf.SparseTensor(indices=np.column_stack((coo.row, coo.col)).astype(np.int64), values=coo.data,
+                           dense_shape=coo.shape)
+
+
+def _features_spec(ct: ColumnTransformer):
+    encoding = encoding_of(ct)
+    if encoding == 'embedding':
+        return {
+            **{column: tf.TensorSpec(shape=(None,), dtype=tf.int32) for column in CATEGORICAL_COLUMNS},
+            NUMERIC_INPUT: tf.TensorSpec(shape=(None, len(NUMERIC_COLUMNS)), dtype=tf.float32),
+        }
+    n_features = len(ct.get_feature_names_out())
+    if encoding == 'sparse':
+        return tf.SparseTensorSpec(shape=(None, n_features), dtype=tf.float32)
+    return tf.TensorSpec(shape=(None, n_features), dtype=tf.float32)
+
+
+def make_dataset(path: str, ct: ColumnTransformer, subset: str = 'train', batch_size: int = 64,
+                 test_size: float = 0.33, seed: int = 42, read_size: int = 65536,
+                 shuffle: bool = False) -> tf.data.Dataset:
+    """
+    A tf.data.Dataset of (features, target) batches streamed from the Parquet file, prefetched while the model trains.
+    The features are encoded as the transformer was fitted (see ENCODINGS), to match the inputs of feature_inputs.
+    The dataset is re-read from disk on every epoch, with a new shuffle when shuffle is set.
+    """
+    sparse = encoding_of(ct) == 'sparse'
+    epochs = itertools.count()
+
+    def generator():
+        for features, target in iter_batches(path, ct, subset=subset, batch_size=batch_size, test_size=test_size,
+                                             seed=seed, read_size=read_size, shuffle=shuffle,
+                                             epoch_seed=(seed, next(epochs))):
+            yield (_to_sparse_tensor(features) if sparse else features), target
+
+    dataset = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=(_features_spec(ct), tf.TensorSpec(shape=(None,), dtype=tf.float32)))
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def embedding_dims(ct: ColumnTransformer, max_embedding_dim: int = 50) -> list:
+    """
+    The (input, output) dimensions of the Embedding of each categorical column, with the embedding encoding.
+    Each column has a row per category and one for unknown categories, in (cardinality + 1) / 2 dimensions, up to
+    max_embedding_dim.
+    """
+    return [(len(values) + 1, min(max_embedding_dim, (len(values) + 1) // 2))
+            for values in ct.named_transformers_['ordinal-encoder'].categories_]
+
+
+def feature_inputs(ct: ColumnTransformer, max_embedding_dim: int = 50) -> tuple:
+    """
+    The Keras inputs for the features of make_dataset, and a single float tensor of the features to build the model
+    on.  With the embedding encoding each categorical column is looked up in its own Embedding (see embedding_dims).
+    """
+    encoding = encoding_of(ct)
+    if encoding != 'embedding':
+        inputs = Input(shape=(len(ct.get_feature_names_out()),), sparse=encoding == 'sparse', name='features')
+        return inputs, inputs
+
+    inputs = {column: Input(shape=(), dtype='int32', name=column) for column in CATEGORICAL_COLUMNS}
+    inputs[NUMERIC_INPUT] = Input(shape=(len(NUMERIC_COLUMNS),), name=NUMERIC_INPUT)
+    embedded = [
+        Flatten()(Embedding(input_dim=input_dim, output_dim=output_dim, name='{}_embedding'.format(column))(
+            inputs[column]))
+        for column, (input_dim, output_dim) in zip(CATEGORICAL_COLUMNS, embedding_dims(ct, max_embedding_dim))
+    ]
+    return inputs, Concatenate()(embedded + [inputs[NUMERIC_INPUT]])
+
+
+def take_features(dataset: tf.data.Dataset, nrows: int):
+    """
+    The features of (up to) the first nrows rows of the dataset, e.g. to infer a model signature.
+    Sparse features are returned dense, and embedding features as a dict of arrays.
+    """
+    features = []
+    for x, _ in dataset:
+        if isinstance(x, dict):
+            features.append({name: value.numpy() for name, value in x.items()})
+        else:
+            features.append(tf.sparse.to_dense(x).numpy() if isinstance(x, tf.SparseTensor) else x.numpy())
+        if sum(len(next(iter(f.values())) if isinstance(f, dict) else f) for f in features) >= nrows:
+            break
+    if features and isinstance(features[0], dict):
+        return {name: np.concatenate([f[name] for f in features])[:nrows] for name in features[0]}
+    return np.concatenate(features)[:nrows] if features else np.empty((0, 0), dtype=np.float32)
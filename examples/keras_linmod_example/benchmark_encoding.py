@@ -0,0 +1,108 @@
+# Benchmark [Dense vs Sparse vs Embedding Features]
+#
+# Trains the pykeraslinreg.py model on a generated Parquet dataset (1M rows by default) once per encoding in
+# adult_input.ENCODINGS, streaming the data with make_dataset, and reports for each:
+#   - the memory the encoded training features take when held in memory (as the dense path did before streaming),
+#   - the multiply-adds of the first Dense layer per row,
+#   - the wall time of each epoch.
+# The gap between the encodings grows with the number of categories, the synthetic data only has 25.  At 25 the epoch
+# time is the same for every encoding (on one CPU core, 1M rows: ~50s for the first epoch), as the hidden layers'
+# ~200k multiply-adds per row dominate the first layer's; the encodings then differ in memory alone.
+#
+# Usage (from the example directory):
+#   python benchmark_encoding.py --rows 1000000 --epochs 2
+
+import argparse
+import os
+import tempfile
+import time
+
+from keras import Model
+from keras.callbacks import Callback
+from keras.layers import Dense, Dropout
+from keras.losses import MeanSquaredLogarithmicError
+from keras.models import Sequential
+from keras.optimizers import Adam
+
+from adult_data import NUMERIC_COLUMNS, write_parquet
+from adult_input import ENCODINGS, embedding_dims, feature_inputs, fit_transformer, iter_batches, make_dataset
+
+# The hidden layers of pykeraslinreg.py
+HIDDEN_UNITS = (160, 480, 256)
+
+
+class EpochTimer(Callback):
+    def on_train_begin(self, logs=None):
+        self.seconds = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.seconds.append(time.perf_counter() - self.start)
+
+
+def build_model(ct) -> Model:
+    inputs, features = feature_inputs(ct)
+    hidden = Sequential([
+        Dense(HIDDEN_UNITS[0], kernel_initializer='normal', activation='relu'), Dropout(0.2),
+        Dense(HIDDEN_UNITS[1], kernel_initializer='normal', activation='relu'), Dropout(0.2),
+        Dense(HIDDEN_UNITS[2], kernel_initializer='normal', activation='relu'),
+        Dense(1, kernel_initializer='normal', activation='linear')
+    ])
+    model = Model(inputs, hidden(features))
+    model.compile(loss=MeanSquaredLogarithmicError(), optimizer=Adam(learning_rate=0.001))
+    return model
+
+
+def encoded_size(path: str, ct, encoding: str) -> tuple:
+    # The bytes of the encoded training features, and the mean width of the first Dense layer's input per row.
+    nbytes = 0
+    width = 0
+    rows = 0
+    for features, target in iter_batches(path, ct, subset='train', batch_size=65536):
+        if encoding == 'sparse':
+            nbytes += features.data.nbytes + features.indices.nbytes + features.indptr.nbytes
+            width += features.nnz
+        elif encoding == 'embedding':
+            nbytes += sum(value.nbytes for value in features.values())
+        else:
+            nbytes += features.nbytes
+            width += features.size
+        rows += len(target)
+    if encoding == 'embedding':
+        return nbytes, sum(output_dim for _, output_dim in embedding_dims(ct)) + len(NUMERIC_COLUMNS)
+    return nbytes, width / max(rows, 1)
+
+
+def benchmark(path: str, encodings: list, epochs: int, batch_size: int) -> None:
+    for encoding in encodings:
+        start = time.perf_counter()
+        ct = fit_transformer(path, encoding=encoding)
+        fit_seconds = time.perf_counter() - start
+        nbytes, width = encoded_size(path, ct, encoding)
+
+        model = build_model(ct)
+        timer = EpochTimer()
+        model.fit(make_dataset(path, ct, subset='train', batch_size=batch_size, shuffle=True), epochs=epochs,
+                  callbacks=[timer], verbose=0)
+        print("{:>9}: encoder fit {:6.2f}s, encoded features {:8.1f}MB, first layer {:8.0f} multiply-adds per row, "
+              "epochs {}".format(encoding, fit_seconds, nbytes / 1e6, width * HIDDEN_UNITS[0],
+                                 ", ".join("{:.1f}s".format(seconds) for seconds in timer.seconds)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark [Dense vs Sparse vs Embedding Features]')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='The number of rows to generate.')
+    parser.add_argument('--data', type=str, default=None, help='An existing Parquet file, rather than generating one.')
+    parser.add_argument('--encodings', type=str, nargs='+', default=list(ENCODINGS), choices=ENCODINGS)
+    parser.add_argument('--epochs', type=int, default=2, help='The number of epochs to time.')
+    parser.add_argument('--batch-size', type=int, default=64, help='The number of rows per training batch.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = args.data
+        if data_path is None:
+            data_path = os.path.join(tmp, 'adult.parquet')
+            print("Generated {} rows".format(write_parquet(data_path, args.rows, seed=42)))
+        benchmark(data_path, args.encodings, epochs=args.epochs, batch_size=args.batch_size)
@@ -0,0 +1,88 @@
+"""
+Benchmark [Batched MLflow Logging]
+
+Replays the logging of a `process_data` step (its params, then per-image metrics for each image) against a local
+file store tracking uri, once with a request per value (`MlflowClient.log_param` / `log_metric`) and once through
+`BatchLogger`, and reports the requests made and the wall time of each.
+
+Usage (from the project root):
+`python -m tools.benchmark_batch_logger --images 500`
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import click
+import mlflow
+from mlflow import MlflowClient
+
+from workflow.utils.batch_logger import BatchLogger
+
+PARAMS: Dict[str, str] = {
+    "inbound": "data/inbound",
+    "outbound": "data/outbound",
+    "worker_mode": "persistent",
+    "queue_dir": "",
+    "tile": "0",
+    "tile_pad": "10",
+    "max_parallel": "1",
+}
+IMAGE_METRICS: Dict[str, float] = {"image_latency_seconds": 1.0, "image_peak_rss_mb": 1024.0}
+STEP_METRICS: Dict[str, float] = {
+    "model_load_seconds": 5.0,
+    "images_processed": 0,
+    "images_skipped": 0,
+    "total_latency_seconds": 0,
+}
+
+
+def replay_direct(client: MlflowClient, run_id: str, images: int) -> int:
+    """Logs the step's params and metrics one request each (as the step did before `BatchLogger`)."""
+    requests: int = 0
+    for key, value in PARAMS.items():
+        client.log_param(run_id=run_id, key=key, value=value)
+        requests += 1
+    for step in range(images):
+        for key, value in IMAGE_METRICS.items():
+            client.log_metric(run_id=run_id, key=key, value=value, step=step)
+            requests += 1
+    for key, value in STEP_METRICS.items():
+        client.log_metric(run_id=run_id, key=key, value=value)
+        requests += 1
+    return requests
+
+
+def replay_batched(client: MlflowClient, run_id: str, images: int) -> int:
+    """Logs the step's params and metrics through a `BatchLogger`."""
+    with BatchLogger(run_id=run_id, client=client) as logger:
+        logger.log_params(params=PARAMS)
+        for step in range(images):
+            logger.log_metrics(metrics=IMAGE_METRICS, step=step)
+        logger.log_metrics(metrics=STEP_METRICS)
+    return logger.request_count
+
+
+@click.command(help="Benchmark [Batched MLflow Logging]")
+@click.option("--images", type=click.IntRange(min=0), default=500, help="The number of images the step processes")
+def benchmark(images: int) -> None:
+    """Replays the step's logging both ways to a temporary tracking store, and prints the requests and time of each."""
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        mlflow.set_tracking_uri(Path(tracking_dir).resolve().as_uri())
+        client: MlflowClient = MlflowClient()
+        experiment_id: str = client.create_experiment(name="benchmark-batch-logger")
+
+        for name, replay in [("direct", replay_direct), ("batched", replay_batched)]:
+            run_id: str = client.create_run(experiment_id=experiment_id, run_name=name).info.run_id
+            start: float = time.perf_counter()
+            requests: int = replay(client=client, run_id=run_id, images=images)
+            elapsed: float = time.perf_counter() - start
+            client.set_terminated(run_id=run_id)
+
+            logged: int = len(client.get_metric_history(run_id=run_id, key="image_latency_seconds"))
+            print(f"{name:>8}: {requests:6d} requests, {elapsed:8.3f}s ({logged} image_latency_seconds values)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,79 @@
+"""
+Benchmark [Tiled Upscaling Memory]
+
+Upscales generated PNG images of growing resolution with the persistent `Upscaler`, each in a fresh process, and
+reports the peak resident memory of each above the model baseline (the resident memory once the model is loaded),
+next to the peak of decoding the input alone and the size of the output image.  With `--tile` the model runs one tile
+at a time, so the peak beyond the decode grows with the output image rather than the model's activations.
+
+Usage (from the project root):
+`python -m tools.benchmark_upscaler_memory --size 256 --size 512 --size 1024 --size 2048 --tile 128`
+"""
+
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+import click
+import cv2
+import numpy as np
+
+from workflow.utils.memory import get_peak_rss, reset_peak_rss
+from workflow.utils.upscaler import Upscaler
+
+
+def generate_image(path: Path, size: int, seed: int = 42) -> None:
+    """Writes a square image of smooth noise, so the PNG encoder has realistic (compressible) content to work with."""
+    noise: np.ndarray = np.random.default_rng(seed).integers(0, 256, size=(size // 8 + 1, size // 8 + 1, 3))
+    image: np.ndarray = cv2.resize(noise.astype(np.uint8), (size, size), interpolation=cv2.INTER_CUBIC)
+    cv2.imwrite(path.as_posix(), image)
+
+
+def measure(model_path: str, tile: int, tile_pad: int, inbound_file: Path) -> Tuple[float, float, float]:
+    """Upscales the image, and returns the seconds taken, the peak (MB) of decoding it, and the peak of upscaling it."""
+    upscaler: Upscaler = Upscaler(model_path=model_path, tile=tile, tile_pad=tile_pad)
+
+    # The peak of decoding the input alone, which `upscale` pays before any tile is processed.
+    reset_peak_rss()
+    baseline: int = get_peak_rss()
+    image: np.ndarray = cv2.imread(inbound_file.as_posix(), cv2.IMREAD_UNCHANGED)
+    decode_peak: int = get_peak_rss() - baseline
+    del image
+
+    reset_peak_rss()
+    baseline = get_peak_rss()
+    start: float = time.perf_counter()
+    upscaler.upscale(inbound_file=inbound_file, outbound_file=inbound_file.with_name(f"{inbound_file.stem}_out.png"))
+    return time.perf_counter() - start, decode_peak / 1_000_000, (get_peak_rss() - baseline) / 1_000_000
+
+
+@click.command(help="Benchmark [Tiled Upscaling Memory]")
+@click.option("--model-path", type=click.STRING, default="data/weights/RealESRGAN_x4plus.pth")
+@click.option("--size", "sizes", type=click.IntRange(min=8), multiple=True, default=[256, 512, 1024, 2048])
+@click.option("--tile", type=click.IntRange(min=0), default=128, help="Tile size (in input pixels), 0 disables tiling")
+@click.option("--tile-pad", type=click.IntRange(min=0), default=10, help="Overlap (in input pixels) around each tile")
+def benchmark(model_path: str, sizes: Tuple[int, ...], tile: int, tile_pad: int) -> None:
+    """Measures each resolution in a fresh process, and prints its time and peak memory next to its output size."""
+    if get_peak_rss() is None:
+        raise click.ClickException("The peak resident memory is not reported on this platform.")
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as image_dir:
+        for size in sizes:
+            inbound_file: Path = Path(image_dir) / f"{size}.png"
+            generate_image(path=inbound_file, size=size)
+
+            with context.Pool(processes=1) as pool:
+                seconds, decode_peak, peak = pool.apply(measure, (model_path, tile, tile_pad, inbound_file))
+
+            output_mb: float = (size * 4) ** 2 * 3 / 1_000_000
+            print(
+                f"{size:>6}px: {seconds:8.2f}s, output {output_mb:8.1f}MB, peak rss {peak:8.1f}MB above the loaded "
+                f"model, of which decoding the input {decode_peak:8.1f}MB ({peak - decode_peak:8.1f}MB beyond it)"
+            )
+
+
+if __name__ == "__main__":
+    benchmark()
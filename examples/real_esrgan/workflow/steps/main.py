@@ -20,8 +20,9 @@ When invoked this way the MLproject default parameters are used
 
 import json
 import math
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import click
 import mlflow
@@ -29,7 +30,19 @@ from mlflow_adsp import Job, Scheduler, Step, create_unique_name, upsert_experim
 
 from anaconda.enterprise.server.common.sdk import load_ae5_user_secrets
 
-from ..utils.worker import get_batches
+from ..utils.batch_logger import BatchLogger
+from ..utils.ledger import get_processing_fingerprint, is_current
+from ..utils.work_queue import create_queue, remove_queue
+from ..utils.worker import estimate_cost, get_batches, plan_batches
+
+
+def _worker_parameters(batches: List[List[str]], costs: Dict[str, int], queue_path: Optional[Path]) -> List[Dict]:
+    # The dispatch parameters of each worker, its batch as a manifest, or (when given a queue) the shared queue.
+    if queue_path is None:
+        return [{"manifest": json.dumps({"files": batch})} for batch in batches]
+
+    create_queue(queue_dir=queue_path, files=sorted(costs, key=costs.get, reverse=True))
+    return [{"queue_dir": queue_path.as_posix()} for _ in batches]
 
 
 @click.command(help="Workflow [Main]")
@@ -39,10 +52,54 @@ from ..utils.worker import get_batches
 @click.option(
     "--batch-size", type=click.IntRange(min=1, max=100), default=1, help="Batch size (as percentage) for each worker"
 )
+@click.option(
+    "--model-path",
+    type=click.STRING,
+    default="data/weights/RealESRGAN_x4plus.pth",
+    help="The Real-ESRGAN model weights",
+)
+@click.option(
+    "--tile",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Tile size (in input pixels) for workers to process images in, 0 disables tiling",
+)
+@click.option("--tile-pad", type=click.IntRange(min=0), default=10, help="Overlap (in input pixels) around each tile")
+@click.option(
+    "--planner",
+    type=click.Choice(["cost", "count"]),
+    default="cost",
+    help="Balance batches by estimated cost (pixel count), or split them by file count",
+)
+@click.option(
+    "--seconds-per-megapixel",
+    type=click.FLOAT,
+    default=1.0,
+    help="Estimated processing time per input megapixel, used to predict the makespan",
+)
+@click.option(
+    "--dispatch",
+    type=click.Choice(["static", "dynamic"]),
+    default="static",
+    help="Assign each worker a fixed batch (static), or have workers pull files from a shared queue (dynamic)",
+)
 @click.option("--run-name", type=click.STRING, default="workflow-real-esrgan-parallel", help="The name of the run")
 @click.option("--backend", type=click.STRING, default="local", help="Backend to use")
-# pylint: disable=too-many-locals
-def workflow(work_dir: str, inbound: str, outbound: str, batch_size: int, run_name: str, backend: str) -> None:
+# pylint: disable=too-many-locals,too-many-statements,too-many-positional-arguments
+def workflow(
+    work_dir: str,
+    inbound: str,
+    outbound: str,
+    batch_size: int,
+    model_path: str,
+    tile: int,
+    tile_pad: int,
+    planner: str,
+    seconds_per_megapixel: float,
+    dispatch: str,
+    run_name: str,
+    backend: str,
+) -> None:
     """
 
     Parameters
@@ -55,13 +112,33 @@ def workflow(work_dir: str, inbound: str, outbound: str, batch_size: int, run_na
         The outbound directory
     batch_size: int
         Batch size (as percentage) for each worker
+    model_path: str
+        The Real-ESRGAN model weights.
+    tile: int
+        The tile size (in input pixels) for workers to process images in, 0 disables tiling.
+        Use tiling to bound worker memory when processing very large images.
+    tile_pad: int
+        The overlap (in input pixels) around each tile.
+    planner: str
+        `cost` packs files into batches balanced by their estimated cost (pixel count), longest first.
+        `count` splits files into batches of equal file count.
+        Both planners produce the same number of batches.
+    seconds_per_megapixel: float
+        Estimated processing time per input megapixel, used to predict the makespan.
+        Compare with the logged `observed_seconds_per_megapixel` to calibrate.
+    dispatch: str
+        `static` passes each worker its planned batch as a manifest.
+        `dynamic` writes every file (most expensive first) to a shared work queue under `<work_dir>/queue/<run_id>`
+        and launches the same number of workers, which claim files until the queue is empty.  Fast workers absorb
+        the tail, and files held by a crashed worker are reclaimed once their lease expires.  The queue is removed
+        once the workers are done.
     run_name: str
         The name of the run
     backend: str
         The backend to use for workers.
     """
 
-    with mlflow.start_run(run_name=create_unique_name(name=run_name)) as run:
+    with mlflow.start_run(run_name=create_unique_name(name=run_name)) as run, BatchLogger() as logger:
         #
         # Wrapped and Tracked Workflow Step Runs
         # https://mlflow.org/docs/latest/python_api/mlflow.projects.html#mlflow.projects.run
@@ -75,6 +152,8 @@ def workflow(work_dir: str, inbound: str, outbound: str, batch_size: int, run_na
         print(f"inbound={inbound}")
         print(f"outbound={outbound}")
         print(f"batch size={batch_size}")
+        print(f"planner={planner}")
+        print(f"dispatch={dispatch}")
 
         run_id: str = run.info.run_id
         print(f"run_id: {run_id}")
@@ -89,12 +168,6 @@ def workflow(work_dir: str, inbound: str, outbound: str, batch_size: int, run_na
         inbound_path.mkdir(parents=True, exist_ok=True)
         outbound_path.mkdir(parents=True, exist_ok=True)
 
-        # Generate file list to process
-        file_list: List[str] = []
-        for item in inbound_path.glob("*"):
-            if item.is_file():
-                file_list.append(item.name)
-
         #############################################################################
         # Execute workflow steps
         #############################################################################
@@ -112,6 +185,21 @@ def workflow(work_dir: str, inbound: str, outbound: str, batch_size: int, run_na
             )
         )
 
+        # Generate file list to process, skipping anything the ledger reports as already done.
+        # (After the download, so the fingerprint hashes the same model weights the workers load.)
+        fingerprint: str = get_processing_fingerprint(model_path=model_path, tile=tile, tile_pad=tile_pad)
+        file_list: List[str] = []
+        skipped_count: int = 0
+        for item in inbound_path.glob("*"):
+            if item.is_file():
+                if is_current(inbound=inbound_path, outbound=outbound_path, file=item.name, fingerprint=fingerprint):
+                    skipped_count += 1
+                else:
+                    file_list.append(item.name)
+
+        print(f"files to process: {len(file_list)}, files already processed: {skipped_count}")
+        logger.log_metric(key="files_skipped", value=skipped_count)
+
         #############################################################################
         # Prepare Worker Environment Step
         #############################################################################
@@ -132,23 +220,42 @@ def workflow(work_dir: str, inbound: str, outbound: str, batch_size: int, run_na
         if file_count > 0:
             batch_amount: int = math.floor(file_count * (batch_size / 100))
             batch_amount = batch_amount if batch_amount > 0 else 1
-            batches: List = get_batches(batch_size=batch_amount, source_list=file_list)
+            worker_count: int = math.ceil(file_count / batch_amount)
+
+            costs: Dict[str, int] = {name: estimate_cost(file=inbound_path / name) for name in file_list}
+            if planner == "cost":
+                batches, batch_costs = plan_batches(costs=costs, worker_count=worker_count)
+            else:
+                batches: List = get_batches(batch_size=batch_amount, source_list=file_list)
+                batch_costs: List[int] = [sum(costs[name] for name in batch) for batch in batches]
+
+            predicted_makespan_megapixels: float = max(batch_costs) / 1_000_000
+            predicted_makespan_seconds: float = predicted_makespan_megapixels * seconds_per_megapixel
 
             print(f"batch size: {batch_size}")
             print(f"batch amount: {batch_amount}")
             print(f"number of batches: {len(batches)}")
+            print(f"batch costs (megapixels): {[cost / 1_000_000 for cost in batch_costs]}")
+            print(f"predicted makespan: {predicted_makespan_seconds:.1f}s")
+
+            logger.log_param(key="planner", value=planner)
+            logger.log_param(key="dispatch", value=dispatch)
+            logger.log_metric(key="predicted_makespan_megapixels", value=predicted_makespan_megapixels)
+            logger.log_metric(key="predicted_makespan_seconds", value=predicted_makespan_seconds)
 
             print("starting workers")
+            queue_path: Optional[Path] = base_path / "queue" / run_id if dispatch == "dynamic" else None
             steps: List[Step] = []
-            for batch in batches:
-                process_manifest: Dict = {"files": batch}
-
+            for parameters in _worker_parameters(batches=batches, costs=costs, queue_path=queue_path):
                 step: Step = Step(
                     entry_point="process_data",
                     parameters={
                         "inbound": inbound_path.as_posix(),
                         "outbound": outbound_path.as_posix(),
-                        "manifest": json.dumps(process_manifest),
+                        "model_path": model_path,
+                        "tile": tile,
+                        "tile_pad": tile_pad,
+                        **parameters,
                     },
                     run_name=create_unique_name(name="workflow-step-process-data"),
                     backend=backend,
@@ -157,15 +264,32 @@ def workflow(work_dir: str, inbound: str, outbound: str, batch_size: int, run_na
                 )
                 steps.append(step)
 
-            # submit jobs
+            # submit jobs (the prediction is flushed first, so it is visible while they run)
+            logger.flush()
+            start: float = time.perf_counter()
             adsp_jobs: List[Job] = Scheduler().process_work_queue(steps=steps)
+            actual_makespan_seconds: float = time.perf_counter() - start
+            if queue_path is not None:
+                failed_files: List[str] = remove_queue(queue_dir=queue_path)
+                print(f"files which failed in the queue: {failed_files}")
+                logger.log_metric(key="queue_failed_files", value=len(failed_files))
+
+            # Note: the `local` backend runs the batches serially, so its actual makespan is the sum of the batches.
+            print(f"predicted makespan: {predicted_makespan_seconds:.1f}s")
+            print(f"actual makespan: {actual_makespan_seconds:.1f}s")
+            logger.log_metric(key="actual_makespan_seconds", value=actual_makespan_seconds)
+            if predicted_makespan_megapixels > 0:
+                logger.log_metric(
+                    key="observed_seconds_per_megapixel",
+                    value=actual_makespan_seconds / predicted_makespan_megapixels,
+                )
 
             print("Step execution completed")
             for job in adsp_jobs:
                 print(f"Job ID: {job.id}, Status: {job.last_status}, Number of executions: {len(job.runs)}")
 
         else:
-            print("No files in `inbound` found to process, skipping step")
+            print("No new or changed files in `inbound` found to process, skipping step")
 
 
 if __name__ == "__main__":
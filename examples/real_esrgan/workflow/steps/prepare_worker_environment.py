@@ -22,8 +22,10 @@ Note:
 
 """
 
+import time
 import warnings
 from pathlib import Path
+from typing import Optional
 
 import click
 import mlflow
@@ -31,6 +33,8 @@ from mlflow_adsp import create_unique_name, upsert_experiment
 
 from anaconda.enterprise.server.common.sdk import load_ae5_user_secrets
 
+from ..utils.batch_logger import BatchLogger
+from ..utils.environment_cache import build_worker_environment, get_built_spec_hash, get_environment_spec_hash
 from ..utils.process import process_launch_wait
 
 
@@ -41,10 +45,15 @@ from ..utils.process import process_launch_wait
     "--run-name", type=click.STRING, default="workflow-step-prepare-worker-environment", help="The name of the run"
 )
 @click.option("--backend", type=click.STRING, default="local", help="Flag for controlling logic for backend")
-def run(worker_env_name: str, data_dir: str, run_name: str, backend: str) -> None:
+@click.option(
+    "--unpack-workers", type=click.INT, default=8, help="The number of threads to extract the environment with"
+)
+def run(worker_env_name: str, data_dir: str, run_name: str, backend: str, unpack_workers: int) -> None:
     """
     Runs the worker bootstrap within a mlflow job.
-    If the worker environment has previously been created within the shared location it will NOT be recreated.
+    If the worker environment within the shared location was built from the current (resolved) environment
+    specification it will NOT be recreated.  Packed environments are cached by specification
+    (`<data_dir>/<worker_env_name>_cache`), so returning to a previous specification only requires an unpack.
 
     Parameters
     ----------
@@ -57,16 +66,43 @@ def run(worker_env_name: str, data_dir: str, run_name: str, backend: str) -> Non
     backend: str
         The backend type for run context.
         We only pack when we are targeting the `adsp` backend, all others are skipped.
+    unpack_workers: int
+        The number of threads to extract the packed environment with.
     """
 
     warnings.filterwarnings("ignore")
-    with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)):
-        if backend == "adsp" and not (Path(data_dir) / worker_env_name).exists():
-            # Pack Worker Runtime Environment
-            cmd: str = "anaconda-project run bootstrap"
-            process_launch_wait(shell_out_cmd=cmd)
-        else:
-            print("Skipping worker environment preparation, either wrong backend or already complete")
+    with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)), BatchLogger() as logger:
+        if backend != "adsp":
+            print("Skipping worker environment preparation, wrong backend")
+            return
+
+        worker_env: Path = Path(data_dir) / worker_env_name
+        spec_hash: str = get_environment_spec_hash()
+        built_spec_hash: Optional[str] = get_built_spec_hash(worker_env=worker_env)
+        logger.log_param(key="environment_spec_hash", value=spec_hash)
+
+        if built_spec_hash == spec_hash:
+            print("Skipping worker environment preparation, already built from the current environment")
+            logger.log_metric(key="environment_stale", value=0)
+            return
+
+        print(f"Worker environment is stale ({built_spec_hash} != {spec_hash}), rebuilding")
+        logger.log_metric(key="environment_stale", value=1)
+        start: float = time.perf_counter()
+
+        # Repair the opencv install before packing (see anaconda-project.yml), this may change the specification.
+        process_launch_wait(shell_out_cmd="anaconda-project run repair_opencv")
+        spec_hash = get_environment_spec_hash()
+        logger.log_param(key="environment_packed_spec_hash", value=spec_hash)
+
+        hit: bool = build_worker_environment(
+            cache_dir=Path(data_dir) / f"{worker_env_name}_cache",
+            worker_env=worker_env,
+            spec_hash=spec_hash,
+            workers=unpack_workers,
+        )
+        logger.log_metric(key="environment_cache_hit", value=int(hit))
+        logger.log_metric(key="environment_build_seconds", value=time.perf_counter() - start)
 
 
 if __name__ == "__main__":
@@ -21,9 +21,12 @@ Note:
 """
 
 import json
+import time
 import warnings
+from collections import deque
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict
+from typing import Deque, Dict, Iterable, Optional, Tuple
 
 import click
 import mlflow
@@ -31,7 +34,63 @@ from mlflow_adsp import create_unique_name, upsert_experiment
 
 from anaconda.enterprise.server.common.sdk import load_ae5_user_secrets
 
-from ..utils.process import process_launch_wait
+from ..utils.batch_logger import BatchLogger
+from ..utils.ledger import FP32, SCALE, get_processing_fingerprint, is_current, record
+from ..utils.memory import get_peak_rss, reset_peak_rss
+from ..utils.process import ProcessResult, ProcessRunner
+from ..utils.upscaler import Upscaler
+from ..utils.work_queue import drain_queue
+
+
+def _complete(
+    *,
+    logger: BatchLogger,
+    inbound_path: Path,
+    outbound_file: Path,
+    file: str,
+    fingerprint: str,
+    latency: float,
+    peak_rss: Optional[int],
+    step: int,
+) -> None:
+    record(
+        inbound=inbound_path,
+        outbound=outbound_file.parent,
+        file=file,
+        fingerprint=fingerprint,
+        output=outbound_file.name,
+    )
+    print(f"Processed {file} in {latency:.3f}s")
+    logger.log_metric(key="image_latency_seconds", value=latency, step=step)
+    if peak_rss is not None:
+        logger.log_metric(key="image_peak_rss_mb", value=peak_rss / (1024 * 1024), step=step)
+
+
+def _collect(
+    logger: BatchLogger,
+    in_flight: Deque[Tuple[str, Path, "Future[ProcessResult]"]],
+    inbound_path: Path,
+    fingerprint: str,
+    step: int,
+) -> None:
+    file, outbound_file, future = in_flight.popleft()
+    result: ProcessResult = future.result()
+    if result.returncode != 0:
+        message: str = f"Subprocess failed with exit code: {result.returncode}"
+        raise ChildProcessError(message)
+
+    if result.cpu_seconds is not None:
+        logger.log_metric(key="image_cpu_seconds", value=result.cpu_seconds, step=step)
+    _complete(
+        logger=logger,
+        inbound_path=inbound_path,
+        outbound_file=outbound_file,
+        file=file,
+        fingerprint=fingerprint,
+        latency=result.wall_seconds,
+        peak_rss=result.peak_rss,
+        step=step,
+    )
 
 
 @click.command(help="Workflow Step ['Worker' Process Data]")
@@ -40,10 +99,62 @@ from ..utils.process import process_launch_wait
 @click.option(
     "--source-dir", type=click.STRING, default="data/Real-ESRGAN", help="The source directory for real-esrgran"
 )
-@click.option("--manifest", type=click.STRING, help="File list json manifest")
+@click.option("--manifest", type=click.STRING, default='{"files":[]}', help="File list json manifest")
+@click.option(
+    "--queue-dir",
+    type=click.STRING,
+    default="",
+    help="Shared work queue directory to pull files from (instead of the manifest)",
+)
+@click.option(
+    "--lease-seconds",
+    type=click.FLOAT,
+    default=1800,
+    help="How long a claimed queue file may go unfinished before another worker reclaims it",
+)
+@click.option(
+    "--model-path",
+    type=click.STRING,
+    default="data/weights/RealESRGAN_x4plus.pth",
+    help="The Real-ESRGAN model weights",
+)
+@click.option(
+    "--worker-mode",
+    type=click.Choice(["persistent", "subprocess"]),
+    default="persistent",
+    help="Load the model once for the whole manifest (persistent), or launch inference once per file (subprocess)",
+)
+@click.option(
+    "--tile",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Tile size (in input pixels) to process images in, 0 disables tiling",
+)
+@click.option("--tile-pad", type=click.IntRange(min=0), default=10, help="Overlap (in input pixels) around each tile")
+@click.option(
+    "--max-parallel",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Inference processes to run at once in subprocess mode (manifest only, queue workers run one at a time)",
+)
 @click.option("--run-name", type=click.STRING, default="workflow-step-process-data", help="The name of the run")
-@click.option("--force", type=click.BOOL, default=False, help="Flag for over-riding output files if they exist")
-def run(inbound: str, outbound: str, source_dir: str, manifest: str, run_name: str, force: bool) -> None:
+@click.option("--force", type=click.BOOL, default=False, help="Flag for re-processing files the ledger reports as done")
+# pylint: disable=too-many-locals,too-many-positional-arguments
+def run(
+    inbound: str,
+    outbound: str,
+    source_dir: str,
+    manifest: str,
+    queue_dir: str,
+    lease_seconds: float,
+    model_path: str,
+    worker_mode: str,
+    tile: int,
+    tile_pad: int,
+    max_parallel: int,
+    run_name: str,
+    force: bool,
+) -> None:
     """
     Runs the Workflow Step ['Worker' Process Data]
 
@@ -58,16 +169,49 @@ def run(inbound: str, outbound: str, source_dir: str, manifest: str, run_name: s
     manifest: str
         a json encoded string of the file list to process.
         The smallest value: '{"files":[]}'
+    queue_dir: str
+        When provided, files are claimed from this shared work queue (see `utils.work_queue`) until it is empty,
+        and the manifest is ignored.
+    lease_seconds: float
+        How long a claimed queue file may go unfinished before another worker reclaims it.
+    model_path: str
+        The Real-ESRGAN model weights.
+    worker_mode: str
+        `persistent` loads the model once and streams every file through it.
+        `subprocess` launches `inference_realesrgan` once per file.
+    tile: int
+        The tile size (in input pixels) to process images in, 0 disables tiling.
+        Tiling bounds the model's memory by the tile size rather than the input resolution.
+    tile_pad: int
+        The overlap (in input pixels) added around each tile, which is cropped away when the tiles are stitched.
+    max_parallel: int
+        In `subprocess` mode, the number of inference processes to run at once when processing a manifest.
+        Each process' output is streamed to a log artifact (`logs/<file>.log`), and its wall time, cpu time and peak
+        memory are logged (see `utils.process.ProcessRunner`).  Queue workers always run one process at a time.
     run_name: str
         The base name of the run (for reporting to MLFlow)
     force: bool
+        Flag for re-processing files even when the ledger reports them as done.
+        Files are otherwise only processed when they are new, their content has changed, or the model weights or
+        parameters have changed (see `utils.ledger`).
     """
 
     warnings.filterwarnings("ignore")
 
-    with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)):
-        mlflow.log_param(key="inbound", value=inbound)
-        mlflow.log_param(key="outbound", value=outbound)
+    with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)), BatchLogger() as logger:
+        start: float = time.perf_counter()
+
+        logger.log_params(
+            params={
+                "inbound": inbound,
+                "outbound": outbound,
+                "worker_mode": worker_mode,
+                "queue_dir": queue_dir,
+                "tile": tile,
+                "tile_pad": tile_pad,
+                "max_parallel": max_parallel,
+            }
+        )
         manifest_dict: Dict = json.loads(manifest)
 
         mlflow.log_dict(
@@ -75,27 +219,98 @@ def run(inbound: str, outbound: str, source_dir: str, manifest: str, run_name: s
             artifact_file="business_metrics.json",
         )
 
-        for file in manifest_dict["files"]:
-            inbound_file: Path = Path(inbound) / file
-            outbound_file: Path = Path(outbound) / (Path(file).stem + "_out" + Path(file).suffix)
-            outbound_file_path: Path = Path(outbound)
+        inbound_path: Path = Path(inbound)
+        outbound_path: Path = Path(outbound)
+        outbound_path.mkdir(parents=True, exist_ok=True)
+        fingerprint: str = get_processing_fingerprint(model_path=model_path, tile=tile, tile_pad=tile_pad)
 
-            if outbound_file.exists() and not force:
-                print(f"Skipping {file}, it already exists in the outbound folder")
-                break
+        files: Iterable[str] = manifest_dict["files"]
+        if queue_dir:
+            files = drain_queue(queue_dir=Path(queue_dir), lease_seconds=lease_seconds)
 
-            if outbound_file.exists() and force:
+        upscaler: Optional[Upscaler] = None
+        # Queue workers process one file at a time, a claimed file is only marked done once the next is requested.
+        runner: Optional[ProcessRunner] = (
+            ProcessRunner(max_workers=1 if queue_dir else max_parallel) if worker_mode == "subprocess" else None
+        )
+        in_flight: Deque[Tuple[str, Path, "Future[ProcessResult]"]] = deque()
+        processed_count: int = 0
+        skipped_count: int = 0
+        # The runner is shut down (waiting on, and uploading the logs of, any commands still running) even on failure.
+        try:
+            for file in files:
+                if not force and is_current(
+                    inbound=inbound_path, outbound=outbound_path, file=file, fingerprint=fingerprint
+                ):
+                    print(f"Skipping {file}, it is unchanged since it was last processed")
+                    skipped_count += 1
+                    continue
+
+                # Loaded on first use, a queue worker may find no work left.
+                if worker_mode == "persistent" and upscaler is None:
+                    upscaler = Upscaler(model_path=model_path, scale=SCALE, fp32=FP32, tile=tile, tile_pad=tile_pad)
+                    logger.log_metric(key="model_load_seconds", value=upscaler.load_time)
+
+                inbound_file: Path = inbound_path / file
+                outbound_file: Path = outbound_path / (Path(file).stem + "_out" + Path(file).suffix)
                 outbound_file.unlink(missing_ok=True)
 
-            cmd: str = (
-                "python -m inference_realesrgan "
-                f"--input {inbound_file.resolve()} "
-                f"--output {outbound_file_path.resolve()} "
-                "--model_path ../weights/RealESRGAN_x4plus.pth "
-                "--fp32 "
-            )
-            print(cmd)
-            process_launch_wait(shell_out_cmd=cmd, cwd=source_dir)
+                if upscaler is not None:
+                    reset_peak_rss()
+                    latency: float = upscaler.upscale(inbound_file=inbound_file, outbound_file=outbound_file)
+                    _complete(
+                        logger=logger,
+                        inbound_path=inbound_path,
+                        outbound_file=outbound_file,
+                        file=file,
+                        fingerprint=fingerprint,
+                        latency=latency,
+                        peak_rss=get_peak_rss(),
+                        step=processed_count,
+                    )
+                    processed_count += 1
+                    continue
+
+                cmd: str = (
+                    "python -m inference_realesrgan "
+                    f"--input {inbound_file.resolve()} "
+                    f"--output {outbound_path.resolve()} "
+                    f"--model_path {Path(model_path).resolve()} "
+                    f"--tile {tile} "
+                    f"--tile_pad {tile_pad} "
+                    f"--outscale {SCALE} "
+                    f"{'--fp32 ' if FP32 else ''}"
+                )
+                print(cmd)
+                in_flight.append((file, outbound_file, runner.submit(shell_out_cmd=cmd, cwd=source_dir, name=file)))
+
+                # Wait on the oldest launch once the parallelism limit is reached.
+                if len(in_flight) >= runner.max_workers:
+                    _collect(
+                        logger=logger,
+                        in_flight=in_flight,
+                        inbound_path=inbound_path,
+                        fingerprint=fingerprint,
+                        step=processed_count,
+                    )
+                    processed_count += 1
+
+            while in_flight:
+                _collect(
+                    logger=logger,
+                    in_flight=in_flight,
+                    inbound_path=inbound_path,
+                    fingerprint=fingerprint,
+                    step=processed_count,
+                )
+                processed_count += 1
+        finally:
+            if runner is not None:
+                runner.shutdown()
+
+        logger.log_metric(key="images_processed", value=processed_count)
+        logger.log_metric(key="images_skipped", value=skipped_count)
+        logger.log_metric(key="total_latency_seconds", value=time.perf_counter() - start)
 
 
 if __name__ == "__main__":
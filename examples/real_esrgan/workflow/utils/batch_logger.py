@@ -0,0 +1,172 @@
+""" Batched MLflow Logging Helpers
+
+`mlflow.log_param` / `mlflow.log_metric` each make a request to the tracking server.  `BatchLogger` buffers params,
+metrics and tags for a run and sends them with `MlflowClient.log_batch`, once a buffer reaches its threshold, once
+`flush_interval` seconds have passed since the last flush (so progress stays visible during long steps), and when the
+logger is closed (e.g. on leaving its `with` block).
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import mlflow
+from mlflow import MlflowClient
+from mlflow.entities import Metric, Param, RunTag
+
+# The tracking server limits for a single `log_batch` request.
+MAX_METRICS_PER_BATCH: int = 1000
+MAX_PARAMS_PER_BATCH: int = 100
+MAX_TAGS_PER_BATCH: int = 100
+
+
+class BatchLogger:  # pylint: disable=too-many-instance-attributes
+    """
+    Buffers params, metrics and tags for a run and logs them in batches.
+
+    Usage (within a run):
+        with BatchLogger() as logger:
+            logger.log_param(key="inbound", value=inbound)
+            logger.log_metric(key="image_latency_seconds", value=latency, step=step)
+    """
+
+    def __init__(
+        self,
+        run_id: Optional[str] = None,
+        *,
+        max_metrics: int = MAX_METRICS_PER_BATCH,
+        max_params: int = MAX_PARAMS_PER_BATCH,
+        max_tags: int = MAX_TAGS_PER_BATCH,
+        flush_interval: float = 30,
+        client: Optional[MlflowClient] = None,
+    ):
+        """
+        Parameters
+        ----------
+        run_id: Optional[str]
+            The run to log to, defaults to the active run.
+        max_metrics: int
+            The number of buffered metrics which triggers a flush.
+        max_params: int
+            The number of buffered params which triggers a flush.
+        max_tags: int
+            The number of buffered tags which triggers a flush.
+        flush_interval: float
+            Seconds after which buffered values are flushed by the next logging call, 0 flushes on every call.
+        client: Optional[MlflowClient]
+            The client to log with.
+        """
+
+        self.run_id: str = run_id if run_id is not None else mlflow.active_run().info.run_id
+        self.max_metrics: int = min(max_metrics, MAX_METRICS_PER_BATCH)
+        self.max_params: int = min(max_params, MAX_PARAMS_PER_BATCH)
+        self.max_tags: int = min(max_tags, MAX_TAGS_PER_BATCH)
+        self.flush_interval: float = flush_interval
+        self.client: MlflowClient = client if client is not None else MlflowClient()
+
+        # The number of values logged, and the number of requests made to log them.
+        self.logged_count: int = 0
+        self.request_count: int = 0
+
+        self._metrics: List[Metric] = []
+        self._params: Dict[str, Param] = {}
+        self._tags: Dict[str, RunTag] = {}
+        self._last_flush: float = time.monotonic()
+        self._lock: threading.Lock = threading.Lock()
+
+    def log_param(self, key: str, value: Any) -> None:
+        """
+        Buffers a param (a param may only be logged once per run, the last value buffered is sent).
+        """
+
+        with self._lock:
+            self._params[key] = Param(key=key, value=str(value))
+            self.logged_count += 1
+        self._maybe_flush()
+
+    def log_params(self, params: Dict[str, Any]) -> None:
+        """
+        Buffers several params.
+        """
+
+        for key, value in params.items():
+            self.log_param(key=key, value=value)
+
+    def log_metric(self, key: str, value: float, step: int = 0, timestamp: Optional[int] = None) -> None:
+        """
+        Buffers a metric, the timestamp (in milliseconds) defaults to now rather than the time of the flush.
+        """
+
+        metric: Metric = Metric(
+            key=key,
+            value=float(value),
+            timestamp=timestamp if timestamp is not None else int(time.time() * 1000),
+            step=step,
+        )
+        with self._lock:
+            self._metrics.append(metric)
+            self.logged_count += 1
+        self._maybe_flush()
+
+    def log_metrics(self, metrics: Dict[str, float], step: int = 0) -> None:
+        """
+        Buffers several metrics (sharing a step and timestamp).
+        """
+
+        timestamp: int = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self.log_metric(key=key, value=value, step=step, timestamp=timestamp)
+
+    def set_tag(self, key: str, value: Any) -> None:
+        """
+        Buffers a tag.
+        """
+
+        with self._lock:
+            self._tags[key] = RunTag(key=key, value=str(value))
+            self.logged_count += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if (
+            len(self._metrics) >= self.max_metrics
+            or len(self._params) >= self.max_params
+            or len(self._tags) >= self.max_tags
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Sends everything buffered, split into requests within the tracking server limits.
+        """
+
+        with self._lock:
+            metrics: List[Metric] = self._metrics
+            params: List[Param] = list(self._params.values())
+            tags: List[RunTag] = list(self._tags.values())
+            self._metrics, self._params, self._tags = [], {}, {}
+            self._last_flush = time.monotonic()
+
+            while metrics or params or tags:
+                self.client.log_batch(
+                    run_id=self.run_id,
+                    metrics=metrics[: self.max_metrics],
+                    params=params[: self.max_params],
+                    tags=tags[: self.max_tags],
+                )
+                self.request_count += 1
+                metrics, params, tags = metrics[self.max_metrics :], params[self.max_params :], tags[self.max_tags :]
+
+    def close(self) -> None:
+        """
+        Flushes anything buffered.
+        """
+
+        self.flush()
+
+    def __enter__(self) -> "BatchLogger":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,178 @@
+""" Processing Ledger Helpers
+
+The ledger records, for every inbound file which has been upscaled, the content hash of the input and the fingerprint
+of the model and parameters which produced the output.  It lives within the outbound directory (`.ledger`) as one small
+json entry per inbound file, so lookups are O(1) and concurrent workers never contend on a shared file.
+
+A file is only re-hashed when its size or modification time differ from the ledger entry.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+LEDGER_DIR_NAME: str = ".ledger"
+
+# The output scale and precision every worker upscales with (see `steps.process_data`).
+SCALE: int = 4
+FP32: bool = True
+
+_CHUNK_SIZE: int = 1024 * 1024
+
+
+def hash_file(file: Path) -> str:
+    """
+    Computes the sha256 content hash of a file.
+
+    Parameters
+    ----------
+    file: Path
+        The file to hash.
+
+    Returns
+    -------
+    digest: str
+        The hex digest of the file contents.
+    """
+
+    digest = hashlib.sha256()
+    with open(file=file.as_posix(), mode="rb") as source:
+        for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_fingerprint(model_path: str, **parameters) -> str:
+    """
+    Computes a fingerprint of the model weights and processing parameters.
+    Any change to either will cause previously processed files to be processed again.
+
+    Parameters
+    ----------
+    model_path: str
+        The model weights.  If the file does not exist only its name contributes to the fingerprint.
+    parameters:
+        Any processing parameters which affect the output.
+
+    Returns
+    -------
+    fingerprint: str
+        The hex digest of the model and parameters.
+    """
+
+    model_file: Path = Path(model_path)
+    model_hash: str = hash_file(file=model_file) if model_file.exists() else model_file.name
+    payload: str = json.dumps({"model": model_hash, "parameters": parameters}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_processing_fingerprint(model_path: str, tile: int, tile_pad: int) -> str:
+    """
+    Computes the fingerprint of the model weights and every setting the workers process files with, so the workflow
+    and its workers agree on which files are current.
+
+    Parameters
+    ----------
+    model_path: str
+        The model weights.
+    tile: int
+        The tile size (in input pixels), 0 disables tiling.
+    tile_pad: int
+        The overlap (in input pixels) around each tile, it only contributes when tiling.
+
+    Returns
+    -------
+    fingerprint: str
+        The hex digest of the model and settings (see `get_fingerprint`).
+    """
+
+    return get_fingerprint(model_path=model_path, scale=SCALE, fp32=FP32, tile=tile, tile_pad=tile_pad if tile else 0)
+
+
+def _entry_path(outbound: Path, file: str) -> Path:
+    return outbound / LEDGER_DIR_NAME / f"{hashlib.sha256(file.encode('utf-8')).hexdigest()}.json"
+
+
+def _read_entry(entry_path: Path) -> Optional[Dict]:
+    try:
+        with open(file=entry_path.as_posix(), mode="r", encoding="utf-8") as entry:
+            return json.load(entry)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def is_current(inbound: Path, outbound: Path, file: str, fingerprint: str) -> bool:
+    """
+    Checks whether a file has already been processed, with its current content, by the given model and parameters.
+
+    Parameters
+    ----------
+    inbound: Path
+        The inbound directory.
+    outbound: Path
+        The outbound directory (holding the ledger).
+    file: str
+        The inbound file name.
+    fingerprint: str
+        The model and parameters fingerprint (see `get_fingerprint`).
+
+    Returns
+    -------
+    current: bool
+        True if the recorded output is up-to-date and can be skipped.
+    """
+
+    entry: Optional[Dict] = _read_entry(entry_path=_entry_path(outbound=outbound, file=file))
+    if entry is None or entry["fingerprint"] != fingerprint or not (outbound / entry["output"]).exists():
+        return False
+
+    stat: os.stat_result = (inbound / file).stat()
+    if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return True
+
+    # The file has been touched, it is only current if the content is unchanged.
+    if entry["size"] == stat.st_size and entry["content_hash"] == hash_file(file=inbound / file):
+        record(inbound=inbound, outbound=outbound, file=file, fingerprint=fingerprint, output=entry["output"])
+        return True
+
+    return False
+
+
+def record(inbound: Path, outbound: Path, file: str, fingerprint: str, output: str) -> None:
+    """
+    Records a processed file in the ledger.
+
+    Parameters
+    ----------
+    inbound: Path
+        The inbound directory.
+    outbound: Path
+        The outbound directory (holding the ledger).
+    file: str
+        The inbound file name.
+    fingerprint: str
+        The model and parameters fingerprint (see `get_fingerprint`).
+    output: str
+        The name of the output file within the outbound directory.
+    """
+
+    stat: os.stat_result = (inbound / file).stat()
+    entry: Dict = {
+        "file": file,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": hash_file(file=inbound / file),
+        "fingerprint": fingerprint,
+        "output": output,
+    }
+
+    entry_path: Path = _entry_path(outbound=outbound, file=file)
+    entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write then rename so that readers never see a partial entry.
+    temp_path: Path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(file=temp_path.as_posix(), mode="w", encoding="utf-8") as temp:
+        json.dump(entry, temp)
+    temp_path.replace(entry_path)
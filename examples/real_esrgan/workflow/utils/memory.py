@@ -0,0 +1,55 @@
+""" Memory Usage Helpers """
+
+import sys
+from pathlib import Path
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows, where the peak is not reported.
+    resource = None  # pylint: disable=invalid-name
+
+_PROC_STATUS: Path = Path("/proc/self/status")
+_PROC_CLEAR_REFS: Path = Path("/proc/self/clear_refs")
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak resident set size (high water mark) of the current process so that the peak of a single unit of
+    work can be measured.  This is only supported on Linux.
+
+    Returns
+    -------
+    reset: bool
+        True if the peak was reset, otherwise `get_peak_rss` reports the peak for the life of the process.
+    """
+
+    try:
+        _PROC_CLEAR_REFS.write_text("5", encoding="utf-8")
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss() -> Optional[int]:
+    """
+    Gets the peak resident set size of the current process.
+
+    Returns
+    -------
+    peak: Optional[int]
+        The peak resident set size (in bytes) since the process started, or since the last `reset_peak_rss`.
+        None where it is not reported (Windows).
+    """
+
+    if _PROC_STATUS.exists():
+        for line in _PROC_STATUS.read_text(encoding="utf-8").splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+
+    if resource is None:
+        return None
+
+    # `ru_maxrss` is reported in bytes on macOS, and kilobytes elsewhere.
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
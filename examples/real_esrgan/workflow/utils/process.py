@@ -1,12 +1,78 @@
 """ Process Related Helpers """
 
+import itertools
+import os
 import shlex
+import shutil
 import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterator, Optional, Tuple
 
+import mlflow
+from mlflow import MlflowClient
+from mlflow.entities import Metric
 
-def process_launch_wait(shell_out_cmd: str, cwd: str = ".") -> None:
+try:
+    import resource
+except ImportError:  # Windows, where child processes are waited on without reporting their resource usage.
+    resource = None  # pylint: disable=invalid-name
+
+
+@dataclass
+class ProcessResult:
     """
-    Internal function for wrapping process launches [and waiting].
+    The outcome and resource usage of a child process.
+    """
+
+    command: str
+    returncode: int
+    wall_seconds: float
+    cpu_seconds: Optional[float]
+    peak_rss: Optional[int]
+    log_file: Optional[Path] = None
+
+
+def _stream(source: IO[bytes], console: IO[str], log: Optional[IO[str]], prefix: str, lock: threading.Lock) -> None:
+    for raw_line in iter(source.readline, b""):
+        line: str = raw_line.decode("utf-8", errors="replace")
+        console.write(line)
+        console.flush()
+        if log is not None:
+            with lock:
+                log.write(prefix + line)
+                log.flush()
+
+
+def _upload(run_id: str, log_file: Path, stop: threading.Event, interval: float) -> None:
+    client: MlflowClient = MlflowClient()
+    while not stop.wait(timeout=interval):
+        client.log_artifact(run_id=run_id, local_path=log_file.as_posix(), artifact_path="logs")
+    client.log_artifact(run_id=run_id, local_path=log_file.as_posix(), artifact_path="logs")
+
+
+def _wait(process: subprocess.Popen) -> Tuple[int, Optional["resource.struct_rusage"]]:
+    # Reaps the child ourselves where possible, `wait4` reports the resource usage of this child alone.
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+    _, status, usage = os.wait4(process.pid, 0)
+    return (os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)), usage
+
+
+def process_launch(
+    shell_out_cmd: str,
+    cwd: str = ".",
+    log_file: Optional[Path] = None,
+    run_id: Optional[str] = None,
+    upload_interval: float = 30,
+) -> ProcessResult:
+    """
+    Launches a process and waits for it, streaming its stdout and stderr (as text) to the console and a log file.
 
     Parameters
     ----------
@@ -14,14 +80,183 @@ def process_launch_wait(shell_out_cmd: str, cwd: str = ".") -> None:
         The command to be executed.
     cwd: str
         The `current working directory` of the command.  This is the directory to launch the command from.
+    log_file: Optional[Path]
+        The file to write the output to, each line prefixed with the stream (`stdout` or `stderr`) it came from.
+    run_id: Optional[str]
+        When provided (with a log file), the log file is uploaded to the run (`logs/`) every `upload_interval` seconds
+        while the process runs, and once more when it exits.
+    upload_interval: float
+        Seconds between log uploads.
+
+    Returns
+    -------
+    result: ProcessResult
+        The exit code, wall time, cpu time (user + system) and peak resident set size (in bytes) of the process.
+        The cpu time and peak are None where the platform does not report them (Windows).
     """
 
     args = shlex.split(shell_out_cmd)
+    start: float = time.perf_counter()
+
+    log: Optional[IO[str]] = None
+    if log_file is not None:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        # Closed in the `finally` below, before the final upload of the log.
+        log = open(file=log_file.as_posix(), mode="w", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    stop: threading.Event = threading.Event()
+    uploader: Optional[threading.Thread] = None
+    if log_file is not None and run_id is not None:
+        uploader = threading.Thread(target=_upload, args=(run_id, log_file, stop, upload_interval), daemon=True)
+
+    try:
+        with subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            lock: threading.Lock = threading.Lock()
+            readers = [
+                threading.Thread(target=_stream, args=(process.stdout, sys.stdout, log, "stdout: ", lock)),
+                threading.Thread(target=_stream, args=(process.stderr, sys.stderr, log, "stderr: ", lock)),
+            ]
+            for reader in readers:
+                reader.start()
+            if uploader is not None:
+                uploader.start()
+
+            process.returncode, usage = _wait(process=process)
+
+            for reader in readers:
+                reader.join()
+    finally:
+        if log is not None:
+            log.close()
+        stop.set()
+        if uploader is not None and uploader.is_alive():
+            uploader.join()
 
-    with subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE) as process:
-        for line in iter(process.stdout.readline, b""):
-            print(line)
+    return ProcessResult(
+        command=shell_out_cmd,
+        returncode=process.returncode,
+        wall_seconds=time.perf_counter() - start,
+        cpu_seconds=usage.ru_utime + usage.ru_stime if usage is not None else None,
+        # `ru_maxrss` is reported in bytes on macOS, and kilobytes elsewhere.
+        peak_rss=(
+            (usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024) if usage is not None else None
+        ),
+        log_file=log_file,
+    )
 
-    if process.returncode != 0:
-        message: str = f"Subprocess failed with exit code: {process.returncode}"
+
+def process_launch_wait(shell_out_cmd: str, cwd: str = ".") -> None:
+    """
+    Internal function for wrapping process launches [and waiting].
+
+    Parameters
+    ----------
+    shell_out_cmd: str
+        The command to be executed.
+    cwd: str
+        The `current working directory` of the command.  This is the directory to launch the command from.
+    """
+
+    result: ProcessResult = process_launch(shell_out_cmd=shell_out_cmd, cwd=cwd)
+
+    if result.returncode != 0:
+        message: str = f"Subprocess failed with exit code: {result.returncode}"
         raise ChildProcessError(message)
+
+
+class ProcessRunner:
+    """
+    Runs commands concurrently (at most `max_workers` at a time) without blocking the caller.
+
+    Each command's output is streamed to its own log file, which is uploaded incrementally to the MLflow run active
+    when the runner was created (if any).  The wall time, cpu time and peak memory of each command are logged to the
+    run in one batch as metrics (`process_wall_seconds`, `process_cpu_seconds`, `process_peak_rss_mb`, stepped by
+    submission order).
+    """
+
+    def __init__(self, max_workers: int = 1, log_dir: Optional[Path] = None, upload_interval: float = 30):
+        """
+        Parameters
+        ----------
+        max_workers: int
+            The maximum number of commands to run at once.
+        log_dir: Optional[Path]
+            The directory to write the command logs to.  If not provided a temporary directory is used, which is
+            removed by `shutdown` (the logs have been uploaded to the run by then).
+        upload_interval: float
+            Seconds between log uploads.
+        """
+
+        active_run: Optional[mlflow.ActiveRun] = mlflow.active_run()
+        self.run_id: Optional[str] = active_run.info.run_id if active_run is not None else None
+        self.log_dir: Path = log_dir if log_dir is not None else Path(tempfile.mkdtemp(prefix="process-logs-"))
+        self._remove_log_dir: bool = log_dir is None
+        self.max_workers: int = max_workers
+        self.upload_interval: float = upload_interval
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers)
+        # Submission order (`next` on a count is atomic, so `submit` may be called from any thread).
+        self._steps: Iterator[int] = itertools.count()
+
+    def submit(self, shell_out_cmd: str, cwd: str = ".", name: Optional[str] = None) -> "Future[ProcessResult]":
+        """
+        Queues a command to run.
+
+        Parameters
+        ----------
+        shell_out_cmd: str
+            The command to be executed.
+        cwd: str
+            The `current working directory` of the command.
+        name: Optional[str]
+            The name of the command, used for its log file (`<name>.log`).
+
+        Returns
+        -------
+        future: Future[ProcessResult]
+            Resolves once the command exits (regardless of its exit code).
+        """
+
+        step: int = next(self._steps)
+        log_file: Path = self.log_dir / f"{name if name is not None else f'process-{step:04d}'}.log"
+        return self._executor.submit(self._run, shell_out_cmd, cwd, log_file, step)
+
+    def _run(self, shell_out_cmd: str, cwd: str, log_file: Path, step: int) -> ProcessResult:
+        result: ProcessResult = process_launch(
+            shell_out_cmd=shell_out_cmd,
+            cwd=cwd,
+            log_file=log_file,
+            run_id=self.run_id,
+            upload_interval=self.upload_interval,
+        )
+
+        if self.run_id is not None:
+            timestamp: int = int(time.time() * 1000)
+            metrics: dict = {"process_wall_seconds": result.wall_seconds}
+            if result.cpu_seconds is not None:
+                metrics["process_cpu_seconds"] = result.cpu_seconds
+            if result.peak_rss is not None:
+                metrics["process_peak_rss_mb"] = result.peak_rss / (1024 * 1024)
+            MlflowClient().log_batch(
+                run_id=self.run_id,
+                metrics=[
+                    Metric(key=key, value=value, timestamp=timestamp, step=step) for key, value in metrics.items()
+                ],
+            )
+
+        return result
+
+    def shutdown(self) -> None:
+        """
+        Waits for every submitted command to finish, then removes the temporary log directory (if one was created).
+        """
+
+        self._executor.shutdown(wait=True)
+        if self._remove_log_dir:
+            shutil.rmtree(self.log_dir, ignore_errors=True)
+            self._remove_log_dir = False
+
+    def __enter__(self) -> "ProcessRunner":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
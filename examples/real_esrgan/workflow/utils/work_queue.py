@@ -0,0 +1,263 @@
+""" Shared On-Disk Work Queue Helpers
+
+Workers pull files to process from a queue directory on shared storage rather than receiving a fixed batch up front,
+so fast workers absorb the tail of the work and the leftovers of a crashed worker are picked up by the others.
+
+The queue directory holds one task file per inbound file, named `<sequence>.<attempt>.task`, in sub-directories:
+* `pending` - tasks waiting to be processed (claimed in sequence order).
+* `claimed` - tasks a worker has taken ownership of.  The modification time is the start of the lease, which the
+  worker renews while it processes the task (see `hold_lease`).
+* `done` - tasks which have been processed.
+* `failed` - tasks whose lease expired `max_attempts` times.
+
+Every state change is a single atomic rename, so only one worker can ever win a task.  A queue belongs to one run,
+and is removed by `remove_queue` once its workers are done.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+PENDING: str = "pending"
+CLAIMED: str = "claimed"
+DONE: str = "done"
+FAILED: str = "failed"
+
+
+def create_queue(queue_dir: Path, files: List[str]) -> None:
+    """
+    Creates a queue holding the provided files.  Files are claimed in the order provided.
+
+    Parameters
+    ----------
+    queue_dir: Path
+        The queue directory (must be on storage shared by all the workers).
+    files: List[str]
+        The file names to enqueue.
+    """
+
+    for state in [PENDING, CLAIMED, DONE, FAILED]:
+        (queue_dir / state).mkdir(parents=True, exist_ok=True)
+
+    for sequence, file in enumerate(files):
+        task_file: Path = queue_dir / PENDING / f"{sequence:08d}.0.task"
+        with open(file=task_file.as_posix(), mode="w", encoding="utf-8") as task:
+            json.dump({"file": file}, task)
+
+
+def claim_task(queue_dir: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Claims the next pending task.
+
+    Parameters
+    ----------
+    queue_dir: Path
+        The queue directory.
+
+    Returns
+    -------
+    claim: Optional[Tuple[Path, str]]
+        A tuple of (claimed task file, file name to process), or None if nothing is pending.
+    """
+
+    for candidate in sorted((queue_dir / PENDING).glob("*.task")):
+        claimed_file: Path = queue_dir / CLAIMED / candidate.name
+        try:
+            # Start the lease before the rename, a rename keeps the modification time of the source.
+            os.utime(candidate)
+            candidate.rename(claimed_file)
+        except FileNotFoundError:
+            # Another worker claimed it first.
+            continue
+
+        with open(file=claimed_file.as_posix(), mode="r", encoding="utf-8") as task:
+            return claimed_file, json.load(task)["file"]
+
+    return None
+
+
+def renew_lease(claimed_file: Path) -> bool:
+    """
+    Restarts the lease of a claimed task.
+
+    Parameters
+    ----------
+    claimed_file: Path
+        The claimed task file returned by `claim_task`.
+
+    Returns
+    -------
+    renewed: bool
+        False if the task is no longer claimed (its lease expired and it was reclaimed).
+    """
+
+    try:
+        os.utime(claimed_file)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+@contextmanager
+def hold_lease(claimed_file: Path, lease_seconds: float) -> Iterator[None]:
+    """
+    Renews the lease of a claimed task in a background thread (three times per lease) while the context is open,
+    so a task which takes longer than `lease_seconds` to process is not reclaimed from a live worker.
+
+    Parameters
+    ----------
+    claimed_file: Path
+        The claimed task file returned by `claim_task`.
+    lease_seconds: float
+        How long a worker may hold a task before it is considered abandoned.
+    """
+
+    stopped: threading.Event = threading.Event()
+
+    def renew() -> None:
+        while not stopped.wait(timeout=lease_seconds / 3):
+            if not renew_lease(claimed_file=claimed_file):
+                return
+
+    renewer: threading.Thread = threading.Thread(target=renew, name=f"lease-{claimed_file.name}", daemon=True)
+    renewer.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        renewer.join()
+
+
+def complete_task(queue_dir: Path, claimed_file: Path) -> bool:
+    """
+    Marks a claimed task as done.
+
+    Parameters
+    ----------
+    queue_dir: Path
+        The queue directory.
+    claimed_file: Path
+        The claimed task file returned by `claim_task`.
+
+    Returns
+    -------
+    completed: bool
+        False if the task was no longer claimed (its lease expired and it was reclaimed by another worker).
+    """
+
+    try:
+        claimed_file.rename(queue_dir / DONE / claimed_file.name)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def reclaim_expired(queue_dir: Path, lease_seconds: float, max_attempts: int = 3) -> int:
+    """
+    Returns claimed tasks whose lease has expired (their worker is assumed to have crashed) to the pending state.
+    Tasks which have expired `max_attempts` times are moved to the failed state instead.
+
+    Parameters
+    ----------
+    queue_dir: Path
+        The queue directory.
+    lease_seconds: float
+        How long a worker may hold a task before it is considered abandoned.
+    max_attempts: int
+        The number of times a task may be claimed before it is considered failed.
+
+    Returns
+    -------
+    count: int
+        The number of tasks returned to the pending state.
+    """
+
+    count: int = 0
+    now: float = time.time()
+
+    for claimed_file in (queue_dir / CLAIMED).glob("*.task"):
+        try:
+            if now - claimed_file.stat().st_mtime < lease_seconds:
+                continue
+
+            (sequence, attempt, _) = claimed_file.name.split(".")
+            attempts: int = int(attempt) + 1
+            if attempts >= max_attempts:
+                claimed_file.rename(queue_dir / FAILED / claimed_file.name)
+            else:
+                claimed_file.rename(queue_dir / PENDING / f"{sequence}.{attempts}.task")
+                count += 1
+        except FileNotFoundError:
+            # Completed, or reclaimed by another worker in the meantime.
+            continue
+
+    return count
+
+
+def drain_queue(queue_dir: Path, lease_seconds: float, poll_interval: float = 5) -> Iterator[str]:
+    """
+    Yields file names from the queue until every task is done (or failed).
+    A task is marked done when the next file is requested, and its lease is renewed until then (see `hold_lease`).
+
+    While other workers still hold claimed tasks this waits (rather than returning), so that the tasks of a worker
+    which crashes are reclaimed and processed once their lease expires.
+
+    Parameters
+    ----------
+    queue_dir: Path
+        The queue directory.
+    lease_seconds: float
+        How long a worker may hold a task before it is considered abandoned.
+    poll_interval: float
+        Seconds between checks while waiting on tasks claimed by other workers.
+
+    Returns
+    -------
+    files: Iterator[str]
+        The file names to process.
+    """
+
+    while True:
+        claim: Optional[Tuple[Path, str]] = claim_task(queue_dir=queue_dir)
+
+        if claim is None:
+            if reclaim_expired(queue_dir=queue_dir, lease_seconds=lease_seconds) > 0:
+                continue
+            if not any((queue_dir / CLAIMED).glob("*.task")):
+                return
+            time.sleep(poll_interval)
+            continue
+
+        (claimed_file, file) = claim
+        with hold_lease(claimed_file=claimed_file, lease_seconds=lease_seconds):
+            yield file
+        if not complete_task(queue_dir=queue_dir, claimed_file=claimed_file):
+            print(f"The lease of {file} expired before it was done, it was reclaimed by another worker")
+
+
+def remove_queue(queue_dir: Path) -> List[str]:
+    """
+    Removes a queue once its workers are done, so its tasks are never seen by a later run.
+
+    Parameters
+    ----------
+    queue_dir: Path
+        The queue directory.
+
+    Returns
+    -------
+    failed: List[str]
+        The file names of the tasks which failed (see `reclaim_expired`).
+    """
+
+    failed: List[str] = []
+    for failed_file in sorted((queue_dir / FAILED).glob("*.task")):
+        with open(file=failed_file.as_posix(), mode="r", encoding="utf-8") as task:
+            failed.append(json.load(task)["file"])
+    shutil.rmtree(queue_dir, ignore_errors=True)
+    return failed
@@ -1,6 +1,10 @@
 """ Worker Helper Functions """
 
-from typing import List
+import heapq
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image
 
 
 def get_batches(batch_size: int, source_list: List[str]) -> List[List[str]]:
@@ -36,3 +40,66 @@ def get_batches(batch_size: int, source_list: List[str]) -> List[List[str]]:
         batches.append(new_batch)
 
     return batches
+
+
+def estimate_cost(file: Path) -> int:
+    """
+    Estimates the relative cost of upscaling an image from its pixel count.
+    Only the image header is read, the pixel data is never decoded.
+
+    Parameters
+    ----------
+    file: Path
+        The image to estimate.
+
+    Returns
+    -------
+    cost: int
+        The number of pixels in the image.  If the header can not be read the file size (in bytes) is used instead.
+    """
+
+    try:
+        with Image.open(file) as image:
+            (width, height) = image.size
+        return width * height
+    except (OSError, ValueError):
+        return file.stat().st_size
+
+
+def plan_batches(costs: Dict[str, int], worker_count: int) -> Tuple[List[List[str]], List[int]]:
+    """
+    Packs files into batches with the longest-processing-time-first (LPT) strategy so that the total cost of each
+    batch is as even as possible.  The most expensive remaining file is always assigned to the least loaded batch.
+
+    Parameters
+    ----------
+    costs: Dict[str, int]
+        A mapping of file name to estimated cost (see `estimate_cost`).
+    worker_count: int
+        The target number of batches (workers).  This value must be greater than zero.
+        Fewer batches are returned when there are fewer files than workers.
+
+    Returns
+    -------
+    plan: Tuple[List[List[str]], List[int]]
+        A tuple of (batches, the total estimated cost of each batch).
+        The predicted makespan of the plan is the largest batch cost.
+    """
+
+    if worker_count < 1:
+        raise ValueError(f"Worker count must be greater than zero.  Saw: ({worker_count})")
+
+    batch_count: int = min(worker_count, len(costs))
+    batches: List[List[str]] = [[] for _ in range(batch_count)]
+    heap: List[Tuple[int, int]] = [(0, index) for index in range(batch_count)]
+
+    for name, cost in sorted(costs.items(), key=lambda item: item[1], reverse=True):
+        (load, index) = heapq.heappop(heap)
+        batches[index].append(name)
+        heapq.heappush(heap, (load + cost, index))
+
+    batch_costs: List[int] = [0] * batch_count
+    for load, index in heap:
+        batch_costs[index] = load
+
+    return batches, batch_costs
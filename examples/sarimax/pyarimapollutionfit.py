@@ -23,9 +23,9 @@ from pmdarima.metrics import smape
 import mlflow.pmdarima
 from mlflow.models import infer_signature, Model, ModelSignature
 
+from sarimax_tracking import ARTIFACT_PATH, LAST_OBSERVATION_TAG, MODE_TAG, SERIES_TAG
+
 
-# Directory where mlflow artifacts will be stored.
-ARTIFACT_PATH = "pmdarimafit"
 polldata = pd.read_csv("/Users/stephenweller/Downloads/LSTM-Multivariate_pollution.csv")
 
 # Split data into training and test datasets, with 80% used for training.
@@ -119,6 +119,9 @@ mlflow.pmdarima.log_model(
 
 mlflow.log_params(parameters)
 mlflow.log_metrics(metrics)
+# Tag the run so that sarimax_update.py can bring this model up to date with the observations after the training data
+# (the first update scores the baseline forecast error which later updates are measured against).
+mlflow.set_tags({SERIES_TAG: 'pollution', LAST_OBSERVATION_TAG: polltrain['date'].iloc[-1].isoformat(), MODE_TAG: 'fit'})
 model_uri = mlflow.get_artifact_uri(ARTIFACT_PATH)
 
 print(f"Model artifact logged to: {model_uri}")
@@ -0,0 +1,215 @@
+# Fit a seasonal ARIMA model to each of many time series (e.g. one per pollution sensor) in parallel.
+#
+# The series come in one long-format frame, a row per (series, time).  Each series is fitted with its own
+# pmda.auto_arima stepwise search in a process pool, under a per-series timeout, and logged as a run nested under
+# one parent batch run, which records the throughput in series per minute.
+#
+#   python sarimax_batch.py --data sensors.csv --series-column sensor_id --workers 8 --timeout 600
+#
+# Without a series column, the Beijing pollution history is cut into windows as stand-in series:
+#
+#   python sarimax_batch.py --data data/LSTM-Multivariate_pollution.csv --window-days 60
+
+import argparse
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+
+import mlflow
+import mlflow.pmdarima
+import numpy as np
+import pandas as pd
+import pmdarima as pmda
+from mlflow.models import infer_signature
+from pmdarima.metrics import smape
+from sklearn.metrics import mean_squared_error
+from threadpoolctl import threadpool_limits
+
+from sarimax_tracking import ARTIFACT_PATH, AUTO_ARIMA_PARAMS
+
+
+@dataclass
+class SeriesFit:
+    series_id: str
+    observations: int
+    run_id: Optional[str] = None
+    order: Optional[tuple] = None
+    seasonal_order: Optional[tuple] = None
+    metrics: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchFit:
+    parent_run_id: str
+    fits: list
+    seconds: float
+
+    @property
+    def failed(self) -> list:
+        return [fit for fit in self.fits if fit.error is not None]
+
+    @property
+    def series_per_minute(self) -> float:
+        # Only fitted series count, failed and timed out series are reported by failed.
+        return 60 * (len(self.fits) - len(self.failed)) / self.seconds if self.seconds else 0.0
+
+
+class SeriesTimeout(BaseException):
+    # Not an Exception, so the error_action of auto_arima does not swallow it.
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise SeriesTimeout()
+
+
+def _init_worker(tracking_uri: str, parent_run_id: str, threads_per_worker: int) -> None:
+    # Keep the workers from each starting a BLAS thread per core.
+    threadpool_limits(limits=threads_per_worker)
+
+    # Make the batch run the active run of this process, so the series runs are nested under it.
+    # It is never ended here, fit_many ends it once every series is fitted.
+    mlflow.set_tracking_uri(tracking_uri)
+    active_run = mlflow.active_run()
+    if active_run is None or active_run.info.run_id != parent_run_id:
+        # (A forked worker inherits the active run of the parent process.)
+        mlflow.start_run(run_id=parent_run_id, nested=active_run is not None)
+
+
+def fit_series(series_id: str, y: pd.Series, X: Optional[pd.DataFrame], test_size: float = 0.2,
+               timeout: Optional[float] = None, auto_arima_params: Optional[dict] = None) -> SeriesFit:
+    """
+    Fits one series with auto_arima on its first (1 - test_size) observations, scores the forecast of the rest, and
+    logs the model as a nested run.  A fit which runs past timeout seconds is stopped (on platforms with SIGALRM) and
+    its run is marked failed.
+    """
+    fit = SeriesFit(series_id=str(series_id), observations=len(y))
+    trainobs = int(len(y) * (1 - test_size))
+    ytrain, ytest = y.iloc[:trainobs], y.iloc[trainobs:]
+    Xtrain, Xtest = (X.iloc[:trainobs], X.iloc[trainobs:]) if X is not None else (None, None)
+
+    start = time.perf_counter()
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    try:
+        with mlflow.start_run(run_name=str(series_id), nested=True) as run:
+            fit.run_id = run.info.run_id
+            mlflow.set_tag('series_id', str(series_id))
+            if use_alarm:
+                signal.signal(signal.SIGALRM, _raise_timeout)
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            try:
+                arima = pmda.auto_arima(ytrain, X=Xtrain, **{**AUTO_ARIMA_PARAMS, **(auto_arima_params or {})})
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+
+            fc = arima.predict(n_periods=len(ytest), X=Xtest)
+            fit.order, fit.seasonal_order = arima.order, arima.seasonal_order
+            fit.metrics = {x: getattr(arima, x)() for x in ["aicc", "aic", "bic", "hqic"]}
+            if len(ytest):
+                fit.metrics.update(mse=mean_squared_error(ytest, fc), smape=smape(ytest, fc))
+            fit.seconds = time.perf_counter() - start
+            fit.metrics['fit_seconds'] = fit.seconds
+
+            mlflow.log_params({'order': fit.order, 'seasonal_order': fit.seasonal_order, 'observations': len(y)})
+            mlflow.log_metrics(fit.metrics)
+            mlflow.pmdarima.log_model(pmdarima_model=arima, artifact_path=ARTIFACT_PATH,
+                                      signature=infer_signature(ytrain.to_frame() if Xtrain is None else Xtrain, fc))
+    except SeriesTimeout:
+        fit.error = 'Timed out after {}s'.format(timeout)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        fit.error = repr(error)
+    fit.seconds = time.perf_counter() - start
+    if fit.error is not None and fit.run_id is not None:
+        mlflow.MlflowClient().set_tag(fit.run_id, 'error', fit.error)
+    return fit
+
+
+def fit_many(df: pd.DataFrame, series_column: str = 'series_id', time_column: str = 'date',
+             target_column: str = 'pollution', exog_columns: Optional[list] = None, test_size: float = 0.2,
+             timeout: Optional[float] = 600, max_workers: Optional[int] = None,
+             auto_arima_params: Optional[dict] = None, run_name: str = 'sarimax-batch') -> BatchFit:
+    """
+    Fits every series of a long-format frame across a process pool (see fit_series), each as a run nested under a
+    parent batch run.  The exogenous columns default to every other numeric column.
+    """
+    if exog_columns is None:
+        exog_columns = [column for column in df.select_dtypes(include=[np.number]).columns
+                        if column not in (series_column, time_column, target_column)]
+
+    max_workers = max_workers if max_workers else os.cpu_count() or 1
+    threads_per_worker = max(1, (os.cpu_count() or 1) // max_workers)
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+
+    fits = []
+    start = time.perf_counter()
+    with mlflow.start_run(run_name=run_name, nested=True) as parent_run:
+        mlflow.log_params({'series': df[series_column].nunique(), 'max_workers': max_workers, 'timeout': timeout,
+                           'exog_columns': ', '.join(exog_columns)})
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(mlflow.get_tracking_uri(), parent_run.info.run_id,
+                                           threads_per_worker)) as executor:
+            futures = {}
+            for series_id, series in df.groupby(series_column, sort=False):
+                series = series.sort_values(time_column)
+                future = executor.submit(fit_series, series_id, series[target_column].reset_index(drop=True),
+                                         series[exog_columns].reset_index(drop=True) if exog_columns else None,
+                                         test_size=test_size, timeout=timeout, auto_arima_params=auto_arima_params)
+                futures[future] = (str(series_id), len(series))
+            for future in as_completed(futures):
+                try:
+                    fits.append(future.result())
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    series_id, observations = futures[future]
+                    fits.append(SeriesFit(series_id=series_id, observations=observations, error=repr(error)))
+
+        result = BatchFit(parent_run_id=parent_run.info.run_id, fits=fits, seconds=time.perf_counter() - start)
+        mlflow.log_metrics({'series_per_minute': result.series_per_minute, 'batch_seconds': result.seconds,
+                            'failed_series': len(result.failed)})
+        mlflow.log_table(data=pd.DataFrame([{'series_id': fit.series_id, 'run_id': fit.run_id,
+                                             'observations': fit.observations, 'order': str(fit.order),
+                                             'seasonal_order': str(fit.seasonal_order), 'seconds': fit.seconds,
+                                             'error': fit.error, **fit.metrics} for fit in fits]),
+                         artifact_file='series.json')
+    return result
+
+
+def window_series(df: pd.DataFrame, window: int, series_column: str = 'series_id') -> pd.DataFrame:
+    """
+    Cuts one series into consecutive windows of window observations, as stand-in series of a long-format frame.
+    """
+    df = df.iloc[:len(df) - len(df) % window].copy()
+    df[series_column] = ['window-{:04d}'.format(i) for i in np.arange(len(df)) // window]
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit a SARIMAX model per series of a long-format CSV file')
+    parser.add_argument('--data', type=str, default='data/LSTM-Multivariate_pollution.csv')
+    parser.add_argument('--series-column', type=str, default='series_id')
+    parser.add_argument('--time-column', type=str, default='date')
+    parser.add_argument('--target-column', type=str, default='pollution')
+    parser.add_argument('--window-days', type=int, default=60,
+                        help='Without a series column, the hourly series is cut into windows of this many days.')
+    parser.add_argument('--workers', type=int, default=None, help='The number of series to fit at once.')
+    parser.add_argument('--timeout', type=float, default=600, help='The seconds each series may take to fit.')
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, parse_dates=[args.time_column])
+    if args.series_column not in data.columns:
+        data = window_series(data, window=args.window_days * 24, series_column=args.series_column)
+
+    batch = fit_many(data, series_column=args.series_column, time_column=args.time_column,
+                     target_column=args.target_column, timeout=args.timeout, max_workers=args.workers)
+    print("Fitted {} of {} series in {:.1f}s ({:.1f} series per minute), {} failed".format(
+        len(batch.fits) - len(batch.failed), len(batch.fits), batch.seconds, batch.series_per_minute,
+        len(batch.failed)))
+    for fit in batch.failed:
+        print("  {}: {}".format(fit.series_id, fit.error))
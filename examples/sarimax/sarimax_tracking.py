@@ -0,0 +1,22 @@
+# The names which the SARIMAX scripts share in their MLflow runs.
+
+# Directory where mlflow artifacts will be stored.
+ARTIFACT_PATH = "pmdarimafit"
+
+# The auto_arima search of pyarimapollutionfit.py, a seasonal period of 24 hourly observations.
+AUTO_ARIMA_PARAMS = dict(d=2, start_P=1, start_q=1, max_p=3, max_q=3, m=24, error_action='ignore', trace=False,
+                         suppress_warnings=True, maxiter=500, test='adf', stationary=True, seasonal=True,
+                         stepwise=True)
+
+# The tags which tie the runs of a series together (see sarimax_update.py).
+SERIES_TAG = 'sarimax.series'
+LAST_OBSERVATION_TAG = 'sarimax.last_observation'
+MODE_TAG = 'sarimax.mode'
+PREVIOUS_RUN_TAG = 'sarimax.previous_run_id'
+HORIZON_TAG = 'sarimax.horizon'
+
+# The forecast SMAPE of the last full fit, over forecasts of HORIZON_TAG observations, which drift is measured against.
+BASELINE_METRIC = 'baseline_smape'
+
+# The seconds of the last full fit, which the cost of an update is measured against.
+FIT_SECONDS_METRIC = 'fit_seconds'
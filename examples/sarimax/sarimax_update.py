@@ -0,0 +1,160 @@
+# Bring the last logged pollution SARIMAX model up to date with new observations, rather than refitting it.
+#
+# The model of the last run of the series is loaded, and the observations after the last one it holds are forecast
+# horizon observations (e.g. a day) at a time, each forecast made from the model extended with the observations before
+# it.  The model is extended with its parameters fixed (the statsmodels results extend), so only the new observations
+# are filtered, and the logged model only carries them rather than the whole history.
+# While the forecast error (SMAPE) stays within drift_threshold times the baseline, the error of the last full fit
+# scored the same way, the extended model is logged.  Past the threshold, the orders are searched again with auto_arima
+# on the history and the new observations but the last horizon, which then score the new baseline (observations the
+# refitted model has not absorbed) and extend the new model.
+# Either way the model is logged as a new run, tagged with the last observation it holds.
+#
+#   python sarimax_update.py --data data/LSTM-Multivariate_pollution.csv --horizon 24 --drift-threshold 1.5
+
+import argparse
+import time
+from typing import Optional
+
+import mlflow
+import mlflow.pmdarima
+import numpy as np
+import pandas as pd
+import pmdarima as pmda
+from mlflow.models import infer_signature
+from pmdarima.metrics import smape
+
+from sarimax_tracking import (ARTIFACT_PATH, AUTO_ARIMA_PARAMS, BASELINE_METRIC, FIT_SECONDS_METRIC, HORIZON_TAG,
+                              LAST_OBSERVATION_TAG, MODE_TAG, PREVIOUS_RUN_TAG, SERIES_TAG)
+
+
+def last_run(series: str) -> Optional[mlflow.entities.Run]:
+    """
+    The most recent run of the current experiment which logged a model of the series, if any.
+    """
+    runs = mlflow.search_runs(
+        filter_string="tags.`{}` = '{}' and attributes.status = 'FINISHED'".format(SERIES_TAG, series),
+        order_by=['attributes.start_time DESC'],
+        max_results=1,
+        output_format='list',
+    )
+    return runs[0] if runs else None
+
+
+def extend_and_score(arima, y: pd.Series, X: Optional[pd.DataFrame], horizon: int) -> float:
+    """
+    Forecasts y horizon observations at a time, extending the model (with its parameters fixed) with each window of
+    observations once it is scored, and returns the mean SMAPE of the forecasts.  Only the new observations are
+    filtered, and the model's results then only hold the last window (its state carries the history).
+    """
+    errors = []
+    for offset in range(0, len(y), horizon):
+        window_y = y.iloc[offset:offset + horizon]
+        window_X = X.iloc[offset:offset + horizon] if X is not None else None
+        fc = arima.predict(n_periods=len(window_y), X=window_X)
+        errors.append(smape(window_y, fc))
+        arima.arima_res_ = arima.arima_res_.extend(np.asarray(window_y),
+                                                   exog=np.asarray(window_X) if window_X is not None else None)
+    return float(np.mean(errors)) if errors else np.nan
+
+
+def log_series_model(arima, series: str, mode: str, last_observation: pd.Timestamp, horizon: int,
+                     X: Optional[pd.DataFrame], metrics: dict, previous_run_id: Optional[str] = None) -> str:
+    """
+    Logs the model of the series, and the tags which the next update reads, to the active run.
+    """
+    mlflow.set_tags({SERIES_TAG: series, LAST_OBSERVATION_TAG: pd.Timestamp(last_observation).isoformat(),
+                     MODE_TAG: mode, HORIZON_TAG: horizon,
+                     **({PREVIOUS_RUN_TAG: previous_run_id} if previous_run_id else {})})
+    mlflow.log_params({'order': arima.order, 'seasonal_order': arima.seasonal_order})
+    mlflow.log_metrics(metrics)
+    signature = None
+    if X is not None:
+        signature = infer_signature(X, arima.predict(n_periods=len(X), X=X))
+    mlflow.pmdarima.log_model(pmdarima_model=arima, artifact_path=ARTIFACT_PATH, signature=signature)
+    return mlflow.active_run().info.run_id
+
+
+def update_model(data: pd.DataFrame, series: str = 'pollution', time_column: str = 'date',
+                 exog_columns: Optional[list] = None, horizon: int = 24, drift_threshold: float = 1.5,
+                 test_size: float = 0.2, auto_arima_params: Optional[dict] = None) -> dict:
+    """
+    Extends the last logged model of the series with the rows of data after its last observation, or refits it with a
+    full order search when its forecast error on those rows exceeds drift_threshold times the baseline SMAPE.
+    A refit is fitted on every row but the last horizon, whose SMAPE is the new baseline.
+    Both errors are the mean SMAPE of forecasts of horizon observations (see extend_and_score), the horizon of the
+    baseline is kept with the model.  With no model logged yet, the first fit scores the last test_size of the rows
+    for the baseline, and with a model but no baseline (e.g. from pyarimapollutionfit.py) the update sets it.
+    The cost of an update is logged against the seconds of the last full fit.  Returns a summary of the run.
+    """
+    if exog_columns is None:
+        exog_columns = [column for column in data.select_dtypes(include=[np.number]).columns if column != series]
+    data = data.sort_values(time_column).reset_index(drop=True)
+    params = {**AUTO_ARIMA_PARAMS, **(auto_arima_params or {})}
+
+    previous = last_run(series)
+    if previous is None:
+        # Fit from scratch, and score the last rows for the baseline.
+        history = data.iloc[:int(len(data) * (1 - test_size))]
+        new = data.iloc[len(history):]
+    else:
+        last_observation = pd.Timestamp(previous.data.tags[LAST_OBSERVATION_TAG])
+        history = data[data[time_column] <= last_observation]
+        new = data[data[time_column] > last_observation]
+        if new.empty:
+            return dict(mode='unchanged', run_id=previous.info.run_id, last_observation=last_observation,
+                        observations_added=0)
+        horizon = int(previous.data.tags.get(HORIZON_TAG, horizon))
+
+    start = time.perf_counter()
+    with mlflow.start_run(run_name='{}-update'.format(series), nested=True):
+        metrics = {'observations_added': len(new)}
+        mode = 'fit'
+        if previous is not None:
+            # Score the model on the new observations before it is extended with each of them.
+            arima = mlflow.pmdarima.load_model('runs:/{}/{}'.format(previous.info.run_id, ARTIFACT_PATH))
+            metrics['smape'] = extend_and_score(arima, new[series], new[exog_columns], horizon)
+            baseline = previous.data.metrics.get(BASELINE_METRIC)
+            metrics['drift'] = metrics['smape'] / baseline if baseline else 1.0
+            metrics[BASELINE_METRIC] = baseline if baseline else metrics['smape']
+            mode = 'update' if metrics['drift'] <= drift_threshold else 'refit'
+
+        if mode != 'update':
+            # Search the orders again on every observation but the held out ones (the new observations of a first
+            # fit, the last horizon of them on a refit, so it is fitted on the regime which drifted), and score the
+            # held out observations, which the model has not absorbed yet, for the baseline.
+            observed = pd.concat([history, new])
+            holdout = len(new) if mode == 'fit' else min(horizon, len(new))
+            train, test = observed.iloc[:-holdout], observed.iloc[-holdout:]
+            fit_start = time.perf_counter()
+            arima = pmda.auto_arima(train[series], X=train[exog_columns], **params)
+            metrics[BASELINE_METRIC] = extend_and_score(arima, test[series], test[exog_columns], horizon)
+            metrics[FIT_SECONDS_METRIC] = time.perf_counter() - fit_start
+        else:
+            fit_seconds = previous.data.metrics.get(FIT_SECONDS_METRIC)
+            if fit_seconds:
+                metrics[FIT_SECONDS_METRIC] = fit_seconds
+                metrics['update_cost_ratio'] = (time.perf_counter() - start) / fit_seconds
+
+        metrics['seconds'] = time.perf_counter() - start
+        run_id = log_series_model(arima, series, mode, new[time_column].iloc[-1], horizon,
+                                  new[exog_columns].iloc[:horizon], metrics,
+                                  previous.info.run_id if previous is not None else None)
+    return dict(mode=mode, run_id=run_id, last_observation=new[time_column].iloc[-1], **metrics)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Update the last logged SARIMAX model with new observations')
+    parser.add_argument('--data', type=str, default='data/LSTM-Multivariate_pollution.csv')
+    parser.add_argument('--series', type=str, default='pollution', help='The column of the series.')
+    parser.add_argument('--time-column', type=str, default='date')
+    parser.add_argument('--horizon', type=int, default=24,
+                        help='The observations forecast at a time when scoring a new model (a day of hourly data).')
+    parser.add_argument('--drift-threshold', type=float, default=1.5,
+                        help='The ratio of the new SMAPE to the baseline SMAPE past which the orders are searched again.')
+    args = parser.parse_args()
+
+    polldata = pd.read_csv(args.data, parse_dates=[args.time_column])
+    result = update_model(polldata, series=args.series, time_column=args.time_column, horizon=args.horizon,
+                          drift_threshold=args.drift_threshold)
+    print(result)
@@ -22,7 +22,7 @@ import logging
 import math
 import uuid
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 import click
 import mlflow
@@ -30,6 +30,7 @@ import mlflow
 from mlflow_adsp import Job, Scheduler, Step, create_unique_name
 
 from ..utils.environment_utils import init
+from ..utils.request_queue import enqueue_request, remove_queue
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,10 +48,26 @@ logger = logging.getLogger(__name__)
 @click.option("--num-steps", type=click.INT, default=50, help="The number of generation steps.")
 @click.option("--image-width", type=click.INT, default=512, help="Image Width")
 @click.option("--image-height", type=click.INT, default=512, help="Image Height")
+@click.option(
+    "--precision",
+    type=click.Choice(["float32", "mixed_float16"]),
+    default="float32",
+    help="The keras mixed precision policy to generate with.",
+)
 @click.option(
     "--run-name", type=click.STRING, default="workflow-stable-diffusion-parallel", help="The name of the run."
 )
 @click.option("--backend", type=click.STRING, default="local", help="The backend to use for workers.")
+@click.option(
+    "--worker-mode",
+    type=click.Choice(["per-request", "persistent"]),
+    default="per-request",
+    help="Launch one worker per batch (per-request), or long-lived workers which pull batches from a queue.",
+)
+@click.option(
+    "--persistent-worker-count", type=click.INT, default=1, help="Number of workers to launch in persistent mode."
+)
+# pylint: disable=too-many-locals
 def main(
     prompt: str,
     data_base_dir: str,
@@ -59,8 +76,11 @@ def main(
     num_steps: int,
     image_width: int,
     image_height: int,
+    precision: str,
     run_name: str,
     backend: str,
+    worker_mode: str,
+    persistent_worker_count: int,
 ) -> None:
     """
     Workflow Entry Point
@@ -86,12 +106,24 @@ def main(
     image_height: int
         Default: 512
         Image Height
+    precision: str
+        Default: `float32`
+        The keras mixed precision policy to generate with.
     run_name: str
         Default: `workflow-step-process-data`
         The name of the run.
     backend: str
         Default: `local`
         The backend to use for workers.
+    worker_mode: str
+        Default: `per-request`
+        `per-request` launches one `process_data` worker per batch, each building its own model.
+        `persistent` queues the batches under `<data_base_dir>/queue/<run_id>` and launches `persistent_worker_count`
+        `process_queue` workers which keep their models loaded between batches.  The queue is removed once the
+        workers are done.
+    persistent_worker_count: int
+        Default: 1
+        Number of workers to launch in persistent mode.
     """
 
     init()
@@ -113,7 +145,9 @@ def main(
         logger.info(f"num_steps: {num_steps}")
         logger.info(f"image_width={image_width}")
         logger.info(f"image_height={image_height}")
+        logger.info(f"precision={precision}")
         logger.info(f"backend={backend}")
+        logger.info(f"worker_mode={worker_mode}")
 
         run_id: str = run.info.run_id
         logger.info(f"run_id: {run_id}")
@@ -148,29 +182,52 @@ def main(
         logger.info(f"number of workers: {worker_count}")
 
         # build requests
+        request: Dict = {
+            "request_id": request_id,
+            "data_base_dir": data_base_dir,
+            "batch_size": per_worker_batch_size,
+            "image_width": image_width,
+            "image_height": image_height,
+            "num_steps": num_steps,
+            "precision": precision,
+        }
 
         steps: List[Step] = []
-        for _ in range(worker_count):
-            step: Step = Step(
-                entry_point="process_data",
-                parameters={
-                    "request_id": request_id,
-                    "data_base_dir": data_base_dir,
-                    "batch_size": per_worker_batch_size,
-                    "image_width": image_width,
-                    "image_height": image_height,
-                    "num_steps": num_steps,
-                },
-                run_name=create_unique_name(name="workflow-step-process-data"),
-                backend=backend,
-                backend_config={"resource_profile": "large"},
-                synchronous=backend == "local",  # Force to serial processing if running locally.
-            )
-            steps.append(step)
+        if worker_mode == "persistent":
+            # Each run has its own queue, so requests left over from another run are never processed.
+            queue_dir: str = (Path(data_base_dir) / "queue" / run_id).as_posix()
+            for _ in range(worker_count):
+                enqueue_request(queue_dir=queue_dir, request=request)
+
+            for _ in range(min(persistent_worker_count, worker_count)):
+                step: Step = Step(
+                    entry_point="process_queue",
+                    parameters={"queue_dir": queue_dir},
+                    run_name=create_unique_name(name="workflow-step-process-queue"),
+                    backend=backend,
+                    backend_config={"resource_profile": "large"},
+                    synchronous=backend == "local",  # Force to serial processing if running locally.
+                )
+                steps.append(step)
+        else:
+            for _ in range(worker_count):
+                step: Step = Step(
+                    entry_point="process_data",
+                    parameters=request,
+                    run_name=create_unique_name(name="workflow-step-process-data"),
+                    backend=backend,
+                    backend_config={"resource_profile": "large"},
+                    synchronous=backend == "local",  # Force to serial processing if running locally.
+                )
+                steps.append(step)
 
         # submit steps
         logger.info("starting workers")
         adsp_jobs: List[Job] = Scheduler().process_work_queue(steps=steps)
+        if worker_mode == "persistent":
+            failed_requests: List[Dict] = remove_queue(queue_dir=queue_dir)
+            logger.info(f"requests which failed in the queue: {len(failed_requests)}")
+            mlflow.log_metric(key="queue_failed_requests", value=len(failed_requests))
 
         logger.info("Step execution completed")
         for job in adsp_jobs:
@@ -22,16 +22,19 @@ Note:
 """
 
 import logging
+import time
 import warnings
 from pathlib import Path
+from typing import Optional
 
 import click
 import mlflow
 
 from mlflow_adsp import create_unique_name
 
+from ..utils.batch_logger import BatchLogger
+from ..utils.environment_cache import build_worker_environment, get_built_spec_hash, get_environment_spec_hash
 from ..utils.environment_utils import init
-from ..utils.process import process_launch_wait
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -54,11 +57,18 @@ logger = logging.getLogger(__name__)
         "We only pack when we are targeting the `adsp` backend, all others are skipped."
     ),
 )
+@click.option(
+    "--unpack-workers", type=click.INT, default=8, help="The number of threads to extract the packed environment with."
+)
 @click.command(help="Workflow Step [Prepare Runtime Environment]")
-def prepare_worker_environment(worker_env_name: str, data_dir: str, run_name: str, backend: str) -> None:
+def prepare_worker_environment(
+    worker_env_name: str, data_dir: str, run_name: str, backend: str, unpack_workers: int
+) -> None:
     """
     Runs the worker bootstrap within a mlflow job.
-    If the worker environment has previously been created within the shared location it will NOT be recreated.
+    If the worker environment within the shared location was built from the current (resolved) environment
+    specification it will NOT be recreated.  Packed environments are cached by specification
+    (`<data_dir>/<worker_env_name>_cache`), so returning to a previous specification only requires an unpack.
 
     Parameters
     ----------
@@ -71,18 +81,40 @@ def prepare_worker_environment(worker_env_name: str, data_dir: str, run_name: st
     backend: str
         The backend type for run context.
         We only pack when we are targeting the `adsp` backend, all others are skipped.
+    unpack_workers: int
+        The number of threads to extract the packed environment with.
     """
 
     init()
     warnings.filterwarnings("ignore")
 
-    with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)):
-        if backend == "adsp" and not (Path(data_dir) / worker_env_name).exists():
-            # Pack Worker Runtime Environment
-            cmd: str = "anaconda-project run bootstrap"
-            process_launch_wait(shell_out_cmd=cmd)
-        else:
-            logger.info("Skipping worker environment preparation, either wrong backend or already complete")
+    with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)), BatchLogger() as batch_logger:
+        if backend != "adsp":
+            logger.info("Skipping worker environment preparation, wrong backend")
+            return
+
+        worker_env: Path = Path(data_dir) / worker_env_name
+        spec_hash: str = get_environment_spec_hash()
+        built_spec_hash: Optional[str] = get_built_spec_hash(worker_env=worker_env)
+        batch_logger.log_param(key="environment_spec_hash", value=spec_hash)
+
+        if built_spec_hash == spec_hash:
+            logger.info("Skipping worker environment preparation, already built from the current environment")
+            batch_logger.log_metric(key="environment_stale", value=0)
+            return
+
+        logger.info("Worker environment is stale (%s != %s), rebuilding", built_spec_hash, spec_hash)
+        batch_logger.log_metric(key="environment_stale", value=1)
+        start: float = time.perf_counter()
+
+        hit: bool = build_worker_environment(
+            cache_dir=Path(data_dir) / f"{worker_env_name}_cache",
+            worker_env=worker_env,
+            spec_hash=spec_hash,
+            workers=unpack_workers,
+        )
+        batch_logger.log_metric(key="environment_cache_hit", value=int(hit))
+        batch_logger.log_metric(key="environment_build_seconds", value=time.perf_counter() - start)
 
 
 if __name__ == "__main__":
@@ -18,23 +18,15 @@ Note:
     If run stand alone (just the step) the run will report to a new job,
     rather than under a parent job (since one does not exist).
 """
-import secrets
-import sys
-import uuid
 import warnings
-from pathlib import Path
-from typing import List
 
 import click
-import keras_cv
 import mlflow
-import numpy
-from keras_cv.models.stable_diffusion.stable_diffusion import StableDiffusion
-from PIL import Image
 
 from mlflow_adsp import create_unique_name
 
 from ..utils.environment_utils import init
+from ..utils.generation import process_request
 
 
 @click.command(help="Workflow Step [Process Data]")
@@ -46,6 +38,12 @@ from ..utils.environment_utils import init
 @click.option("--num-steps", type=click.INT, default=50, help="The number of generation steps.")
 @click.option("--image-width", type=click.INT, default=512, help="Image Width")
 @click.option("--image-height", type=click.INT, default=512, help="Image Height")
+@click.option(
+    "--precision",
+    type=click.Choice(["float32", "mixed_float16"]),
+    default="float32",
+    help="The keras mixed precision policy to generate with.",
+)
 @click.option(
     "--run-name",
     type=click.STRING,
@@ -59,6 +57,7 @@ def process_data(
     num_steps: int,
     image_width: int,
     image_height: int,
+    precision: str,
     run_name: str,
 ) -> None:
     """
@@ -84,40 +83,24 @@ def process_data(
         Image Height
     num_steps: int:
         The number of generation steps.
+    precision: str
+        Default: `float32`
+        The keras mixed precision policy to generate with.
     """
 
     init()
     warnings.filterwarnings("ignore")
 
     with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)):
-        seed: int = secrets.randbelow(sys.maxsize)
-
-        mlflow.log_param(key="request_id", value=request_id)
-        mlflow.log_param(key="data_base_dir", value=data_base_dir)
-        mlflow.log_param(key="batch_size", value=batch_size)
-        mlflow.log_param(key="image_width", value=image_width)
-        mlflow.log_param(key="image_height", value=image_height)
-        mlflow.log_param(key="num_steps", value=num_steps)
-        mlflow.log_param(key="seed", value=seed)
-
-        request_base: Path = Path(".") / data_base_dir / request_id
-
-        request_output: Path = request_base / "output"
-        request_output.mkdir(parents=True, exist_ok=True)
-
-        prompt_file: str = (request_base / "prompt.txt").as_posix()
-        with open(file=prompt_file, mode="r", encoding="utf-8") as file:
-            prompt: str = file.read()
-        mlflow.log_text(text=prompt, artifact_file="prompt.txt")
-
-        model: StableDiffusion = keras_cv.models.StableDiffusion(
-            img_width=image_width, img_height=image_height, jit_compile=True
+        process_request(
+            request_id=request_id,
+            data_base_dir=data_base_dir,
+            batch_size=batch_size,
+            num_steps=num_steps,
+            image_width=image_width,
+            image_height=image_height,
+            precision=precision,
         )
-        arrays: List[numpy.ndarray] = model.text_to_image(prompt, batch_size=batch_size, num_steps=num_steps, seed=seed)
-        for array in arrays:
-            image: Image = Image.fromarray(array)
-            filename: str = f"{str(uuid.uuid4())}.png"
-            mlflow.log_image(image=image, artifact_file=filename)
 
 
 if __name__ == "__main__":
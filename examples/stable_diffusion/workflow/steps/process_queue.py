@@ -0,0 +1,137 @@
+"""
+Workflow Step [Process Queue] Definition
+
+A persistent worker which keeps its Stable Diffusion models loaded and processes requests from a local queue
+directory until the queue is empty (or has been idle for `--idle-timeout` seconds).  The lease of the request being
+processed is renewed while it generates, and the requests of a worker which crashed are reclaimed once their lease
+(`--lease-seconds`) expires, so the worker waits on requests other workers hold before exiting.
+
+This step can be invoked in three different ways:
+1. Python module invocation:
+`python -m workflow.steps.process_queue`
+When invoked this way the click defaults are used.
+
+2. MLFlow CLI:
+`mlflow run . -e process_queue`
+When invoked this way the MLproject default parameters are used
+
+3. Workflow (or other code)
+The function and its set up can be called from other code.
+The `main` step does this in the workflow definition when `--worker-mode persistent` is used.
+
+Note:
+    If run stand alone (just the step) the run will report to a new job,
+    rather than under a parent job (since one does not exist).
+"""
+
+import logging
+import time
+import warnings
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import click
+import mlflow
+
+from mlflow_adsp import create_unique_name
+
+from ..utils.artifact_uploader import ArtifactUploader
+from ..utils.environment_utils import init
+from ..utils.generation import process_request
+from ..utils.request_queue import claim_request, complete_request, has_claimed, hold_lease, reclaim_expired
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@click.command(help="Workflow Step [Process Queue]")
+@click.option("--queue-dir", type=click.STRING, default="data/queue", help="The request queue directory.")
+@click.option(
+    "--idle-timeout",
+    type=click.FLOAT,
+    default=0,
+    help="Seconds to wait for new requests once the queue is empty before exiting.",
+)
+@click.option("--poll-interval", type=click.FLOAT, default=1, help="Seconds between polls of an empty queue.")
+@click.option(
+    "--lease-seconds",
+    type=click.FLOAT,
+    default=600,
+    help="How long a claimed request may go unrenewed before another worker reclaims it.",
+)
+@click.option(
+    "--run-name",
+    type=click.STRING,
+    default="workflow-step-process-queue",
+    help="The base name of the run (for reporting to MLFlow).",
+)
+def process_queue(
+    queue_dir: str, idle_timeout: float, poll_interval: float, lease_seconds: float, run_name: str
+) -> None:
+    """
+    Runs the Workflow Step [Process Queue]
+
+    Parameters
+    ----------
+    queue_dir: str
+        Default: `data/queue`
+        The request queue directory.
+    idle_timeout: float
+        Default: 0
+        Seconds to wait for new requests once the queue is empty before exiting.
+    poll_interval: float
+        Default: 1
+        Seconds between polls of an empty queue.
+    lease_seconds: float
+        Default: 600
+        How long a claimed request may go unrenewed (its worker is assumed to have crashed) before another worker
+        reclaims it.  Leases are renewed while a request generates, so this need not cover the generation time.
+    run_name: str
+        The base name of the run (for reporting to MLFlow).
+    """
+
+    init()
+    warnings.filterwarnings("ignore")
+
+    with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)):
+        mlflow.log_params({"queue_dir": queue_dir, "lease_seconds": lease_seconds})
+
+        processed_count: int = 0
+        idle_since: float = time.monotonic()
+
+        # Images upload in the background while the next request generates, and are drained whenever the queue is
+        # empty (and on exit).  A request is marked complete once generated, its images may still be uploading.
+        with ArtifactUploader() as uploader:
+            while True:
+                claim: Optional[Tuple[Path, Dict]] = claim_request(queue_dir=queue_dir)
+
+                if claim is None:
+                    uploader.drain()
+                    if reclaim_expired(queue_dir=queue_dir, lease_seconds=lease_seconds) > 0:
+                        continue
+                    if time.monotonic() - idle_since >= idle_timeout and not has_claimed(queue_dir=queue_dir):
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                claimed_file, request = claim
+                logger.info(f"processing request: {request}")
+
+                # Each request reports to its own child run, as it would when run by `process_data`.
+                with (
+                    hold_lease(claimed_file=claimed_file, lease_seconds=lease_seconds),
+                    mlflow.start_run(nested=True, run_name=create_unique_name(name="workflow-step-process-data")),
+                ):
+                    process_request(**request, uploader=uploader)
+
+                if not complete_request(queue_dir=queue_dir, claimed_file=claimed_file):
+                    logger.warning(f"the lease of request {request} expired before it was done, it was reclaimed")
+                processed_count += 1
+                idle_since = time.monotonic()
+
+        mlflow.log_metric(key="requests_processed", value=processed_count)
+        logger.info(f"queue empty, processed {processed_count} requests")
+
+
+if __name__ == "__main__":
+    process_queue()
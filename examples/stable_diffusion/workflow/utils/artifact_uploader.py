@@ -0,0 +1,124 @@
+"""
+This module contains a background artifact uploader.
+
+Images are PNG encoded and uploaded by a thread pool, so the caller can move on to generating the next batch while the
+previous one is still being uploaded.  At most `max_pending` images are held at once, beyond that `log_image` blocks
+until an upload completes (backpressure), which bounds the memory held by images waiting on a slow tracking server.
+"""
+
+import posixpath
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import mlflow
+import numpy
+from mlflow import MlflowClient
+from PIL import Image
+
+
+class ArtifactUploader:
+    """
+    Uploads images to MLflow runs in the background.
+
+    Usage:
+        with ArtifactUploader() as uploader:
+            uploader.log_image(array=array, artifact_file="image.png")
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 16, client: Optional[MlflowClient] = None):
+        """
+        Parameters
+        ----------
+        max_workers: int
+            The number of encode and upload threads.
+        max_pending: int
+            The number of images which may be queued or in flight before `log_image` blocks.
+        client: Optional[MlflowClient]
+            The client to upload with.
+        """
+
+        self.client: MlflowClient = client if client is not None else MlflowClient()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(value=max_pending)
+        self._futures: List[Future] = []
+        self._staging_dir: Path = Path(tempfile.mkdtemp(prefix="artifact-uploads-"))
+
+    def log_image(self, array: numpy.ndarray, artifact_file: str, run_id: Optional[str] = None) -> None:
+        """
+        Queues an image to be encoded and uploaded, blocking while `max_pending` images are already queued.
+
+        Parameters
+        ----------
+        array: numpy.ndarray
+            The image data.
+        artifact_file: str
+            The run relative artifact path of the image (`.png`).
+        run_id: Optional[str]
+            The run to upload to, defaults to the active run (resolved now, not when the upload happens).
+        """
+
+        run_id = run_id if run_id is not None else mlflow.active_run().info.run_id
+
+        # Surface upload failures as soon as possible rather than only when draining.
+        self._raise_failed()
+
+        self._slots.acquire()
+        try:
+            self._futures.append(self._executor.submit(self._upload, array, artifact_file, run_id))
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _upload(self, array: numpy.ndarray, artifact_file: str, run_id: str) -> None:
+        try:
+            # Staged in its own directory, as the file keeps the artifact name.
+            local_dir: Path = self._staging_dir / uuid.uuid4().hex
+            local_dir.mkdir()
+            local_file: Path = local_dir / posixpath.basename(artifact_file)
+            Image.fromarray(array).save(local_file.as_posix(), format="PNG")
+
+            artifact_path: Optional[str] = posixpath.dirname(artifact_file) or None
+            self.client.log_artifact(run_id=run_id, local_path=local_file.as_posix(), artifact_path=artifact_path)
+            shutil.rmtree(local_dir, ignore_errors=True)
+        finally:
+            self._slots.release()
+
+    def _raise_failed(self) -> None:
+        pending: List[Future] = []
+        for future in self._futures:
+            if not future.done():
+                pending.append(future)
+            elif future.exception() is not None:
+                raise future.exception()
+        self._futures = pending
+
+    def drain(self) -> None:
+        """
+        Waits for every queued upload to complete, raising the first upload error (if any).
+        """
+
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        """
+        Drains the queue and stops the threads.
+        """
+
+        try:
+            self.drain()
+        finally:
+            self._executor.shutdown(wait=True)
+            shutil.rmtree(self._staging_dir, ignore_errors=True)
+
+    def __enter__(self) -> "ArtifactUploader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
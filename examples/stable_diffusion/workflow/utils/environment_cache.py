@@ -0,0 +1,203 @@
+""" Worker Environment Cache Helpers
+
+The packed worker environment is stored in a content addressed cache (`<cache_dir>/<spec hash>.tar`) keyed by the
+resolved specification of the current conda environment (the explicit conda package list and the pip freeze).
+The unpacked worker environment records the hash it was built from, so deciding whether it is stale is a hash check.
+
+Archives are packed uncompressed, which allows the members to be extracted in parallel (a gzip stream can only be
+decompressed serially).
+"""
+
+import hashlib
+import shutil
+import subprocess
+import sys
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Bump to invalidate every cached environment (e.g. when the packing options change).
+CACHE_VERSION: str = "1"
+
+SPEC_HASH_FILE_NAME: str = ".spec_hash"
+
+
+def get_environment_spec_hash() -> str:
+    """
+    Computes the hash of the resolved specification of the current environment.
+
+    Returns
+    -------
+    spec_hash: str
+        The hex digest of the explicit conda package list (with md5s) and the pip freeze.
+    """
+
+    digest = hashlib.sha256(CACHE_VERSION.encode("utf-8"))
+    # Editable installs are not packed (`--ignore-editable-packages`), so they are excluded from the hash.
+    commands: List[List[str]] = [
+        ["conda", "list", "--explicit", "--md5"],
+        [sys.executable, "-m", "pip", "freeze", "--all", "--exclude-editable"],
+    ]
+    for args in commands:
+        result: subprocess.CompletedProcess = subprocess.run(args, capture_output=True, check=True)
+        # Skip comment lines, they hold details (such as the environment location) which do not affect its content.
+        for line in sorted(result.stdout.decode("utf-8").splitlines()):
+            if line and not line.startswith("#"):
+                digest.update(line.encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+def get_built_spec_hash(worker_env: Path) -> Optional[str]:
+    """
+    Gets the spec hash a worker environment was built from.
+
+    Parameters
+    ----------
+    worker_env: Path
+        The unpacked worker environment.
+
+    Returns
+    -------
+    spec_hash: Optional[str]
+        The spec hash, or None if the environment does not exist or was not completely built.
+    """
+
+    spec_hash_file: Path = worker_env / SPEC_HASH_FILE_NAME
+    return spec_hash_file.read_text(encoding="utf-8").strip() if spec_hash_file.exists() else None
+
+
+def pack_environment(cache_dir: Path, spec_hash: str, max_cached: int = 3) -> bool:
+    """
+    Packs the current environment into the cache, unless an archive for the spec hash already exists.
+
+    Parameters
+    ----------
+    cache_dir: Path
+        The cache directory.
+    spec_hash: str
+        The spec hash of the current environment.
+    max_cached: int
+        The number of archives to keep, the least recently used are removed.
+
+    Returns
+    -------
+    hit: bool
+        True if the archive was already cached.
+    """
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    archive: Path = cache_dir / f"{spec_hash}.tar"
+
+    hit: bool = archive.exists()
+    if hit:
+        archive.touch()
+    else:
+        temp_archive: Path = cache_dir / f"{spec_hash}.tar.tmp"
+        temp_archive.unlink(missing_ok=True)
+        args: List[str] = [
+            "conda",
+            "pack",
+            "--output",
+            temp_archive.as_posix(),
+            "--format",
+            "tar",
+            "--n-threads",
+            "-1",
+            "--ignore-editable-packages",
+        ]
+        subprocess.run(args, check=True)
+        temp_archive.rename(archive)
+
+    archives: List[Path] = sorted(cache_dir.glob("*.tar"), key=lambda item: item.stat().st_mtime, reverse=True)
+    for stale_archive in archives[max_cached:]:
+        stale_archive.unlink(missing_ok=True)
+
+    return hit
+
+
+def _extract(archive: Path, members: List[tarfile.TarInfo], target: Path) -> None:
+    # Archives are produced by `conda pack` from the current environment, so are trusted.
+    kwargs: Dict = {"filter": "fully_trusted"} if hasattr(tarfile, "fully_trusted_filter") else {}
+    with tarfile.open(archive.as_posix(), mode="r:") as tar:
+        for member in members:
+            tar.extract(member, path=target.as_posix(), **kwargs)
+
+
+def unpack_environment(archive: Path, target: Path, workers: int = 8) -> None:
+    """
+    Extracts an archive, with regular files extracted in parallel.
+
+    Parameters
+    ----------
+    archive: Path
+        The (uncompressed) archive.
+    target: Path
+        The directory to extract into.
+    workers: int
+        The number of extraction threads.
+    """
+
+    with tarfile.open(archive.as_posix(), mode="r:") as tar:
+        members: List[tarfile.TarInfo] = tar.getmembers()
+
+    directories: List[tarfile.TarInfo] = [member for member in members if member.isdir()]
+    files: List[tarfile.TarInfo] = [member for member in members if member.isfile()]
+    links: List[tarfile.TarInfo] = [member for member in members if member.issym() or member.islnk()]
+
+    # Directories first, then the files spread evenly (by size) over the threads, and finally the links to them.
+    _extract(archive=archive, members=directories, target=target)
+
+    shards: List[List[tarfile.TarInfo]] = [[] for _ in range(workers)]
+    for index, member in enumerate(sorted(files, key=lambda item: item.size, reverse=True)):
+        shards[index % workers].append(member)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(_extract, archive, shard, target) for shard in shards]:
+            future.result()
+
+    _extract(archive=archive, members=links, target=target)
+
+
+def build_worker_environment(cache_dir: Path, worker_env: Path, spec_hash: str, workers: int = 8) -> bool:
+    """
+    (Re)builds the worker environment for the spec hash from the cache, packing the current environment if required.
+
+    Parameters
+    ----------
+    cache_dir: Path
+        The cache directory.
+    worker_env: Path
+        The location of the unpacked worker environment.
+    spec_hash: str
+        The spec hash of the current environment.
+    workers: int
+        The number of extraction threads.
+
+    Returns
+    -------
+    hit: bool
+        True if the packed environment was already cached.
+    """
+
+    hit: bool = pack_environment(cache_dir=cache_dir, spec_hash=spec_hash)
+
+    # Extract alongside, then swap into place.  `conda-unpack` fixes up prefixes for where it is run from,
+    # so it must be run in the final location.
+    staging: Path = worker_env.with_name(f"{worker_env.name}.{spec_hash}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    unpack_environment(archive=cache_dir / f"{spec_hash}.tar", target=staging, workers=workers)
+
+    if worker_env.exists():
+        retired: Path = worker_env.with_name(f"{worker_env.name}.old")
+        shutil.rmtree(retired, ignore_errors=True)
+        worker_env.rename(retired)
+        shutil.rmtree(retired, ignore_errors=True)
+    staging.rename(worker_env)
+
+    subprocess.run(["chmod", "-R", "+w", worker_env.as_posix()], check=True)
+    subprocess.run([(worker_env / "bin" / "conda-unpack").as_posix()], check=True)
+
+    # Written last, an interrupted build is treated as stale.
+    (worker_env / SPEC_HASH_FILE_NAME).write_text(spec_hash, encoding="utf-8")
+
+    return hit
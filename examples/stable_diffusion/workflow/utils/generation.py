@@ -0,0 +1,139 @@
+"""
+This module contains image generation helper functions.
+"""
+
+import logging
+import secrets
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import keras
+import keras_cv
+import mlflow
+import numpy
+from keras_cv.models.stable_diffusion.stable_diffusion import StableDiffusion
+
+from .artifact_uploader import ArtifactUploader
+from .batch_logger import BatchLogger
+
+logger = logging.getLogger(__name__)
+
+# Models are expensive to build (weight loading and XLA compilation), so they are kept for the life of the process.
+_MODEL_CACHE: Dict[Tuple[int, int, str], StableDiffusion] = {}
+
+
+def get_model(image_width: int, image_height: int, precision: str = "float32") -> StableDiffusion:
+    """
+    Returns a Stable Diffusion model for the requested geometry and precision, building it on first use.
+
+    Parameters
+    ----------
+    image_width: int
+        Image Width
+    image_height: int
+        Image Height
+    precision: str
+        Default: `float32`
+        The keras mixed precision policy name to build the model with (`float32` or `mixed_float16`).
+
+    Returns
+    -------
+    model: StableDiffusion
+        The cached model instance.
+    """
+
+    key: Tuple[int, int, str] = (image_width, image_height, precision)
+    if key not in _MODEL_CACHE:
+        logger.info(f"building model for (width, height, precision)={key}")
+        start: float = time.perf_counter()
+
+        # The policy is captured by the layers when they are built.
+        keras.mixed_precision.set_global_policy(precision)
+        _MODEL_CACHE[key] = keras_cv.models.StableDiffusion(
+            img_width=image_width, img_height=image_height, jit_compile=True
+        )
+
+        if mlflow.active_run():
+            mlflow.log_metric(key="model_load_seconds", value=time.perf_counter() - start)
+
+    return _MODEL_CACHE[key]
+
+
+def process_request(
+    request_id: str,
+    data_base_dir: str,
+    batch_size: int,
+    num_steps: int,
+    image_width: int,
+    image_height: int,
+    precision: str = "float32",
+    uploader: Optional[ArtifactUploader] = None,
+) -> None:
+    """
+    Generates the images for a single request and reports them to the active MLflow run.
+
+    Parameters
+    ----------
+    request_id: str
+        The request ID.
+    data_base_dir: str
+        The base data directory that requests are stored in.
+    batch_size: int
+        Number of images to generate per batch.
+    num_steps: int:
+        The number of generation steps.
+    image_width: int
+        Image Width
+    image_height: int
+        Image Height
+    precision: str
+        Default: `float32`
+        The keras mixed precision policy name to generate with.
+    uploader: Optional[ArtifactUploader]
+        The uploader to queue the images on, which may still be uploading them when this returns (so that they upload
+        while the next request generates).  When not provided the images are uploaded (in parallel) before returning.
+    """
+
+    seed: int = secrets.randbelow(sys.maxsize)
+
+    # Reported in a single request when the request is complete.
+    with BatchLogger() as batch_logger:
+        batch_logger.log_params(
+            params={
+                "request_id": request_id,
+                "data_base_dir": data_base_dir,
+                "batch_size": batch_size,
+                "image_width": image_width,
+                "image_height": image_height,
+                "num_steps": num_steps,
+                "precision": precision,
+                "seed": seed,
+            }
+        )
+
+        request_base: Path = Path(".") / data_base_dir / request_id
+
+        request_output: Path = request_base / "output"
+        request_output.mkdir(parents=True, exist_ok=True)
+
+        prompt_file: str = (request_base / "prompt.txt").as_posix()
+        with open(file=prompt_file, mode="r", encoding="utf-8") as file:
+            prompt: str = file.read()
+        mlflow.log_text(text=prompt, artifact_file="prompt.txt")
+
+        model: StableDiffusion = get_model(image_width=image_width, image_height=image_height, precision=precision)
+
+        start: float = time.perf_counter()
+        arrays: List[numpy.ndarray] = model.text_to_image(prompt, batch_size=batch_size, num_steps=num_steps, seed=seed)
+        batch_logger.log_metric(key="generation_seconds", value=time.perf_counter() - start)
+
+    if uploader is None:
+        with ArtifactUploader() as request_uploader:
+            for array in arrays:
+                request_uploader.log_image(array=array, artifact_file=f"{str(uuid.uuid4())}.png")
+    else:
+        for array in arrays:
+            uploader.log_image(array=array, artifact_file=f"{str(uuid.uuid4())}.png")
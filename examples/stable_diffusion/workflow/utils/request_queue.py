@@ -0,0 +1,261 @@
+"""
+This module contains helper functions for the on-disk request queue used by persistent workers.
+
+The queue is a directory with one file per request, named `<enqueue time>-<uuid>.<attempt>.json`, in sub-directories:
+* `pending` - requests waiting to be processed.
+* `claimed` - requests a worker has taken ownership of.  The modification time is the start of the lease, which the
+  worker renews while it processes the request (see `hold_lease`).
+* `done` - requests which have been processed.
+* `failed` - requests whose lease expired `max_attempts` times.
+
+Ownership is taken with an atomic rename, so any number of workers sharing the directory can safely pull from it.
+The requests of a worker which crashes are returned to `pending` once their lease expires (see `reclaim_expired`).
+A queue belongs to one workflow run, and is removed by `remove_queue` once its workers are done.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PENDING: str = "pending"
+CLAIMED: str = "claimed"
+DONE: str = "done"
+FAILED: str = "failed"
+
+
+def enqueue_request(queue_dir: str, request: Dict) -> Path:
+    """
+    Adds a request to the queue.
+
+    Parameters
+    ----------
+    queue_dir: str
+        The queue directory.
+    request: Dict
+        The request parameters (must be json serializable).
+
+    Returns
+    -------
+    path: Path
+        The location of the pending request.
+    """
+
+    pending_path: Path = Path(queue_dir) / PENDING
+    pending_path.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary name first so workers never see a partially written request.
+    # The name leads with the enqueue time so that requests are claimed in order.
+    name: str = f"{time.time_ns():020d}-{uuid.uuid4()}.0.json"
+    temp_file: Path = pending_path / f".{name}.tmp"
+    with open(file=temp_file.as_posix(), mode="w", encoding="utf-8") as file:
+        json.dump(request, file)
+
+    request_file: Path = pending_path / name
+    temp_file.rename(request_file)
+    return request_file
+
+
+def claim_request(queue_dir: str) -> Optional[Tuple[Path, Dict]]:
+    """
+    Claims the oldest pending request.
+
+    Parameters
+    ----------
+    queue_dir: str
+        The queue directory.
+
+    Returns
+    -------
+    claim: Optional[Tuple[Path, Dict]]
+        A tuple of (claimed request file, request), or None if the queue is empty.
+    """
+
+    pending_path: Path = Path(queue_dir) / PENDING
+    claimed_path: Path = Path(queue_dir) / CLAIMED
+    claimed_path.mkdir(parents=True, exist_ok=True)
+
+    if not pending_path.exists():
+        return None
+
+    for candidate in sorted(pending_path.glob("*.json")):
+        claimed_file: Path = claimed_path / candidate.name
+        try:
+            # Start the lease before the rename, a rename keeps the modification time of the source.
+            os.utime(candidate)
+            candidate.rename(claimed_file)
+        except FileNotFoundError:
+            # Another worker claimed it first.
+            continue
+
+        with open(file=claimed_file.as_posix(), mode="r", encoding="utf-8") as file:
+            return claimed_file, json.load(file)
+
+    return None
+
+
+def renew_lease(claimed_file: Path) -> bool:
+    """
+    Restarts the lease of a claimed request.
+
+    Parameters
+    ----------
+    claimed_file: Path
+        The claimed request file returned by `claim_request`.
+
+    Returns
+    -------
+    renewed: bool
+        False if the request is no longer claimed (its lease expired and it was reclaimed).
+    """
+
+    try:
+        os.utime(claimed_file)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+@contextmanager
+def hold_lease(claimed_file: Path, lease_seconds: float) -> Iterator[None]:
+    """
+    Renews the lease of a claimed request in a background thread (three times per lease) while the context is open,
+    so a request which takes longer than `lease_seconds` to process is not reclaimed from a live worker.
+
+    Parameters
+    ----------
+    claimed_file: Path
+        The claimed request file returned by `claim_request`.
+    lease_seconds: float
+        How long a worker may hold a request before it is considered abandoned.
+    """
+
+    stopped: threading.Event = threading.Event()
+
+    def renew() -> None:
+        while not stopped.wait(timeout=lease_seconds / 3):
+            if not renew_lease(claimed_file=claimed_file):
+                return
+
+    renewer: threading.Thread = threading.Thread(target=renew, name=f"lease-{claimed_file.name}", daemon=True)
+    renewer.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        renewer.join()
+
+
+def complete_request(queue_dir: str, claimed_file: Path) -> bool:
+    """
+    Marks a claimed request as done.
+
+    Parameters
+    ----------
+    queue_dir: str
+        The queue directory.
+    claimed_file: Path
+        The claimed request file returned by `claim_request`.
+
+    Returns
+    -------
+    completed: bool
+        False if the request was no longer claimed (its lease expired and it was reclaimed by another worker).
+    """
+
+    done_path: Path = Path(queue_dir) / DONE
+    done_path.mkdir(parents=True, exist_ok=True)
+    try:
+        claimed_file.rename(done_path / claimed_file.name)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def reclaim_expired(queue_dir: str, lease_seconds: float, max_attempts: int = 3) -> int:
+    """
+    Returns claimed requests whose lease has expired (their worker is assumed to have crashed) to the pending state.
+    Requests which have expired `max_attempts` times are moved to the failed state instead.
+
+    Parameters
+    ----------
+    queue_dir: str
+        The queue directory.
+    lease_seconds: float
+        How long a worker may hold a request before it is considered abandoned.
+    max_attempts: int
+        The number of times a request may be claimed before it is considered failed.
+
+    Returns
+    -------
+    count: int
+        The number of requests returned to the pending state.
+    """
+
+    count: int = 0
+    now: float = time.time()
+    (Path(queue_dir) / FAILED).mkdir(parents=True, exist_ok=True)
+
+    for claimed_file in (Path(queue_dir) / CLAIMED).glob("*.json"):
+        try:
+            if now - claimed_file.stat().st_mtime < lease_seconds:
+                continue
+
+            name, attempt, _ = claimed_file.name.rsplit(".", 2)
+            attempts: int = int(attempt) + 1
+            if attempts >= max_attempts:
+                claimed_file.rename(Path(queue_dir) / FAILED / claimed_file.name)
+            else:
+                claimed_file.rename(Path(queue_dir) / PENDING / f"{name}.{attempts}.json")
+                count += 1
+        except FileNotFoundError:
+            # Completed, or reclaimed by another worker in the meantime.
+            continue
+
+    return count
+
+
+def has_claimed(queue_dir: str) -> bool:
+    """
+    Checks whether any request is claimed (being processed, or held by a worker which crashed).
+
+    Parameters
+    ----------
+    queue_dir: str
+        The queue directory.
+
+    Returns
+    -------
+    claimed: bool
+        True if a request is claimed.
+    """
+
+    return any((Path(queue_dir) / CLAIMED).glob("*.json"))
+
+
+def remove_queue(queue_dir: str) -> List[Dict]:
+    """
+    Removes a queue once its workers are done, so its requests are never seen by a later run.
+
+    Parameters
+    ----------
+    queue_dir: str
+        The queue directory.
+
+    Returns
+    -------
+    failed: List[Dict]
+        The requests which failed (see `reclaim_expired`).
+    """
+
+    failed: List[Dict] = []
+    for failed_file in sorted((Path(queue_dir) / FAILED).glob("*.json")):
+        with open(file=failed_file.as_posix(), mode="r", encoding="utf-8") as file:
+            failed.append(json.load(file))
+    shutil.rmtree(queue_dir, ignore_errors=True)
+    return failed
@@ -46,9 +46,14 @@ def run(some_parameter_int: int, some_parameter_float: float, some_parameter_str
 
     warnings.filterwarnings("ignore")
     with mlflow.start_run(nested=True, run_name=create_unique_name(name=run_name)):
-        mlflow.log_param(key="some_parameter_int", value=some_parameter_int)
-        mlflow.log_param(key="some_parameter_float", value=some_parameter_float)
-        mlflow.log_param(key="some_parameter_string", value=some_parameter_string)
+        # A single (batched) request, rather than one per param.
+        mlflow.log_params(
+            params={
+                "some_parameter_int": some_parameter_int,
+                "some_parameter_float": some_parameter_float,
+                "some_parameter_string": some_parameter_string,
+            }
+        )
 
         mlflow.log_dict(dictionary={"sample_key": "sample_value"}, artifact_file="business_metrics.json")
 
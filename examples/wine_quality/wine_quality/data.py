@@ -2,10 +2,25 @@
 This module contains data related helper functions.
 """
 
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
 import pandas as pd
 from pydantic import BaseModel
 from sklearn.model_selection import train_test_split
 
+# Parsed frames are cached here (as Parquet), keyed by the source file hash and `PROCESSING_VERSION`.
+DATA_CACHE_DIR: str = os.environ.get("DATA_CACHE_DIR", "data/cache")
+
+# Bump this whenever the way the CSV file is read (or processed) changes, so previously cached frames are not used.
+PROCESSING_VERSION: str = "1"
+
+# The source file hashes, by (path, size, modification time), so a file is only hashed once per process.
+_SOURCE_HASHES: dict[tuple, str] = {}
+
 
 class DataSet(BaseModel):
     """DataSet DTO"""
@@ -21,7 +36,7 @@ class DataSet(BaseModel):
         arbitrary_types_allowed = True
 
 
-def prepare_data(csv_url: str) -> DataSet:
+def prepare_data(csv_url: str, cache_dir: Optional[str] = DATA_CACHE_DIR) -> DataSet:
     """
     Loads the data from csv file, and returns train, test splits for training.
 
@@ -29,6 +44,8 @@ def prepare_data(csv_url: str) -> DataSet:
     ----------
     csv_url: str
         The location of the CSV file to load.
+    cache_dir: Optional[str]
+        The directory of the parsed data cache (see `load_data`), None disables the cache.
 
     Returns
     -------
@@ -36,12 +53,63 @@ def prepare_data(csv_url: str) -> DataSet:
         An instance of a DataSet DTO.
     """
 
-    (X, y) = load_data(csv_url=csv_url, truth_col_name="quality")
+    (X, y) = load_data(csv_url=csv_url, truth_col_name="quality", cache_dir=cache_dir)
     X_train, X_test, y_train, y_test = train_test_split(X, y)
     return DataSet(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
 
 
-def load_data(csv_url: str, truth_col_name: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+def _source_hash(path: Path) -> str:
+    stat: os.stat_result = path.stat()
+    key: tuple = (path.resolve().as_posix(), stat.st_size, stat.st_mtime_ns)
+    if key not in _SOURCE_HASHES:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        _SOURCE_HASHES[key] = digest.hexdigest()
+    return _SOURCE_HASHES[key]
+
+
+def read_data(csv_url: str, cache_dir: Optional[str] = DATA_CACHE_DIR) -> pd.DataFrame:
+    """
+    Reads the CSV file, re-using the frame cached by an earlier call when there is one.
+    The cache is keyed by the hash of the file and `PROCESSING_VERSION`, it is only used for local files.
+
+    Parameters
+    ----------
+    csv_url: str
+        The location of the CSV file to load.
+    cache_dir: Optional[str]
+        The directory of the parsed data cache, None disables the cache.
+
+    Returns
+    -------
+    data: pd.DataFrame
+        The data read.
+    """
+
+    source: Path = Path(csv_url)
+    if cache_dir is None or not source.is_file():
+        return pd.read_csv(csv_url, sep=",")
+
+    cache_key: str = hashlib.sha256(f"{_source_hash(path=source)}:{PROCESSING_VERSION}".encode("utf-8")).hexdigest()
+    cache_file: Path = Path(cache_dir) / f"{source.stem}-{cache_key[:16]}.parquet"
+    if cache_file.is_file():
+        return pd.read_parquet(cache_file)
+
+    data: pd.DataFrame = pd.read_csv(csv_url, sep=",")
+
+    # Written to a unique name then renamed, so concurrent runs never read a partially written file.
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    partial_file: Path = cache_file.with_name(f"{cache_file.name}.{uuid.uuid4().hex}.tmp")
+    data.to_parquet(partial_file)
+    os.replace(partial_file, cache_file)
+    return data
+
+
+def load_data(
+    csv_url: str, truth_col_name: str, cache_dir: Optional[str] = DATA_CACHE_DIR
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Loads features and truth data from specified CSV file and truth column.
 
@@ -51,6 +119,8 @@ def load_data(csv_url: str, truth_col_name: str) -> tuple[pd.DataFrame, pd.DataF
         The location of the CSV file to load.
     truth_col_name: str
         The name of column which contains the truth data.
+    cache_dir: Optional[str]
+        The directory of the parsed data cache (see `read_data`), None disables the cache.
 
     Returns
     -------
@@ -58,7 +128,7 @@ def load_data(csv_url: str, truth_col_name: str) -> tuple[pd.DataFrame, pd.DataF
         A tuple of (X, y)
     """
 
-    data: pd.DataFrame = pd.read_csv(csv_url, sep=",")
+    data: pd.DataFrame = read_data(csv_url=csv_url, cache_dir=cache_dir)
     X: pd.DataFrame = data.drop([truth_col_name], axis=1)
     y: pd.DataFrame = data[[truth_col_name]]
     return X, y
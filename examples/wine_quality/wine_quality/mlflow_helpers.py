@@ -3,11 +3,15 @@ This module contains MLflow related helper functions.
 """
 
 import os
+from typing import List, Optional
 
 from mlflow import MlflowClient, MlflowException
 from mlflow.entities import Run
 from mlflow.entities.model_registry import ModelVersion
 from mlflow.exceptions import RestException
+from mlflow.store.entities.paged_list import PagedList
+from mlflow.store.tracking import SEARCH_MAX_RESULTS_DEFAULT
+from pydantic import BaseModel
 
 
 def upsert_model_registry(client: MlflowClient) -> None:
@@ -51,3 +55,109 @@ def register_best_model(client: MlflowClient, run: Run) -> ModelVersion:
         tags={"run_id": run.info.run_id},
     )
     return model_version
+
+
+class RunRanking(BaseModel):
+    """RunRanking DTO"""
+
+    metric: str
+    greater_is_better: bool = False
+
+    @property
+    def order_by(self) -> str:
+        """
+        The MLflow search `order_by` clause ranking the best run first.
+        """
+
+        return f"metrics.`{self.metric}` {'DESC' if self.greater_is_better else 'ASC'}"
+
+
+def search_best_runs(
+    client: MlflowClient,
+    experiment_ids: List[str],
+    ranking: RunRanking,
+    filter_string: str = "",
+    max_results: int = 1,
+) -> List[Run]:
+    """
+    Gets the best runs by a metric, ordered and limited by the tracking server (rather than fetching every candidate).
+    Runs without the metric are excluded.
+
+    Parameters
+    ----------
+    client: MlflowClient
+        Instance of an MLflow client.
+    experiment_ids: List[str]
+        The experiments to search.
+    ranking: RunRanking
+        The metric to rank the runs by, and flag for ranking the greatest (rather than least) metric first.
+    filter_string: str
+        An MLflow search filter restricting the candidate runs, e.g. "tags.mlflow.parentRunId = '<<run id>>'".
+    max_results: int
+        The number of runs to return, no more than these are requested from the tracking server.
+
+    Returns
+    -------
+    runs: List[Run]
+        Up to `max_results` runs, best first.
+    """
+
+    runs: List[Run] = []
+    page_token: Optional[str] = None
+
+    # A single request unless more runs are asked for than the server returns per page.
+    while len(runs) < max_results:
+        page: PagedList[Run] = client.search_runs(
+            experiment_ids=experiment_ids,
+            filter_string=filter_string,
+            order_by=[ranking.order_by],
+            max_results=min(max_results - len(runs), SEARCH_MAX_RESULTS_DEFAULT),
+            page_token=page_token,
+        )
+        scored: List[Run] = [run for run in page if ranking.metric in run.data.metrics]
+        runs.extend(scored)
+        page_token = page.token
+        # Runs without the metric are ordered last, so once a page holds one no further page can add a run.
+        if not page_token or len(scored) < len(page):
+            break
+
+    return runs[:max_results]
+
+
+def get_best_run(
+    client: MlflowClient,
+    experiment_ids: List[str],
+    metric: str,
+    greater_is_better: bool = False,
+    filter_string: str = "",
+) -> Optional[Run]:
+    """
+    Gets the best run by a metric with a single search (see `search_best_runs`).
+
+    Parameters
+    ----------
+    client: MlflowClient
+        Instance of an MLflow client.
+    experiment_ids: List[str]
+        The experiments to search.
+    metric: str
+        The metric to rank the runs by.
+    greater_is_better: bool
+        Flag for selecting the run with the greatest (rather than least) metric.
+    filter_string: str
+        An MLflow search filter restricting the candidate runs.
+
+    Returns
+    -------
+    run: Optional[Run]
+        The best run, or None if no run has the metric.
+    """
+
+    runs: List[Run] = search_best_runs(
+        client=client,
+        experiment_ids=experiment_ids,
+        ranking=RunRanking(metric=metric, greater_is_better=greater_is_better),
+        filter_string=filter_string,
+        max_results=1,
+    )
+    return runs[0] if runs else None
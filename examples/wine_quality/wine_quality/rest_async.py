@@ -0,0 +1,264 @@
+"""
+This module contains asyncio REST helper functions, the counterparts of those in `wine_quality.rest`.
+
+Every call shares one connection pool, and the number of requests in flight is bounded by a semaphore, so callers can
+`asyncio.gather` thousands of requests without opening a connection (or a thread) per request.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+import pandas as pd
+
+from ae5_tools import demand_env_var
+from wine_quality.rest import EndpointError, ScoringOptions, _chunk, _chunk_request, _retry_chunk
+
+# The module level client, shared by every call so that connections are re-used.
+_CLIENT: Optional["AsyncClient"] = None
+
+
+class AsyncClient:
+    """
+    A pooled aiohttp session and a concurrency semaphore.
+    Both are bound to an event loop, they are created on first use and re-created if used from a different loop.
+    """
+
+    def __init__(self, pool_size: int = 100, max_concurrency: int = 100, keep_alive: bool = True):
+        """
+        Parameters
+        ----------
+        pool_size: int
+            The maximum number of connections kept open per host.
+        max_concurrency: int
+            The maximum number of requests in flight at once, further requests wait for a slot.
+        keep_alive: bool
+            Flag for keeping connections open between requests.  When disabled every request pays for a new connection.
+        """
+
+        self.pool_size: int = pool_size
+        self.max_concurrency: int = max_concurrency
+        self.keep_alive: bool = keep_alive
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _bind(self) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # A session left on another loop can no longer be closed from here, it is dropped with that loop.
+            connector: aiohttp.TCPConnector = aiohttp.TCPConnector(
+                limit=self.pool_size, limit_per_host=self.pool_size, force_close=not self.keep_alive, ssl=False
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(value=self.max_concurrency)
+            self._loop = loop
+
+    async def post(
+        self, url: str, input_data: Union[dict, bytes], headers: dict, timeout: float, content_encoding: Optional[str]
+    ) -> dict:
+        """
+        POSTs the data once (without retries).
+
+        Parameters
+        ----------
+        url: str
+            The URL to POST to.
+        input_data: Union[dict, bytes]
+            A JSON serializable dict or an encoded body.
+        headers: dict
+            The request headers.
+        timeout: float
+            Seconds to wait for the response, not counting the time spent waiting for a slot.
+        content_encoding: Optional[str]
+            The `Content-Encoding` of an encoded body (e.g. `gzip`).
+
+        Returns
+        -------
+        response: dict
+            The response, raises `EndpointError` (or an `aiohttp.ClientError`) under failure conditions.
+        """
+
+        self._bind()
+
+        headers = {"Content-Type": "application/json", **headers}
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        body: bytes = input_data if isinstance(input_data, bytes) else json.dumps(input_data).encode("utf-8")
+
+        async with self._semaphore:
+            async with self._session.post(
+                url=url, data=body, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                text: str = await response.text()
+                if response.status != 200:
+                    raise EndpointError(status_code=response.status, text=text)
+                return json.loads(text)
+
+    async def close(self) -> None:
+        """
+        Closes the session (and its connections).
+        """
+
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+
+async def configure_client(pool_size: int = 100, max_concurrency: int = 100, keep_alive: bool = True) -> AsyncClient:
+    """
+    (Re)creates the pooled client used by `invoke_rest_endpoint_async`.
+    This is optional, a client with the default settings is created on first use.  The previous client is closed.
+
+    Parameters
+    ----------
+    pool_size: int
+        The maximum number of connections kept open per host.
+    max_concurrency: int
+        The maximum number of requests in flight at once.
+    keep_alive: bool
+        Flag for keeping connections open between requests.
+
+    Returns
+    -------
+    client: AsyncClient
+        The new client.
+    """
+
+    global _CLIENT  # pylint: disable=global-statement
+
+    previous: Optional[AsyncClient] = _CLIENT
+    _CLIENT = AsyncClient(pool_size=pool_size, max_concurrency=max_concurrency, keep_alive=keep_alive)
+    if previous is not None:
+        await previous.close()
+    return _CLIENT
+
+
+def get_client() -> AsyncClient:
+    """
+    Gets the pooled client, creating it (with the default settings) on first use.
+
+    Returns
+    -------
+    client: AsyncClient
+        The module level client.
+    """
+
+    global _CLIENT  # pylint: disable=global-statement
+
+    if _CLIENT is None:
+        _CLIENT = AsyncClient()
+    return _CLIENT
+
+
+async def close_client() -> None:
+    """
+    Closes the pooled client's connections, e.g. before the event loop is closed.
+    """
+
+    if _CLIENT is not None:
+        await _CLIENT.close()
+
+
+async def invoke_rest_endpoint_async(
+    endpoint_url: str,
+    input_data: Union[dict, bytes],
+    auth: bool = True,
+    timeout: float = 30,
+    content_encoding: Optional[str] = None,
+) -> dict:
+    """
+    Invokes the REST endpoint.
+
+    Parameters
+    ----------
+    endpoint_url: str
+        The URL of the REST endpoint.
+    input_data: Union[dict, bytes]
+        The data to POST to the endpoint, either a JSON serializable dict or an encoded body (see `encode_payload`).
+    auth: bool
+        Flag for providing bearer token.
+    timeout: float
+        Seconds to wait for the endpoint to respond.
+    content_encoding: Optional[str]
+        The `Content-Encoding` of an encoded body (e.g. `gzip`).
+
+    Returns
+    -------
+    response: dict
+        The response from the API, raises `EndpointError` (or an `aiohttp.ClientError`) under failure conditions.
+    """
+
+    headers: dict = {}
+    if auth:
+        headers: dict = {"Authorization": f"Bearer {demand_env_var(name='SELF_HOSTED_MODEL_ENDPOINT_TOKEN')}"}
+
+    return await get_client().post(
+        url=f"{endpoint_url}/invocations",
+        input_data=input_data,
+        headers=headers,
+        timeout=timeout,
+        content_encoding=content_encoding,
+    )
+
+
+async def _predict_chunk(endpoint_url: str, chunk: pd.DataFrame, auth: bool, options: ScoringOptions) -> pd.DataFrame:
+    # Retries only this chunk, on transport errors, timeouts and server errors.
+    request: Dict[str, Any] = _chunk_request(chunk=chunk, options=options)
+    attempt: int = 0
+    while True:
+        try:
+            return pd.DataFrame(await invoke_rest_endpoint_async(endpoint_url=endpoint_url, auth=auth, **request))
+        except (aiohttp.ClientError, asyncio.TimeoutError, EndpointError) as error:
+            if not _retry_chunk(error=error, attempt=attempt, options=options):
+                raise
+            await asyncio.sleep(0.5 * 2**attempt)
+            attempt += 1
+
+
+async def predict_async(
+    endpoint_url: Optional[str], data_x: pd.DataFrame, auth: bool = True, options: Optional[ScoringOptions] = None
+) -> pd.DataFrame:
+    """
+    Get prediction for the given input.
+    The input is split into chunks of rows which are scored concurrently (up to the client's `max_concurrency`), and
+    the predictions are returned in order.
+
+    Parameters
+    ----------
+    endpoint_url: str
+        The URL of the REST endpoint.
+    data_x: pd.DataFrame
+        The feature data to predict on.
+    auth: bool
+        Flag for providing bearer token.
+    options: Optional[ScoringOptions]
+        How the data is sent (chunk size, per chunk retries, timeout, payload format and compression), defaults to
+        `ScoringOptions()`, see `predict`.
+
+    Returns
+    -------
+    y_pred: pd.DataFrame
+        A dataframe of predictions.
+    """
+
+    endpoint_url = endpoint_url if endpoint_url else demand_env_var(name="SELF_HOSTED_MODEL_ENDPOINT")
+    options = options if options is not None else ScoringOptions()
+
+    # `gather` returns the results in the order of the chunks, regardless of the order they complete in.
+    y_preds: List[pd.DataFrame] = await asyncio.gather(
+        *(
+            _predict_chunk(endpoint_url=endpoint_url, chunk=chunk, auth=auth, options=options)
+            for chunk in _chunk(data_x=data_x, chunk_size=options.chunk_size)
+        )
+    )
+
+    return pd.concat(y_preds, ignore_index=True)
@@ -0,0 +1,276 @@
+"""
+This module contains a parallel hyperparameter sweep runner.
+
+Trials run across a process pool, each worker reads the prepared `DataSet` from shared memory (rather than having it
+pickled for every trial), and each trial is tracked as a nested MLflow run under a parent sweep run.  Trials report
+their metrics back from the worker, so only the best run is fetched from the tracking server.
+
+The workers are started fresh (with `forkserver`, or `spawn` where it is unavailable) rather than forked from the
+caller, which may already have started thread pools (e.g. OpenMP in xgboost) that a forked child can deadlock on.
+`train` and the trial parameters are sent with cloudpickle, so they may still be defined in a notebook.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from multiprocessing.context import BaseContext
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Optional
+
+import cloudpickle
+import mlflow
+import numpy as np
+import pandas as pd
+from mlflow.entities import Run
+from pydantic import BaseModel
+from threadpoolctl import threadpool_limits
+
+from wine_quality.data import DataSet
+
+# The frames of a `DataSet`, in the order they are placed in shared memory.
+_FRAMES: tuple[str, ...] = ("X_train", "X_test", "y_train", "y_test")
+
+# The data set of this worker process, attached from shared memory by `_init_worker`.
+_WORKER_DATA_SET: Optional[DataSet] = None
+_WORKER_SHARED_MEMORY: list[SharedMemory] = []
+
+
+class TrialRun(BaseModel):
+    """TrialRun DTO, returned by `train`"""
+
+    run_id: str
+    metrics: dict[str, float] = {}
+
+
+class Trial(BaseModel):
+    """Trial DTO"""
+
+    parameters: dict[str, Any]
+    run_id: Optional[str] = None
+    metrics: dict[str, float] = {}
+    error: Optional[str] = None
+
+
+class SweepConfig(BaseModel):
+    """SweepConfig DTO"""
+
+    metric: str
+    greater_is_better: bool = False
+    max_workers: Optional[int] = None
+    run_name: str = "sweep"
+
+
+class SweepResult(BaseModel):
+    """SweepResult DTO"""
+
+    parent_run_id: str
+    trials: list[Trial]
+    best: Optional[Trial] = None
+    best_run: Optional[Run] = None
+
+    class Config:
+        """Pydantic class config override"""
+
+        arbitrary_types_allowed = True
+
+
+class SharedDataSet:
+    """
+    Places the frames of a `DataSet` in shared memory, for the life of the context.
+
+    Usage:
+        with SharedDataSet(ds=ds) as shared:
+            ds = SharedDataSet.attach(handle=shared.handle)[0]  # (in another process)
+    """
+
+    def __init__(self, ds: DataSet):
+        """
+        Parameters
+        ----------
+        ds: DataSet
+            The data set to share, every column must be numeric.
+        """
+
+        self.handle: list[dict] = []
+        self._blocks: list[SharedMemory] = []
+
+        try:
+            for name in _FRAMES:
+                frame: pd.DataFrame = getattr(ds, name)
+                if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes):
+                    raise ValueError(f"Only numeric data can be shared, {name} has dtypes: {frame.dtypes.to_dict()}")
+
+                values: np.ndarray = frame.to_numpy()
+                block: SharedMemory = SharedMemory(create=True, size=max(values.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+                self.handle.append(
+                    {
+                        "frame": name,
+                        "block": block.name,
+                        "shape": values.shape,
+                        "dtype": values.dtype.str,
+                        "columns": frame.columns.tolist(),
+                        "dtypes": frame.dtypes.to_dict(),
+                        "index": frame.index,
+                    }
+                )
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def attach(handle: list[dict]) -> tuple[DataSet, list[SharedMemory]]:
+        """
+        Builds a (read only) `DataSet` over the shared memory of a `SharedDataSet` handle, without copying the data.
+
+        Parameters
+        ----------
+        handle: list[dict]
+            The `handle` of the `SharedDataSet`.
+
+        Returns
+        -------
+        tuple
+            A tuple of (data set, shared memory blocks), the blocks must be kept open while the data set is in use.
+        """
+
+        frames: dict[str, pd.DataFrame] = {}
+        blocks: list[SharedMemory] = []
+        for entry in handle:
+            block: SharedMemory = SharedMemory(name=entry["block"])
+            blocks.append(block)
+            values: np.ndarray = np.ndarray(entry["shape"], dtype=np.dtype(entry["dtype"]), buffer=block.buf)
+            values.flags.writeable = False
+            frame: pd.DataFrame = pd.DataFrame(values, columns=entry["columns"], index=entry["index"], copy=False)
+            # Only frames which were upcast to a common dtype are converted (and so copied).
+            if (frame.dtypes != pd.Series(entry["dtypes"])).any():
+                frame = frame.astype(entry["dtypes"])
+            frames[entry["frame"]] = frame
+        return DataSet(**frames), blocks
+
+    def close(self) -> None:
+        """
+        Releases the shared memory.
+        """
+
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedDataSet":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _context() -> BaseContext:
+    # Fresh workers, with the heavy imports preloaded once by the fork server (where there is one).
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context: BaseContext = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__, "mlflow", "pandas"])
+    return context
+
+
+def _init_worker(handle: list[dict], tracking_uri: str, parent_run_id: str, threads_per_worker: int) -> None:
+    global _WORKER_DATA_SET, _WORKER_SHARED_MEMORY  # pylint: disable=global-statement
+
+    _WORKER_DATA_SET, _WORKER_SHARED_MEMORY = SharedDataSet.attach(handle=handle)
+
+    # Keep the workers from each starting a thread per core (e.g. OpenMP in xgboost, BLAS in sklearn).
+    threadpool_limits(limits=threads_per_worker)
+
+    # Make the sweep run the active run of this process, so runs started with `nested=True` are nested under it.
+    # It is never ended here, the sweep ends it once every trial is complete.
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.start_run(run_id=parent_run_id)
+
+
+def _run_trial(train: bytes, parameters: bytes) -> TrialRun:
+    # (Both are cloudpickled, see `_run_trials`.)
+    run: TrialRun = cloudpickle.loads(train)(ds=_WORKER_DATA_SET, **cloudpickle.loads(parameters))
+    if not isinstance(run, TrialRun):
+        raise TypeError(f"train must return a TrialRun, not {type(run).__name__}")
+    return run
+
+
+def _run_trials(
+    train: Callable[..., TrialRun], trials: list[Trial], handle: list[dict], parent_run_id: str, max_workers: int
+) -> None:
+    # Runs every trial across a process pool, recording the run id and metrics (or the error) of each on the trial.
+    threads_per_worker: int = max(1, (os.cpu_count() or 1) // max_workers)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=_context(),
+        initializer=_init_worker,
+        initargs=(handle, mlflow.get_tracking_uri(), parent_run_id, threads_per_worker),
+    ) as executor:
+        pickled_train: bytes = cloudpickle.dumps(train)
+        futures: dict[Future, Trial] = {
+            executor.submit(_run_trial, pickled_train, cloudpickle.dumps(trial.parameters)): trial for trial in trials
+        }
+        for future in as_completed(futures):
+            try:
+                run: TrialRun = future.result()
+                futures[future].run_id, futures[future].metrics = run.run_id, run.metrics
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                futures[future].error = repr(error)
+
+
+def run_sweep(
+    train: Callable[..., TrialRun], ds: DataSet, trials: list[dict[str, Any]], config: SweepConfig
+) -> SweepResult:
+    """
+    Runs `train(ds=ds, **parameters)` for each trial's parameters across a process pool.
+    `train` must start its run with `mlflow.start_run(..., nested=True)` and return a `TrialRun` of the run id and the
+    metrics it logged (at least `config.metric`), so the trials are ranked without a tracking query per trial.  The
+    workers do not inherit the caller's state, so `train` must set up anything it relies on (e.g. MLflow autologging).
+
+    Parameters
+    ----------
+    train: Callable[..., TrialRun]
+        The training function.
+    ds: DataSet
+        The data set every trial trains on, shared with the workers through shared memory.
+    trials: list[dict[str, Any]]
+        The keyword arguments (other than `ds`) of each trial.
+    config: SweepConfig
+        The `metric` the best trial is selected on, flag for selecting the trial with the greatest (rather than least)
+        metric (`greater_is_better`), the number of trials to run at once (`max_workers`, defaults to the number of
+        cores), and the name of the parent sweep run (`run_name`).
+
+    Returns
+    -------
+    result: SweepResult
+        Every trial (with the metrics its `train` returned), the best trial, and the run of the best trial (the only
+        run fetched from the tracking server).
+    """
+
+    max_workers: int = config.max_workers if config.max_workers else os.cpu_count() or 1
+    results: list[Trial] = [Trial(parameters=parameters) for parameters in trials]
+
+    with mlflow.start_run(run_name=config.run_name, nested=True) as parent_run, SharedDataSet(ds=ds) as shared:
+        mlflow.log_params({"trials": len(trials), "max_workers": max_workers, "metric": config.metric})
+        _run_trials(
+            train=train,
+            trials=results,
+            handle=shared.handle,
+            parent_run_id=parent_run.info.run_id,
+            max_workers=max_workers,
+        )
+
+        scored: list[Trial] = [trial for trial in results if config.metric in trial.metrics]
+        best: Optional[Trial] = None
+        best_run: Optional[Run] = None
+        if scored:
+            pick: Callable = max if config.greater_is_better else min
+            best = pick(scored, key=lambda trial: trial.metrics[config.metric])
+            best_run = mlflow.get_run(run_id=best.run_id)
+            mlflow.log_metric(key=f"best_{config.metric}", value=best.metrics[config.metric])
+            mlflow.set_tag(key="best_run_id", value=best.run_id)
+        mlflow.log_metric(key="failed_trials", value=sum(trial.error is not None for trial in results))
+
+    return SweepResult(parent_run_id=parent_run.info.run_id, trials=results, best=best, best_run=best_run)